@@ -0,0 +1,148 @@
+"""
+Module: batch
+
+This module provides the batch mode, which builds the wrapped of many users at once: a list
+of logins, or every member of an organization.
+
+The users share a single SharedScanSource, so the commit history of each repository of the
+year is listed only once, whatever the number of users it's shared by, and each commit is
+handed to the accumulator of its author. Every report is then built from that one pass.
+Private repositories are only listed when asked for, and only those the token can see. In
+an organization, the repositories created by each member are listed apart, since those
+of the organization weren't created by any member.
+
+Functions:
+    - get_batch_users(github_instance, year, show_private, show_repo_info, logins,
+    organization, ...): Returns the UserData of every user of the batch.
+    - scan_batch(users, on_progress): Scans the repositories of every user at once.
+    - print_batch_cost(users): Prints the requests made against the per-user scans.
+
+Example:
+    users = get_batch_users(github_instance, 2023, False, False, organization="my-org")
+    scan_batch(users)
+    for user in users:
+        print(user.username, user.total_count)
+    print_batch_cost(users)
+"""
+
+from datetime import datetime
+from github import Github, NamedUser
+from api.user import UserData
+from api.catalog import RepoCatalog
+from api.sources import SharedScanSource
+from api.commit_details import AsyncCommitFetcher
+
+
+def _member_repos(github_instance: Github, member: NamedUser, show_private: bool,
+                  owned: bool = False):
+    """
+    Returns the repositories of a member: those of the owner of the token, private ones
+    included if show_private, or the public ones of any other user
+
+    Args:
+        github_instance (Github): Github instance
+        member (NamedUser): Member
+        show_private (bool): Whether private repositories are included
+        owned (bool): Whether only the repositories the member owns are listed
+
+    Returns:
+        PaginatedList: Repositories
+    """
+    authenticated = github_instance.get_user()
+    if member.login.lower() == authenticated.login.lower():
+        if owned:
+            return authenticated.get_repos(
+                visibility="all" if show_private else "public", affiliation="owner")
+        return authenticated.get_repos(visibility="all" if show_private else "public")
+    # Only the public repositories of other users can be listed
+    return member.get_repos(type="owner" if owned else "all")
+
+
+def get_batch_users(github_instance: Github, year: int, show_private: bool,
+                    show_repo_info: bool, logins: list = None, organization: str = None,
+                    max_workers: int = 8, commit_fetcher: AsyncCommitFetcher = None):
+    """
+    Returns the UserData of every user of the batch, sharing a SharedScanSource. With an
+    organization, the users are its members and their repositories those of the
+    organization, the repositories they created being listed for each of them; otherwise,
+    each login keeps their own repositories.
+
+    Args:
+        github_instance (Github): Github instance
+        year (int): Year
+        show_private (bool): Whether private repositories are included
+        show_repo_info (bool): Whether the extra info. of every repository is shown
+        logins (list): Logins of the users
+        organization (str): Login of the organization
+        max_workers (int): Maximum number of repositories scanned at the same time
+        commit_fetcher (AsyncCommitFetcher): Fetcher for the commit details, if any
+
+    Returns:
+        list: UserData of every user
+    """
+    repos = None
+    if organization is not None:
+        org = github_instance.get_organization(organization)
+        # Listed once for every member
+        repos = RepoCatalog(org.get_repos(type="all" if show_private else "public"))
+        members = list(org.get_members())
+    else:
+        members = [github_instance.get_user(login) for login in logins or []]
+
+    # A single user only needs their own commits listed
+    source = SharedScanSource(max_workers, github_instance.per_page,
+                              author=members[0].login if len(members) == 1 else None)
+
+    users = []
+    for member in members:
+        user = UserData(github_instance, member.login, year, show_private,
+                        show_repo_info, source=source, commit_fetcher=commit_fetcher,
+                        commit_store=source.store)
+        user.user = member
+        if repos is not None:
+            user.user_repos = repos
+            user.owned_repos = _member_repos(github_instance, member, show_private, True)
+        else:
+            user.user_repos = _member_repos(github_instance, member, show_private)
+        users.append(user)
+
+    return users
+
+
+def scan_batch(users: list, on_progress=None):
+    """
+    Scans the repositories of every user of the batch at once, every repository only once
+
+    Args:
+        users (list): UserData of the users, sharing a SharedScanSource
+        on_progress: If provided, called with the repositories scanned and the total
+    """
+    if not users:
+        return
+
+    repos = {}
+    for user in users:
+        for repo in user.get_active_repos():
+            repos.setdefault(repo.id, repo)
+
+    year = users[0].year
+    users[0].source.scan(list(repos.values()), datetime(year, 1, 1, 0, 0, 0),
+                         datetime(year + 1, 1, 1, 0, 0, 0), on_progress)
+
+
+def print_batch_cost(users: list):
+    """
+    Prints the requests sent to list the commits of the batch, against those that scanning
+    the repositories of each user (or year) separately would send
+
+    Args:
+        users (list): UserData of the users, sharing a SharedScanSource
+    """
+    if not users:
+        return
+
+    shared, separate = users[0].source.get_request_counts(users)
+    saved = 100 * (1 - shared / separate) if separate else 0
+    change = f"{saved:.0f}% saved" if saved >= 0 else f"{-saved:.0f}% more"
+    print(f"Listed the commits of {len(users)} reports with {shared} requests, "
+          f"instead of an estimated {separate} scanning each of them separately ({change})")
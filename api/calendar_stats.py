@@ -0,0 +1,289 @@
+"""
+Module: calendar_stats
+
+This module provides the calendar analytics of the commits of a year: streaks, active
+days, monthly histogram, weekday x hour heatmap and busiest day.
+
+The commits are kept as fixed-size arrays of counters, one per day of the year and one
+per hour of the week, and every statistic is computed from them with whole-array
+operations (byte masks, slices and splits) instead of walking sorted dates. Raw commit
+timestamps, possibly millions of them, are bucketed in a single pass of C-level iterators.
+
+Counts per day and per hour of the week are in UTC: a commit can't be moved to another day
+without its time. Calendars in another UTC offset, where both the days and the heatmap are
+shifted, are built from the timestamps of the commits.
+
+Classes:
+    CalendarStats: Per-day and per-hour-of-week commit counts of a year.
+
+Functions:
+    - hour_of_week(date): Returns the hour of the week (0 is Monday 00:00 UTC) of a date.
+
+Example:
+    stats = CalendarStats(2023, [{"2023-01-02": 3}], [{"0": 3}])
+    print(stats.longest_streak(), stats.monthly_histogram(), stats.busiest_day())
+"""
+
+from array import array
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from itertools import repeat
+import operator
+
+HOURS_PER_WEEK = 7 * 24
+SECONDS_PER_DAY = 24 * 3600
+# 1970-01-01 was a Thursday: hours from the Monday before it
+EPOCH_HOUR_OF_WEEK = 3 * 24
+
+
+def hour_of_week(commit_date: datetime):
+    """
+    Returns the hour of the week of a date, 0 being Monday 00:00 UTC
+
+    Args:
+        commit_date (datetime): Date (naive dates are taken as UTC)
+
+    Returns:
+        int: Hour of the week, between 0 and 167
+    """
+    if commit_date.tzinfo is None:
+        commit_date = commit_date.replace(tzinfo=timezone.utc)
+    return (int(commit_date.timestamp()) // 3600 + EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+
+
+class CalendarStats:
+    """
+    Per-day and per-hour-of-week commit counts of a year
+    """
+
+    def __init__(self, year: int, commit_days=(), commit_hours=()):
+        """
+        Args:
+            year (int): Year
+            commit_days: Iterable of dictionaries of commits per UTC day ("YYYY-MM-DD" ->
+            count)
+            commit_hours: Iterable of dictionaries of commits per UTC hour of the week
+            (str(hour_of_week) -> count)
+        """
+        self.__year = year
+        self.__first_day = date(year, 1, 1)
+        self.__days = array("I", bytes(4 * (date(year + 1, 1, 1) - self.__first_day).days))
+        self.__hours = array("I", bytes(4 * HOURS_PER_WEEK))
+        self.__utc_offset = 0
+
+        for days in commit_days:
+            for day, count in days.items():
+                index = (date.fromisoformat(day) - self.__first_day).days
+                if 0 <= index < len(self.__days):
+                    self.__days[index] += count
+
+        for hours in commit_hours:
+            for hour, count in hours.items():
+                self.__hours[int(hour) % HOURS_PER_WEEK] += count
+
+    @classmethod
+    def from_timestamps(cls, year: int, timestamps, utc_offset: int = 0):
+        """
+        Builds the counts from raw commit timestamps
+
+        Args:
+            year (int): Year
+            timestamps: Iterable of Unix timestamps, in seconds (such as an array("q"))
+            utc_offset (int): Hours the days and the heatmap are shifted by
+
+        Returns:
+            CalendarStats: Counts of the commits made during the year, in the UTC offset
+        """
+        offset = utc_offset * 3600
+        first = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()) - offset
+
+        stats = cls(year)
+        stats.__utc_offset = utc_offset
+        # Bucket by hour of the year in a single pass of C-level iterators, then fold the
+        # (at most 8784) buckets into days and hours of the week
+        hours = Counter(map(operator.floordiv, map(operator.sub, timestamps, repeat(first)),
+                            repeat(3600)))
+        first_hour = ((first + offset) // 3600 + EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+        for hour, count in hours.items():
+            if 0 <= hour < 24 * len(stats.__days):
+                stats.__days[hour // 24] += count
+                stats.__hours[(first_hour + hour) % HOURS_PER_WEEK] += count
+        return stats
+
+    @classmethod
+    def from_arrays(cls, year: int, days, hours, utc_offset: int = 0):
+        """
+        Builds the counts from per-day and per-hour arrays, such as those of another
+        CalendarStats
+
+        Args:
+            year (int): Year
+            days: Commits of every day of the year
+            hours: Commits of every hour of the week, already shifted by utc_offset
+            utc_offset (int): Hours the days and the heatmap were shifted by
+
+        Returns:
+            CalendarStats: Counts of the commits made during the year
+        """
+        stats = cls(year)
+        stats.__utc_offset = utc_offset
+        if len(days) != len(stats.__days) or len(hours) != HOURS_PER_WEEK:
+            raise Exception(f"Calendar arrays don't match the days and hours of {year}")
+        stats.__days = array("I", days)
+        stats.__hours = array("I", hours)
+        return stats
+
+    @property
+    def year(self):
+        """
+        Getter for year
+        """
+        return self.__year
+
+    @property
+    def utc_offset(self):
+        """
+        Getter for utc_offset, the hours the days and the heatmap are shifted by
+        """
+        return self.__utc_offset
+
+    @property
+    def days(self):
+        """
+        Getter for days, the commits of every day of the year
+        """
+        return self.__days
+
+    @property
+    def hours(self):
+        """
+        Getter for hours, the commits of every hour of the week (0 is Monday 00:00)
+        """
+        return self.__hours
+
+    def __mask(self):
+        """
+        Returns one byte per day of the year, 1 if there were commits that day
+
+        Note:
+            - Method is private
+        """
+        return bytes(min(count, 1) for count in self.__days)
+
+    def total(self):
+        """
+        Returns the commits made during the year
+        """
+        return sum(self.__days)
+
+    def active_days(self):
+        """
+        Returns the days with commits
+        """
+        return self.__mask().count(1)
+
+    def longest_streak(self):
+        """
+        Returns the longest run of consecutive days with commits (the first one if there
+        are several)
+
+        Returns:
+            tuple: Start date, end date and length in days (None, None, 0 without commits)
+        """
+        mask = self.__mask()
+        length = max(map(len, mask.split(b"\0")))
+        if length == 0:
+            return None, None, 0
+        start = self.__first_day + timedelta(days=mask.find(b"\1" * length))
+        return start, start + timedelta(days=length - 1), length
+
+    def current_streak(self, today: date = None):
+        """
+        Returns the run of consecutive days with commits that reaches today, or yesterday
+        if there are no commits today yet. For past years, the run reaching the last day
+        of the year.
+
+        Args:
+            today (date): Current date. Defaults to the current date
+
+        Returns:
+            tuple: Start date, end date and length in days (None, None, 0 if there's none)
+        """
+        today = today or date.today()
+        last = min((today - self.__first_day).days, len(self.__days) - 1)
+        if last < 0:
+            return None, None, 0
+
+        mask = self.__mask()[:last + 1]
+        if mask.endswith(b"\0") and today.year == self.__year:
+            mask = mask[:-1]
+        length = len(mask) - len(mask.rstrip(b"\1"))
+        if length == 0:
+            return None, None, 0
+        end = self.__first_day + timedelta(days=len(mask) - 1)
+        return end - timedelta(days=length - 1), end, length
+
+    def monthly_histogram(self):
+        """
+        Returns the commits made in each month
+
+        Returns:
+            list: Twelve counts, January first
+        """
+        histogram = []
+        for month in range(1, 13):
+            start = (date(self.__year, month, 1) - self.__first_day).days
+            end = (date(self.__year + month // 12, month % 12 + 1, 1) - self.__first_day).days
+            histogram.append(sum(self.__days[start:end]))
+        return histogram
+
+    def heatmap(self):
+        """
+        Returns the commits made in each hour of each weekday
+
+        Returns:
+            list: Seven lists (Monday first) of 24 counts
+        """
+        return [list(self.__hours[day * 24:(day + 1) * 24]) for day in range(7)]
+
+    def commit_data(self, today: date = None):
+        """
+        Returns the days with commits, the longest and current streaks (start and end
+        dates, duration), the busiest day, the commits per month and the commits per
+        weekday and hour
+
+        Args:
+            today (date): Current date, for the current streak. Defaults to the current date
+
+        Returns:
+            dict: Dictionary with commit data
+        """
+        streak_start_date, streak_end_date, streak_duration = self.longest_streak()
+        current_start_date, current_end_date, current_duration = self.current_streak(today)
+        busiest_day, busiest_day_count = self.busiest_day()
+
+        return {
+            "days_with_commits_count": self.active_days(),
+            "streak_start_date": streak_start_date,
+            "streak_end_date": streak_end_date,
+            "streak_duration": streak_duration,
+            "current_streak_start_date": current_start_date,
+            "current_streak_end_date": current_end_date,
+            "current_streak_duration": current_duration,
+            "busiest_day": busiest_day,
+            "busiest_day_count": busiest_day_count,
+            "monthly_histogram": self.monthly_histogram(),
+            "heatmap": self.heatmap()
+        }
+
+    def busiest_day(self):
+        """
+        Returns the day with the most commits (the first one if there are several)
+
+        Returns:
+            tuple: Date and commits (None, 0 without commits)
+        """
+        most = max(self.__days)
+        if most == 0:
+            return None, 0
+        return self.__first_day + timedelta(days=self.__days.index(most)), most
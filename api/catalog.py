@@ -0,0 +1,156 @@
+"""
+Module: catalog
+
+This module provides the repository catalog of a user: the repositories listed once from
+the API and indexed, so that every query about them is answered without further requests.
+
+Alongside the Repository objects (still needed to ask the API about each repository), the
+catalog keeps a compact record of every repository in columns: owner (interned), fork and
+private flags, year of creation and time of the last push. Owners and years of creation
+are indexed with lookup tables, and the pushes with a sorted array, so the repositories
+pushed to since a date are found with a binary search. A repository not pushed to since
+a date can't have commits made after it, so scans skip it. Private repositories are
+registered with the request scheduler (see utils.rate_limit), so that their requests keep
+the token that listed them.
+
+Classes:
+    RepoCatalog: Repositories listed once, indexed by owner, fork, visibility, creation
+    year and last push.
+
+Example:
+    catalog = RepoCatalog(github_instance.get_user().get_repos())
+    created = catalog.query(owner="your_username", fork=False, created_year=2023)
+    active = catalog.query(pushed_since=datetime(2023, 1, 1))
+"""
+
+import bisect
+from array import array
+from datetime import datetime, timezone
+from utils.connection import register_private_repo
+
+# Last push of repositories that don't report one: never skipped
+UNKNOWN_PUSH = 2 ** 62
+
+
+def _timestamp(date: datetime):
+    """
+    Returns the Unix timestamp of a date (naive dates are taken as UTC)
+    """
+    return int(date.replace(tzinfo=date.tzinfo or timezone.utc).timestamp())
+
+
+class RepoCatalog:
+    """
+    Repositories listed once, indexed by owner, fork, visibility, creation year and last push
+    """
+
+    def __init__(self, repos=()):
+        """
+        Lists every repository (iterating a PaginatedList once) and indexes them
+
+        Args:
+            repos: Iterable of Repository
+        """
+        self.__repos = []
+
+        # One entry per repository
+        self.__owner = array("I")
+        self.__fork = bytearray()
+        self.__private = bytearray()
+        self.__created_year = array("H")
+        self.__pushed_at = array("q")
+
+        # Indexes
+        self.__owner_ids = {}
+        self.__by_owner = []
+        self.__by_year = {}
+        self.__pushed_order = []
+        self.__pushed_sorted = array("q")
+
+        for repo in repos:
+            self.__add(repo)
+        self.__pushed_order = sorted(range(len(self.__repos)),
+                                     key=self.__pushed_at.__getitem__)
+        self.__pushed_sorted = array("q", (self.__pushed_at[i] for i in self.__pushed_order))
+
+    def __add(self, repo):
+        """
+        Adds the record of a repository to the columns and lookup tables
+
+        Note:
+            - Method is private
+        """
+        position = len(self.__repos)
+        self.__repos.append(repo)
+
+        owner = repo.owner.login.lower() if repo.owner else ""
+        owner_id = self.__owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = len(self.__by_owner)
+            self.__owner_ids[owner] = owner_id
+            self.__by_owner.append([])
+        self.__owner.append(owner_id)
+        self.__by_owner[owner_id].append(position)
+
+        self.__fork.append(1 if repo.fork else 0)
+        self.__private.append(1 if repo.private else 0)
+        if repo.private:
+            # Only the token that listed it can read it
+            register_private_repo(repo.full_name)
+
+        year = repo.created_at.year if repo.created_at else 0
+        self.__created_year.append(year)
+        self.__by_year.setdefault(year, []).append(position)
+
+        pushed_at = repo.pushed_at
+        self.__pushed_at.append(_timestamp(pushed_at) if pushed_at else UNKNOWN_PUSH)
+
+    def __len__(self):
+        return len(self.__repos)
+
+    def __iter__(self):
+        return iter(self.__repos)
+
+    def __getitem__(self, position: int):
+        return self.__repos[position]
+
+    def query(self, owner: str = None, fork: bool = None, private: bool = None,
+              created_year: int = None, pushed_since: datetime = None):
+        """
+        Returns the repositories matching every criterion given
+
+        Args:
+            owner (str): Login of the owner (case insensitive)
+            fork (bool): Whether the repositories are forks
+            private (bool): Whether the repositories are private
+            created_year (int): Year the repositories were created in
+            pushed_since (datetime): Date the repositories were last pushed to at or after
+            (naive dates are taken as UTC). Repositories with no known last push match
+
+        Returns:
+            list: Repositories, in the order they were listed
+        """
+        # Start from the narrowest index available
+        candidates = None
+        if owner is not None:
+            owner_id = self.__owner_ids.get(owner.lower())
+            candidates = self.__by_owner[owner_id] if owner_id is not None else []
+        if created_year is not None:
+            by_year = self.__by_year.get(created_year, [])
+            if candidates is None or len(by_year) < len(candidates):
+                candidates = by_year
+        if pushed_since is not None:
+            first = bisect.bisect_left(self.__pushed_sorted, _timestamp(pushed_since))
+            if candidates is None or len(self.__repos) - first < len(candidates):
+                candidates = sorted(self.__pushed_order[first:])
+        if candidates is None:
+            candidates = range(len(self.__repos))
+
+        owner_id = self.__owner_ids.get(owner.lower(), -1) if owner is not None else None
+        since = _timestamp(pushed_since) if pushed_since is not None else None
+        return [self.__repos[i] for i in candidates
+                if (owner_id is None or self.__owner[i] == owner_id)
+                and (fork is None or self.__fork[i] == fork)
+                and (private is None or self.__private[i] == private)
+                and (created_year is None or self.__created_year[i] == created_year)
+                and (since is None or self.__pushed_at[i] >= since)]
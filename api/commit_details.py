@@ -0,0 +1,269 @@
+"""
+Module: commit_details
+
+This module provides an asyncio-based fetcher for the details (changed files) of commits,
+used for the language statistics instead of one blocking request per commit on a thread pool.
+
+All the requests share one keep-alive connection pool, at most max_in_flight of them are in
+flight at any time (which is also the backpressure on the queue of commits), and commits
+that appear in several repositories (such as forks) are fetched only once. Results are
+handed to a callback as soon as each of them arrives, on a consumer thread of its own, so
+that the work the callback does (such as classifying the files into languages) never
+stalls the requests in flight. When installed, the response cache
+and the request scheduler of utils.connection are honoured: commit details are immutable,
+so cached ones are never requested again.
+
+Classes:
+    AsyncCommitFetcher: Fetches the changed files of many commits concurrently.
+
+Example:
+    fetcher = AsyncCommitFetcher("your_token", max_in_flight=32)
+    fetcher.fetch([("owner/repo", sha), ...], lambda full_name, sha, files: print(files))
+
+Dependencies:
+    - aiohttp: Used for the asynchronous HTTP requests (optional: without it, the
+    language statistics use a thread pool).
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+from utils.connection import GithubConnection, cache_scope
+from utils.rate_limit import PRIVATE_STATUSES
+from utils.http_cache import CachedResponse, cache_key
+from utils.profiler import record_request
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+def aiohttp_available():
+    """
+    Returns whether aiohttp, needed by AsyncCommitFetcher, is installed
+
+    Returns:
+        bool: True if aiohttp can be imported
+    """
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AsyncCommitFetcher:
+    """
+    Fetches the changed files of commits concurrently over a shared connection pool
+    """
+
+    def __init__(self, token: str, base_url: str = GITHUB_API_URL, max_in_flight: int = 16,
+                 timeout: int = 30, user_agent: str = "PyGithub/Python"):
+        """
+        Args:
+            token (str): Github token
+            base_url (str): Base URL of the API
+            max_in_flight (int): Maximum number of requests in flight at the same time
+            timeout (int): Timeout of each request, in seconds
+            user_agent (str): User-Agent of the requests
+        """
+        self.__base_url = base_url.rstrip("/")
+        self.__prefix = urlparse(self.__base_url).path
+        self.__authorization = f"token {token}"
+        self.__max_in_flight = max_in_flight
+        self.__timeout = timeout
+        self.__user_agent = user_agent
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.duplicates = 0
+
+    @property
+    def max_in_flight(self):
+        """
+        Getter for max_in_flight
+        """
+        return self.__max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, value):
+        """
+        Setter for max_in_flight
+        """
+        self.__max_in_flight = value
+
+    def fetch(self, commits, on_result):
+        """
+        Fetches the changed files of every commit, calling on_result as each one arrives.
+        on_result is called from a consumer thread, one result at a time, while the event
+        loop goes on with the requests. If it raises, the remaining results are dropped and
+        the error is raised once the fetch is over.
+
+        Args:
+            commits: Iterable of (repository full name, commit SHA) pairs
+            on_result: Callable taking the repository full name, the SHA and the list of
+            (filename, changes) pairs of the commit
+        """
+        results = queue.SimpleQueue()
+        errors = []
+
+        def consume():
+            while True:
+                result = results.get()
+                if result is None:
+                    return
+                if errors:
+                    continue
+                try:
+                    on_result(*result)
+                except Exception as e:
+                    errors.append(e)
+
+        consumer = threading.Thread(target=consume, daemon=True)
+        consumer.start()
+        try:
+            asyncio.run(self.fetch_async(commits, lambda *result: results.put(result)))
+        finally:
+            results.put(None)
+            consumer.join()
+        if errors:
+            raise errors[0]
+
+    async def fetch_async(self, commits, on_result):
+        """
+        Coroutine version of fetch. on_result is called inside the event loop, so it must
+        return quickly: fetch hands the results to a consumer thread instead
+
+        Args:
+            commits: Iterable of (repository full name, commit SHA) pairs
+            on_result: Callable taking the repository full name, the SHA and the list of
+            (filename, changes) pairs of the commit
+        """
+        import aiohttp
+
+        # Every repository a SHA appears in, so that it's only requested once
+        occurrences = {}
+        for full_name, sha in commits:
+            if sha in occurrences:
+                self.duplicates += 1
+                occurrences[sha].append(full_name)
+            else:
+                occurrences[sha] = [full_name]
+
+        queue = asyncio.Queue(maxsize=self.__max_in_flight)
+        connector = aiohttp.TCPConnector(limit=self.__max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=self.__timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+            async def worker():
+                while True:
+                    sha = await queue.get()
+                    try:
+                        if sha is None:
+                            return
+                        files = await self.__fetch_commit(session, occurrences[sha][0], sha)
+                        for full_name in occurrences[sha]:
+                            on_result(full_name, sha, files)
+                    finally:
+                        queue.task_done()
+
+            async def producer():
+                for sha in occurrences:
+                    await queue.put(sha)
+                for _ in range(self.__max_in_flight):
+                    await queue.put(None)
+
+            tasks = [asyncio.create_task(worker()) for _ in range(self.__max_in_flight)]
+            tasks.append(asyncio.create_task(producer()))
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def __fetch_commit(self, session, full_name: str, sha: str):
+        """
+        Returns the (filename, changes) pairs of a commit, from the response cache if it's
+        there
+
+        Note:
+            - Method is private
+        """
+        path = f"{self.__prefix}/repos/{full_name}/commits/{sha}"
+        cache = GithubConnection.cache
+        key = cache_key(path, None, cache_scope("GET", path, self.__authorization))
+        loop = asyncio.get_running_loop()
+
+        if cache is not None:
+            # SQLite reads and decompression block: keep them off the event loop
+            cached = await loop.run_in_executor(None, cache.get, key)
+            if cached is not None:
+                self.cache_hits += 1
+                return self.__files(json.loads(cached.body))
+
+        body, headers = await self.__request(session, path)
+
+        if cache is not None:
+            # Sent with the token of the client after all: stored in its scope
+            key = cache_key(path, None, cache_scope("GET", path, self.__authorization))
+            await loop.run_in_executor(None, cache.store, key, CachedResponse(
+                200, {"content-type": "application/json"}, body, headers.get("ETag"), None,
+                True))
+
+        return self.__files(json.loads(body))
+
+    async def __request(self, session, path: str):
+        """
+        Sends a GET request, through the request scheduler if there is one
+
+        Note:
+            - Method is private
+        """
+        scheduler = GithubConnection.scheduler
+        loop = asyncio.get_running_loop()
+        attempts = scheduler.max_retries + 1 if scheduler is not None else 1
+
+        for attempt in range(attempts):
+            authorization = self.__authorization
+            if scheduler is not None:
+                authorization = await loop.run_in_executor(
+                    None, scheduler.acquire, "GET", self.__authorization, "core", path)
+
+            self.requests += 1
+            start = time.perf_counter()
+            async with session.get(
+                    f"{self.__base_url}{path[len(self.__prefix):]}",
+                    headers={"Authorization": authorization,
+                             "User-Agent": self.__user_agent}) as response:
+                body = await response.text()
+                status = response.status
+                headers = dict(response.headers)
+            record_request("GET", path, status, time.perf_counter() - start, headers,
+                           authorization)
+
+            retry = scheduler is not None and scheduler.update(authorization, status, headers)
+            if not retry and authorization != self.__authorization \
+                    and status in PRIVATE_STATUSES and scheduler.mark_private(path):
+                # Private repository another token can't see: send it with the client's
+                continue
+            if status == 200 or not retry:
+                break
+            if status not in (403, 429):
+                await asyncio.sleep(2 ** attempt)
+
+        if status != 200:
+            raise Exception(f"Unable to get the details of {path} (status {status})")
+
+        return body, headers
+
+    @staticmethod
+    def __files(commit: dict):
+        """
+        Returns the (filename, changes) pairs of a commit payload
+
+        Note:
+            - Method is private
+        """
+        return [(file["filename"], file["changes"]) for file in commit.get("files", [])]
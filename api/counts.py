@@ -0,0 +1,158 @@
+"""
+Module: counts
+
+This module provides the counts of GitHub lists without walking them.
+
+A list is counted with a single per_page=1 request: every page then holds one item, so the
+number of the last page, read from the rel="last" link of the Link header, is the number
+of items (a list with no Link header fits in that one page). Filters the list endpoints
+don't offer (issues created in a date range, or closed ones) are counted with the search
+API, whose responses carry the total_count of the query. Full pagination is left for the
+lists whose items are actually needed; and when a count can be told from the items of a
+single page, that page is asked for instead of a second count.
+
+Every request goes through the requester of PyGithub, so it's cached, scheduled and
+profiled like any other (search requests use the search rate limit, 30 per minute).
+
+Functions:
+    - last_page(link): Returns the number of the last page of a Link header.
+    - count_list(github_object, url, parameters): Counts the items of a list endpoint.
+    - count_search(github_object, kind, query): Counts the results of a search.
+    - count_commits(repo, since, until, author): Counts the commits of a repository.
+    - count_issues(repo, year, request_counts, section): Counts the issues of a repository
+    created in a year, and the closed ones.
+
+Example:
+    total = count_commits(repo, datetime(2023, 1, 1), datetime(2024, 1, 1))
+    issues, closed = count_issues(repo, 2023)
+"""
+
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+# Largest page of search results
+SEARCH_PAGE_SIZE = 100
+
+
+def last_page(link: str):
+    """
+    Returns the number of the last page of a Link header
+
+    Args:
+        link (str): Link header, such as '<https://...&page=2>; rel="next", <...>; rel="last"'
+
+    Returns:
+        int: Number of the last page, or None if the header has no rel="last" link
+    """
+    for part in link.split(","):
+        url, _, params = part.partition(";")
+        if 'rel="last"' not in params.replace(" ", ""):
+            continue
+        page = parse_qs(urlsplit(url.strip().strip("<>")).query).get("page")
+        return int(page[0]) if page else None
+    return None
+
+
+def count_list(github_object, url: str, parameters: dict = None):
+    """
+    Counts the items of a list endpoint with a single per_page=1 request
+
+    Args:
+        github_object (GithubObject): Any PyGithub object, whose requester sends the request
+        url (str): URL of the list
+        parameters (dict): Filters of the list
+
+    Returns:
+        int: Number of items
+    """
+    parameters = dict(parameters or {}, per_page=1)
+    headers, data = github_object._requester.requestJsonAndCheck("GET", url, parameters)
+    page = last_page(headers["link"]) if "link" in headers else None
+    if page is not None:
+        return page
+    # A single page (or a Link without a last page, which only happens on the last one)
+    return len(data) if data else 0
+
+
+def _search(github_object, kind: str, query: str, per_page: int):
+    """
+    Returns the first page of a search
+    """
+    _, data = github_object._requester.requestJsonAndCheck(
+        "GET", f"/search/{kind}", {"q": query, "per_page": per_page})
+    return data
+
+
+def count_search(github_object, kind: str, query: str):
+    """
+    Counts the results of a search, from the total_count of a single per_page=1 request
+
+    Args:
+        github_object (GithubObject): Any PyGithub object, whose requester sends the request
+        kind (str): Kind of search, such as "issues" or "commits"
+        query (str): Search query, such as "repo:owner/name is:issue is:closed"
+
+    Returns:
+        int: Number of results
+    """
+    return _search(github_object, kind, query, 1)["total_count"]
+
+
+def _timestamp(date: datetime):
+    """
+    Returns a date as the API expects it, in the format PyGithub uses
+    """
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def count_commits(repo, since: datetime = None, until: datetime = None, author: str = None):
+    """
+    Counts the commits of the default branch of a repository
+
+    Args:
+        repo (Repository): Repository
+        since (datetime): Only commits made at or after this date
+        until (datetime): Only commits made at or before this date
+        author (str): Only commits of this login
+
+    Returns:
+        int: Number of commits
+    """
+    parameters = {}
+    if since is not None:
+        parameters["since"] = _timestamp(since)
+    if until is not None:
+        parameters["until"] = _timestamp(until)
+    if author is not None:
+        parameters["author"] = author
+    return count_list(repo, f"{repo.url}/commits", parameters)
+
+
+def count_issues(repo, year: int, request_counts=None, section: str = None):
+    """
+    Counts the issues of a repository (pull requests excluded) created in a year, and how
+    many of them are closed. When they fit in a single page of results, a single request
+    counts both; otherwise the closed ones are counted with a second one
+
+    Args:
+        repo (Repository): Repository
+        year (int): Year the issues were created in
+        request_counts (Counter): If provided, the requests made are added to it
+        section (str): Key of request_counts the requests are added to
+
+    Returns:
+        tuple: Number of issues and number of closed issues
+    """
+    query = f"repo:{repo.full_name} is:issue created:{year}-01-01..{year}-12-31"
+    data = _search(repo, "issues", query, SEARCH_PAGE_SIZE)
+    if request_counts is not None:
+        request_counts[section] += 1
+
+    total = data["total_count"]
+    if len(data["items"]) >= total:
+        return total, sum(1 for issue in data["items"] if issue["state"] == "closed")
+
+    closed = count_search(repo, "issues", f"{query} is:closed")
+    if request_counts is not None:
+        request_counts[section] += 1
+    return total, closed
@@ -0,0 +1,281 @@
+"""
+Module: git_source
+
+This module provides a data source that reads the commit history from local clones of the
+repositories instead of the GitHub API, so that the language statistics don't need one
+commit-detail request per commit.
+
+Every repository is mirrored as a bare clone in a local directory, kept between runs and
+updated with a fetch. Its commits of the period (on the default branch, as the API lists
+them), their dates and the changes of each of their files come from a single streamed
+`git log --numstat` per repository, and several repositories are read in parallel. The
+commits of the user, recognised by their author email, go straight into the commit store
+of the user along with their changes per language.
+
+Git has no notion of GitHub logins: commits are attributed to the user through the emails
+given, plus the noreply addresses GitHub gives every account. Clone URLs can be local
+paths, so the source works fully offline against local repositories.
+
+Classes:
+    GitSource: Data source reading the commits from local bare clones.
+
+Example:
+    source = GitSource("clones", ["you@example.com"], "your_token")
+    user_data = UserData(github_instance, "your_username", 2023, True, True, source=source)
+
+Dependencies:
+    - git: The git command line (2.31 or later), used for cloning, fetching and reading
+    the history.
+"""
+
+import base64
+import os
+import re
+import subprocess
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from utils.github_helpers import get_language_from_filename, LANGUAGES_SNAPSHOT
+from api.calendar_stats import hour_of_week
+
+# Separators of the log format: record separator before every commit, unit separator
+# between its fields
+LOG_FORMAT = "%x1e%H%x1f%ae%x1f%at%x1f%ct"
+
+
+class GitSource:
+    """
+    Data source reading the commits of every repository from a local bare clone
+    """
+
+    incremental = False
+
+    def __init__(self, clone_dir: str, author_emails: list = None, token: str = None,
+                 max_workers: int = 8, git: str = "git"):
+        """
+        Args:
+            clone_dir (str): Directory the clones are kept in between runs
+            author_emails (list): Emails the commits of the user are made with
+            token (str): Github token, used for cloning private repositories over HTTPS
+            max_workers (int): Maximum number of repositories read at the same time
+            git (str): Git executable
+        """
+        self.__clone_dir = clone_dir
+        self.__author_emails = {email.lower() for email in author_emails or []}
+        self.__token = token
+        self.__max_workers = max_workers
+        self.__git = git
+        self.__locks = defaultdict(threading.Lock)
+
+    @property
+    def clone_dir(self):
+        """
+        Getter for clone_dir
+        """
+        return self.__clone_dir
+
+    @property
+    def max_workers(self):
+        """
+        Getter for max_workers
+        """
+        return self.__max_workers
+
+    @max_workers.setter
+    def max_workers(self, value):
+        """
+        Setter for max_workers
+        """
+        self.__max_workers = value
+
+    def __run(self, args: list, cwd: str = None):
+        """
+        Runs a git command, raising an Exception if it fails
+
+        Note:
+            - Method is private
+        """
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if self.__token:
+            # Given in the environment, not on the command line, which any local user can
+            # read (ps)
+            credentials = base64.b64encode(f"x-access-token:{self.__token}".encode()).decode()
+            count = int(env.get("GIT_CONFIG_COUNT") or 0)
+            env.update({
+                "GIT_CONFIG_COUNT": str(count + 1),
+                f"GIT_CONFIG_KEY_{count}": "http.https://github.com/.extraHeader",
+                f"GIT_CONFIG_VALUE_{count}": f"Authorization: Basic {credentials}"
+            })
+        result = subprocess.run([self.__git] + args, cwd=cwd, capture_output=True, text=True,
+                                env=env)
+        if result.returncode != 0:
+            raise Exception(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def mirror(self, full_name: str, clone_url: str):
+        """
+        Clones a repository as a bare clone in the clone directory, or fetches the changes
+        made since the last run if it was already cloned
+
+        Args:
+            full_name (str): Full name of the repository
+            clone_url (str): URL (or local path) to clone the repository from
+
+        Returns:
+            str: Path of the clone
+        """
+        path = os.path.join(self.__clone_dir, *full_name.split("/")) + ".git"
+        with self.__locks[path]:
+            if os.path.isdir(path):
+                self.__run(["fetch", "--quiet", "--prune", "origin",
+                            "+refs/heads/*:refs/heads/*"], cwd=path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.__run(["clone", "--bare", "--quiet", clone_url, path])
+        return path
+
+    def log(self, path: str, start: datetime, end: datetime):
+        """
+        Streams the commits of the default branch of a clone made in [start, end), newest
+        first, with the changes of each of their files
+
+        Args:
+            path (str): Path of the clone
+            start (datetime): Start of the period (naive dates are taken as UTC)
+            end (datetime): End of the period
+
+        Yields:
+            tuple: SHA, author email, author date, committer date and list of
+            (filename, changes) pairs of every commit
+        """
+        if subprocess.run([self.__git, "rev-parse", "--verify", "--quiet", "HEAD"],
+                          cwd=path, capture_output=True).returncode != 0:
+            # Empty repository
+            return
+
+        since = int(start.replace(tzinfo=start.tzinfo or timezone.utc).timestamp())
+        until = int(end.replace(tzinfo=end.tzinfo or timezone.utc).timestamp())
+        process = subprocess.Popen(
+            [self.__git, "-c", "core.quotepath=off", "log", "HEAD", "--numstat",
+             "--no-renames", f"--format={LOG_FORMAT}", f"--since=@{since}",
+             f"--until=@{until - 1}"],
+            cwd=path, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+
+        commit = None
+        complete = False
+        try:
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                if line.startswith("\x1e"):
+                    if commit is not None:
+                        yield commit
+                    sha, email, author_time, committer_time = line[1:].split("\x1f")
+                    commit = (sha, email,
+                              datetime.fromtimestamp(int(author_time), timezone.utc),
+                              datetime.fromtimestamp(int(committer_time), timezone.utc), [])
+                elif line and commit is not None:
+                    added, deleted, filename = line.split("\t", 2)
+                    # Binary files have no line counts
+                    changes = 0 if added == "-" else int(added) + int(deleted)
+                    commit[4].append((filename, changes))
+            if commit is not None:
+                yield commit
+            complete = True
+        finally:
+            process.stdout.close()
+            if not complete:
+                # Stopped before the end: nothing else will be read
+                process.kill()
+            if process.wait() != 0 and complete:
+                raise Exception(f"git log failed in {path}")
+
+    def __is_author(self, email: str, login: str):
+        """
+        Returns whether an author email belongs to the user
+
+        Note:
+            - Method is private
+        """
+        email = email.lower()
+        return email in self.__author_emails or re.fullmatch(
+            rf"(\d+\+)?{re.escape(login.lower())}@users\.noreply\.github\.com", email) is not None
+
+    def scan_repo_commits(self, login: str, repo, start: datetime, end: datetime, store):
+        """
+        Reads the commits of a repository in [start, end) from its clone, adding those of
+        the user to the commit store along with their changes per language
+
+        Args:
+            login (str): Login of the user whose commits are counted
+            repo (Repository): Repository to read
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            store (CommitStore): Commit store of the user
+
+        Returns:
+            dict: Commit data of the repository
+        """
+        path = self.mirror(repo.full_name, repo.clone_url)
+
+        count = 0
+        author_count = 0
+        commit_days = defaultdict(int)
+        commit_hours = defaultdict(int)
+        head_sha = None
+        head_date = None
+        for sha, email, author_date, committer_date, files in self.log(path, start, end):
+            if head_sha is None:
+                head_sha = sha
+                head_date = committer_date.isoformat()
+            count += 1
+            if self.__is_author(email, login):
+                author_count += 1
+                commit_days[author_date.date().isoformat()] += 1
+                commit_hours[str(hour_of_week(author_date))] += 1
+                index = store.add_commit(repo.full_name, sha, login, author_date, repo.private)
+                store.add_files(index, [
+                    (get_language_from_filename(filename, LANGUAGES_SNAPSHOT), changes)
+                    for filename, changes in files])
+
+        return {
+            "total_count": count,
+            "total_count_author": author_count,
+            "commits_pending": [],
+            "commit_days": dict(commit_days),
+            "commit_hours": dict(commit_hours),
+            "stored_languages": [],
+            "head_sha": head_sha,
+            "head_date": head_date
+        }
+
+    def get_repo_commits(self, user, start: datetime, end: datetime, stored_repos: dict):
+        """
+        Returns the commit data of every repository of the user in [start, end), reading
+        up to max_workers clones in parallel. The result keeps the order of the user
+        repositories; if a repository can't be read, the pending ones are cancelled and
+        the error is raised.
+
+        Args:
+            user (UserData): User whose repositories are read
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            stored_repos (dict): Stored repository states (ignored: fetches are incremental)
+
+        Returns:
+            dict: Commit data of every repository
+        """
+        login = user.user.login
+
+        repos = user.get_active_repos(start)
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            futures = [executor.submit(self.scan_repo_commits, login, repo, start, end,
+                                       user.commit_store) for repo in repos]
+            for done, future in enumerate(as_completed(futures), 1):
+                if future.exception() is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    raise future.exception()
+                user.report_progress("commits", done, len(futures))
+
+        return {repo: future.result() for repo, future in zip(repos, futures)}
@@ -0,0 +1,122 @@
+"""
+Module: multi_year
+
+This module provides the multi-year mode, which builds the wrapped of several years of a
+user at once, along with a year-over-year comparison.
+
+The repositories of the user are listed once, and the commits of the user to each of them
+are fetched once over the whole range of years (see SharedScanSource) and bucketed by year
+in the same pass. Every year then gets its own UserData, sharing the source and the commit store, so
+get_commit_data, get_languages_user and the created and contributed repositories of each
+year come out of that single scan. The details of a commit are fetched at most once too.
+
+Functions:
+    - get_multi_year_users(github_instance, username, years, ...): Returns the UserData of
+    every year.
+    - scan_years(users, on_progress): Scans the repositories over every year at once.
+    - get_year_over_year(users): Returns the main figures of every year and their change
+    from the year before.
+
+Example:
+    users = get_multi_year_users(github_instance, "your_username", [2021, 2022, 2023],
+                                 False, False)
+    scan_years(users)
+    for row in get_year_over_year(users):
+        print(row)
+"""
+
+from datetime import datetime
+from github import Github
+from api.user import UserData
+from api.sources import SharedScanSource
+from api.commit_details import AsyncCommitFetcher
+
+
+def get_multi_year_users(github_instance: Github, username: str, years: list,
+                         show_private: bool, show_repo_info: bool, max_workers: int = 8,
+                         commit_fetcher: AsyncCommitFetcher = None, utc_offset: int = 0):
+    """
+    Returns the UserData of every year, sharing the repositories of the user, a
+    SharedScanSource over the whole range of years and its commit store
+
+    Args:
+        github_instance (Github): Github instance
+        username (str): Username
+        years (list): Years
+        show_private (bool): Whether private repositories are included
+        show_repo_info (bool): Whether the extra info. of every repository is shown
+        max_workers (int): Maximum number of repositories scanned at the same time
+        commit_fetcher (AsyncCommitFetcher): Fetcher for the commit details, if any
+        utc_offset (int): Hours the calendars are shifted by
+
+    Returns:
+        list: UserData of every year, from the oldest
+    """
+    years = sorted(set(years))
+    source = SharedScanSource(max_workers, github_instance.per_page, years, username)
+
+    users = []
+    for year in years:
+        user = UserData(github_instance, username, year, show_private, show_repo_info,
+                        source=source, commit_fetcher=commit_fetcher,
+                        commit_store=source.store, utc_offset=utc_offset)
+        if users:
+            # Listed once for every year
+            user.user = users[0].user
+            user.user_repos = users[0].user_repos
+        users.append(user)
+
+    return users
+
+
+def scan_years(users: list, on_progress=None):
+    """
+    Scans the repositories of the user over every year at once
+
+    Args:
+        users (list): UserData of every year, sharing a SharedScanSource
+        on_progress: If provided, called with the repositories scanned and the total
+    """
+    if not users:
+        return
+
+    source = users[0].source
+    start, end = source.period(datetime(users[0].year, 1, 1),
+                               datetime(users[-1].year + 1, 1, 1))
+    source.scan(users[0].get_active_repos(start), start, end, on_progress)
+
+
+def get_year_over_year(users: list):
+    """
+    Returns the main figures of every year (commits, public commits, days with commits,
+    longest streak, created and contributed repositories, top language) and the change
+    of the commits from the year before
+
+    Args:
+        users (list): UserData of every year, from the oldest
+
+    Returns:
+        list: One dictionary per year
+    """
+    rows = []
+    previous = None
+    for user in users:
+        data = user.get_commit_data()
+        languages = [language for language in user.get_languages_user() if language]
+        row = {
+            "year": user.year,
+            "commits": user.total_count,
+            "public_commits": user.public_count,
+            "days_with_commits": data["days_with_commits_count"],
+            "longest_streak": data["streak_duration"],
+            "created_repos": len(user.get_created_repos()),
+            "contributed_repos": len(user.get_contributed_repos()),
+            "top_language": languages[0] if languages else None,
+            "commits_change": None
+        }
+        if previous is not None and previous["commits"]:
+            row["commits_change"] = (row["commits"] - previous["commits"]) / previous["commits"]
+        rows.append(row)
+        previous = row
+
+    return rows
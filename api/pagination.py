@@ -0,0 +1,99 @@
+"""
+Module: pagination
+
+This module provides iterators over the items of a paginated GitHub list that were created
+in a given year, requesting as few pages as possible.
+
+The items are walked from the newest to the oldest, and the walk stops as soon as it goes
+past the start of the year. Lists the API returns newest first (forks, releases) are paged
+forwards; lists it returns oldest first (stargazers) are paged backwards from their last
+page, whose number comes from the Link header of a single per_page=1 request.
+
+Functions:
+    - iter_year_newest_first(paginated, year, get_date, request_counts, section): Yields the
+    items of a newest-first list created in the year.
+    - iter_year_oldest_first(paginated, year, get_date, per_page, request_counts, section):
+    Yields the items of an oldest-first list created in the year, newest first.
+
+Example:
+    forks = iter_year_newest_first(repo.get_forks(), 2023, lambda f: f.created_at)
+    stars = iter_year_oldest_first(repo.get_stargazers_with_dates(), 2023,
+                                   lambda s: s.starred_at, github_instance.per_page)
+"""
+
+import math
+
+
+def iter_year_newest_first(paginated, year: int, get_date, request_counts=None,
+                           section: str = None):
+    """
+    Yields the items of a newest-first paginated list whose date falls in the year,
+    stopping at the first page that reaches the previous year
+
+    Args:
+        paginated (PaginatedList): List sorted from the newest to the oldest item
+        year (int): Year
+        get_date: Callable returning the date of an item
+        request_counts (Counter): If provided, the requests made are added to it
+        section (str): Key of request_counts the requests are added to
+
+    Yields:
+        Items of the list from the year, newest first
+    """
+    page = 0
+    page_size = None
+    while True:
+        items = paginated.get_page(page)
+        if request_counts is not None:
+            request_counts[section] += 1
+        if not items:
+            return
+
+        for item in items:
+            date = get_date(item)
+            if date.year > year:
+                continue
+            if date.year < year:
+                return
+            yield item
+
+        if page_size is not None and len(items) < page_size:
+            return
+        page_size = len(items)
+        page += 1
+
+
+def iter_year_oldest_first(paginated, year: int, get_date, per_page: int,
+                           request_counts=None, section: str = None):
+    """
+    Yields the items of an oldest-first paginated list whose date falls in the year, walking
+    the pages backwards from the last one and stopping at the first page that reaches
+    the previous year
+
+    Args:
+        paginated (PaginatedList): List sorted from the oldest to the newest item
+        year (int): Year
+        get_date: Callable returning the date of an item
+        per_page (int): Page size of the list
+        request_counts (Counter): If provided, the requests made are added to it
+        section (str): Key of request_counts the requests are added to
+
+    Yields:
+        Items of the list from the year, newest first
+    """
+    total = paginated.totalCount
+    if request_counts is not None:
+        request_counts[section] += 1
+
+    for page in range(math.ceil(total / per_page) - 1, -1, -1):
+        items = paginated.get_page(page)
+        if request_counts is not None:
+            request_counts[section] += 1
+
+        for item in reversed(items):
+            date = get_date(item)
+            if date.year > year:
+                continue
+            if date.year < year:
+                return
+            yield item
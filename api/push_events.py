@@ -0,0 +1,506 @@
+"""
+Module: push_events
+
+This module provides the ingestion of GitHub push events, which keeps the aggregates of a
+user in the state store (see utils.state_store) up to date as commits are pushed, instead
+of scanning every repository again.
+
+Every push to the default branch of a repository is applied to the stored state of that
+repository in the year of each commit: the commit counts, and for the commits of the user
+the commits per day and per hour of the week, the changes per language (classified with
+the extension mapping, see utils.language_aggregation) and the watermark, so that a later
+scan goes on from there. Contributed repositories follow from the commit counts. Pushes
+are only applied to repositories already scanned for the year of the commit: the others
+have no history to add to, and are left for their first scan. Once a first scan has filled
+the store, reports can be built from it alone (see api.sources.StoredSource), and keeping
+them fresh costs no scan.
+
+Pushes come as the payload of a push webhook, as PushEvent objects of the Events API
+(such as those of GET /users/{user}/events) or as lists of them; from a webhook receiver or
+from JSON files, which can be replayed. Applying them is idempotent: the commits applied
+are recorded by SHA, and pushes older than the last scan of the repository are already
+counted by it. Force-pushes rewrite the history and can't be applied incrementally: they
+are skipped, and the repository needs a new scan. Payloads only list the newest commits of
+large pushes (20, for the Events API): the whole push is then requested by comparing its
+ends, when a Github instance is given.
+
+Commits are attributed to the user by their GitHub username (webhook payloads), or by
+their email: the emails given, plus the noreply addresses GitHub gives every account.
+Commits are filed under the year of their author date, the timestamp of the commit in
+webhook payloads. The changed files of a commit aren't part of push payloads, and neither
+are the dates of the commits of the Events API: they are requested (one request per commit
+of the user or without a date, immutable and cached), when a Github instance is given.
+
+Classes:
+    PushIngestor: Applies push events to the stored aggregates of a user.
+    WebhookReceiver: Threaded HTTP server receiving push webhooks.
+
+Functions:
+    - parse_push(payload): Returns a push event in a common form, whatever its source.
+
+Example:
+    ingestor = PushIngestor(StateStore("wrapped_state.json"), "your_username",
+                            github_instance=github_instance)
+    print(ingestor.ingest_path("events/"))
+
+Dependencies:
+    - hmac: Used for verifying the signatures of the webhooks.
+    - http.server: Used for receiving the webhooks.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from github import Github
+from api.calendar_stats import hour_of_week
+from utils.language_aggregation import classify_files
+from utils.state_store import StateStore
+
+
+def _parse_date(value):
+    """
+    Returns a date of a payload (ISO 8601, Unix timestamp or datetime) in UTC, or None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    date = value if isinstance(value, datetime) else \
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        return date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+
+def parse_push(payload: dict):
+    """
+    Returns a push event in a common form, whether it comes from a push webhook or from
+    the Events API
+
+    Args:
+        payload (dict): Payload of a push webhook, or a PushEvent of the Events API
+
+    Returns:
+        dict: Repository (id, full_name, private, default_branch or None), ref, date of the
+        push, whether it was forced, the SHAs before and after it, its number of commits and
+        the commits listed (sha, date or None, username or None, email), or None if the
+        payload isn't a push
+    """
+    if payload.get("type") == "PushEvent":
+        push = payload.get("payload", {})
+        repo = payload.get("repo", {})
+        return {
+            "repo_id": repo.get("id"),
+            "full_name": repo.get("name"),
+            "private": not payload.get("public", True),
+            "default_branch": None,
+            "ref": push.get("ref"),
+            "pushed_at": _parse_date(payload.get("created_at")),
+            "forced": False,
+            "before": push.get("before"),
+            "head": push.get("head"),
+            "size": push.get("size", len(push.get("commits", []))),
+            "commits": [{
+                "sha": c["sha"],
+                "date": None,
+                "username": None,
+                "email": c.get("author", {}).get("email")
+            } for c in push.get("commits", [])]
+        }
+
+    if "ref" in payload and "repository" in payload and "commits" in payload:
+        repo = payload["repository"]
+        head_commit = payload.get("head_commit") or {}
+        return {
+            "repo_id": repo.get("id"),
+            "full_name": repo.get("full_name"),
+            "private": repo.get("private", False),
+            "default_branch": repo.get("default_branch"),
+            "ref": payload["ref"],
+            "pushed_at": _parse_date(repo.get("pushed_at") or head_commit.get("timestamp")),
+            "forced": payload.get("forced", False),
+            "before": payload.get("before"),
+            "head": payload.get("after"),
+            "size": payload.get("size", len(payload["commits"])),
+            "commits": [{
+                "sha": c["id"],
+                "date": _parse_date(c.get("timestamp")),
+                "username": c.get("author", {}).get("username"),
+                "email": c.get("author", {}).get("email")
+            } for c in payload["commits"]]
+        }
+
+    return None
+
+
+class PushIngestor:
+    """
+    Applies push events to the aggregates of a user in the state store
+    """
+
+    def __init__(self, state_store: StateStore, login: str, author_emails: list = None,
+                 github_instance: Github = None):
+        """
+        Args:
+            state_store (StateStore): Store of the aggregates of the user
+            login (str): Login of the user
+            author_emails (list): Emails the commits of the user are made with
+            github_instance (Github): If provided, used for the changed files of the commits
+            of the user and for the default branches the payloads don't give
+        """
+        self.__state_store = state_store
+        self.__login = login
+        self.__author_emails = {email.lower() for email in author_emails or []}
+        self.__github_instance = github_instance
+        self.__default_branches = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def state_store(self):
+        """
+        Getter for state_store
+        """
+        return self.__state_store
+
+    @property
+    def login(self):
+        """
+        Getter for login
+        """
+        return self.__login
+
+    def __is_author(self, commit: dict):
+        """
+        Returns whether a commit of a push was made by the user
+
+        Note:
+            - Method is private
+        """
+        if commit["username"] is not None:
+            return commit["username"].lower() == self.__login.lower()
+        email = (commit["email"] or "").lower()
+        return email in self.__author_emails or re.fullmatch(
+            rf"(\d+\+)?{re.escape(self.__login.lower())}@users\.noreply\.github\.com",
+            email) is not None
+
+    def __default_branch(self, push: dict):
+        """
+        Returns the default branch of the repository of a push: from the payload, from the
+        API if there's a Github instance, or main otherwise
+
+        Note:
+            - Method is private
+        """
+        if push["default_branch"]:
+            return push["default_branch"]
+        full_name = push["full_name"]
+        if full_name not in self.__default_branches:
+            self.__default_branches[full_name] = \
+                self.__github_instance.get_repo(full_name).default_branch \
+                if self.__github_instance is not None else "main"
+        return self.__default_branches[full_name]
+
+    def __commit_details(self, full_name: str, sha: str):
+        """
+        Returns the author date and the (filename, changes) pairs of a commit, or None
+        without a Github instance
+
+        Note:
+            - Method is private
+        """
+        if self.__github_instance is None:
+            return None
+        commit = self.__github_instance.get_repo(full_name).get_commit(sha)
+        return (_parse_date(commit.commit.author.date),
+                [(file.filename, file.changes) for file in commit.files])
+
+    def __push_commits(self, push: dict):
+        """
+        Returns every commit of a push, requested by comparing its ends, or None without a
+        Github instance or for pushes creating a branch
+
+        Note:
+            - Method is private
+        """
+        if self.__github_instance is None or not push["head"] or \
+                not (push["before"] or "").strip("0"):
+            return None
+        comparison = self.__github_instance.get_repo(push["full_name"]).compare(
+            push["before"], push["head"])
+        return [{
+            "sha": c.sha,
+            "date": _parse_date(c.commit.author.date),
+            "username": c.author.login if c.author is not None else None,
+            "email": c.commit.author.email
+        } for c in comparison.commits]
+
+    def ingest(self, payload: dict):
+        """
+        Applies a push event to the aggregates of the user, without saving the store
+
+        Args:
+            payload (dict): Payload of a push webhook, or a PushEvent of the Events API
+
+        Returns:
+            Counter: Commits applied, skipped (already applied, or older than the last scan),
+            unscanned (to repositories or years never scanned, left for their first scan),
+            undated (without a date, and no Github instance to request it) and missing (not
+            listed by the payloads of large pushes, and not requested), and pushes ignored
+            (not pushes, not to the default branch, or forced)
+        """
+        counts = Counter()
+        push = parse_push(payload)
+        if push is None:
+            counts["ignored"] += 1
+            return counts
+        if push["forced"]:
+            print(f"Force-push to {push['full_name']} skipped: the repository needs a new scan")
+            counts["ignored"] += 1
+            return counts
+        if push["ref"] != f"refs/heads/{self.__default_branch(push)}":
+            counts["ignored"] += 1
+            return counts
+        commits = push["commits"]
+        if push["size"] > len(commits):
+            # Payloads only list the newest commits of large pushes
+            commits = self.__push_commits(push) or commits
+        if push["size"] > len(commits):
+            print(f"Push to {push['full_name']} lists {len(commits)} of its "
+                  f"{push['size']} commits: the repository needs a new scan")
+            counts["missing"] += push["size"] - len(commits)
+
+        with self.__lock:
+            # Year -> repository states of the user, changed by this push
+            years = {}
+            for commit in commits:
+                details = self.__commit_details(push["full_name"], commit["sha"]) \
+                    if commit["date"] is None else None
+                date = commit["date"] or (details[0] if details else None)
+                if date is None:
+                    # The date of the push may fall in another year than the commit's
+                    counts["undated"] += 1
+                    continue
+
+                if date.year not in years:
+                    years[date.year] = self.__state_store.get_repos(self.__login, date.year)
+                state = years[date.year].get(str(push["repo_id"]))
+                scanned_at = _parse_date(state.get("scanned_at")) if state else None
+                if scanned_at is None:
+                    # Without a first scan there's no history to add to: the first scan
+                    # will count this commit
+                    counts["unscanned"] += 1
+                    continue
+                state.setdefault("ingested", [])
+
+                if commit["sha"] in state["ingested"] or (
+                        push["pushed_at"] is not None and push["pushed_at"] <= scanned_at):
+                    counts["skipped"] += 1
+                    continue
+
+                author = self.__is_author(commit)
+                if author and details is None:
+                    details = self.__commit_details(push["full_name"], commit["sha"])
+                self.__apply(state, commit["sha"], date, author,
+                             details[1] if details else [])
+                counts["applied"] += 1
+
+            for year, repos in years.items():
+                self.__state_store.set_repos(self.__login, year, repos)
+
+        return counts
+
+    @staticmethod
+    def __apply(state: dict, sha: str, date: datetime, author: bool, files: list):
+        """
+        Applies a commit to the state of a repository
+
+        Note:
+            - Method is private
+        """
+        state["ingested"].append(sha)
+        state["total_count"] += 1
+        if not author:
+            return
+
+        state["total_count_author"] += 1
+        day = date.date().isoformat()
+        state["commit_days"][day] = state["commit_days"].get(day, 0) + 1
+        hours = state.setdefault("commit_hours", {})
+        hour = str(hour_of_week(date))
+        hours[hour] = hours.get(hour, 0) + 1
+
+        languages = defaultdict(int, {language: changes
+                                      for language, changes in state["languages"]})
+        for language, changes in classify_files(files):
+            languages[language] += changes
+        state["languages"] = sorted(languages.items(),
+                                    key=lambda x: (x[0] is None, x[0] or ""))
+
+        head_date = _parse_date(state["head_date"])
+        if head_date is None or date > head_date:
+            state["head_sha"] = sha
+            state["head_date"] = date.isoformat()
+
+    def ingest_payloads(self, payloads):
+        """
+        Applies several push events and saves the store
+
+        Args:
+            payloads: Payloads of push webhooks or PushEvents, or lists of them
+
+        Returns:
+            Counter: Commits applied, skipped, unscanned, undated and missing, and pushes
+            ignored
+        """
+        counts = Counter()
+        for payload in payloads:
+            for event in payload if isinstance(payload, list) else [payload]:
+                counts.update(self.ingest(event))
+        with self.__lock:
+            self.__state_store.save()
+        return counts
+
+    def ingest_path(self, path: str):
+        """
+        Replays the push events of a JSON file, or of every JSON file of a directory (in
+        the order of their names), and saves the store. Each file holds a payload or a
+        list of them, such as a page of the Events API
+
+        Args:
+            path (str): File or directory
+
+        Returns:
+            Counter: Commits applied, skipped, unscanned, undated and missing, and pushes
+            ignored
+        """
+        if os.path.isdir(path):
+            filepaths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(".json")]
+        else:
+            filepaths = [path]
+
+        def payloads():
+            for filepath in filepaths:
+                with open(filepath, "r", encoding="utf-8") as file:
+                    yield json.load(file)
+
+        return self.ingest_payloads(payloads())
+
+
+class WebhookReceiver:
+    """
+    Threaded HTTP server receiving push webhooks and applying them with a PushIngestor
+    """
+
+    def __init__(self, ingestor: PushIngestor, host: str = "127.0.0.1", port: int = 8081,
+                 secret: str = None):
+        """
+        Args:
+            ingestor (PushIngestor): Ingestor the pushes are applied with
+            host (str): Host to listen on
+            port (int): Port to listen on, or 0 for any free one
+            secret (str): Secret of the webhook. If provided, deliveries without a valid
+            X-Hub-Signature-256 are rejected
+        """
+        self.__ingestor = ingestor
+        self.__secret = secret.encode("utf-8") if secret else None
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def base_url(self):
+        """
+        Getter for base_url, the URL the webhooks are received at
+        """
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """
+        Receives in the current thread, until stop is called from another one
+        """
+        self.__server.serve_forever()
+
+    def start(self):
+        """
+        Starts receiving in a background thread
+        """
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops receiving
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def receive(self, event: str, body: bytes, signature: str = None):
+        """
+        Handles a webhook delivery
+
+        Args:
+            event (str): X-GitHub-Event header
+            body (bytes): Body of the delivery
+            signature (str): X-Hub-Signature-256 header
+
+        Returns:
+            tuple: Status and JSON-serializable response
+        """
+        if self.__secret is not None:
+            expected = "sha256=" + hmac.new(self.__secret, body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, signature or ""):
+                return 401, {"message": "Invalid signature"}
+        if event == "ping":
+            return 200, {"message": "pong"}
+        if event != "push":
+            return 202, {"message": f"{event} events are ignored"}
+
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            return 400, {"message": "Invalid JSON"}
+        try:
+            counts = self.__ingestor.ingest_payloads([payload])
+        except Exception as e:
+            return 500, {"message": f"Unable to apply the push: {e}"}
+        return 200, dict(counts)
+
+    def __handler(self):
+        """
+        Returns the request handler class bound to this server
+
+        Note:
+            - Method is private
+        """
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written apart: don't let them wait for delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                status, response = receiver.receive(
+                    self.headers.get("X-GitHub-Event", ""), self.rfile.read(length),
+                    self.headers.get("X-Hub-Signature-256"))
+
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -1,10 +1,22 @@
 """
-Module providing functions for printing statistics of a GitHub repository.
+Module providing functions for getting and printing statistics of a GitHub repository.
+
+Classes:
+    - RepoStatistics: Statistics of a repository in a year, as a structured result.
 
 Functions:
-    - print_statistics_repo: Prints various statistics for a given 
-    repository, such as license, contributors, languages, downloads, 
-    forks, issues, commits, stargazers, and releases.
+    - get_statistics_repos: Gets the statistics of several repositories at once.
+    The independent sections of every repository (license, contributors,
+    languages, forks, issues, stargazers and releases) run concurrently on a
+    shared worker pool, and the results keep the order of the repositories. Each
+    result can also be handed to a callback as soon as it's ready.
+    - get_statistics_repo: Gets the statistics of a single repository.
+    - render_statistics_repo: Prints the statistics of a repository.
+    - print_statistics_repo: Prints various statistics for a given
+    repository, such as license, contributors, languages, downloads,
+    forks, issues, commits, stargazers, and releases. Forks, stargazers and
+    releases are walked from the newest and only until the start of the year, and
+    issues are counted with the search API without being listed.
 
 Example:
     # Import necessary modules
@@ -24,84 +36,235 @@ Example:
 
     # Print statistics for the repository
     print_statistics_repo(user_data, repo)
+
+    # Get the statistics of every contributed repository at once
+    for stats in get_statistics_repos(user_data, user_data.get_contributed_repos()):
+        render_statistics_repo(stats)
 """
 
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from github import Repository
 from api.user import UserData
-import datetime
+from api.pagination import iter_year_newest_first, iter_year_oldest_first
+from api.counts import count_issues
+from utils.profiler import stage
 
 
-def print_statistics_repo(user: UserData, repo: Repository):
-    """Prints all statistics for a provided repo and user
+@dataclass
+class RepoStatistics:
+    """
+    Statistics of a repository in a year
+    """
+    full_name: str
+    year: int
+    license: str = None
+    contributors: list = field(default_factory=list)
+    languages: list = field(default_factory=list)
+    forks_this_year: int = 0
+    issues_this_year: int = 0
+    issues_closed: int = 0
+    commits_this_year: int = 0
+    commits_made_by_user: int = 0
+    stargazers_total: int = 0
+    stargazers_this_year: int = 0
+    releases_this_year: int = 0
+    request_counts: Counter = field(default_factory=Counter)
+
+
+def _section_license(user: UserData, repo: Repository, requests: Counter):
+    """
+    Gets the name of the license of the repo, if it has one
+    """
+    try:
+        license = repo.get_license()
+    except BaseException:
+        return {"license": None}
+    return {"license": license.license.name}
+
+
+def _section_contributors(user: UserData, repo: Repository, requests: Counter):
+    """
+    Gets the logins of the contributors of the repo
+    """
+    return {"contributors": [c.login for c in repo.get_contributors()]}
+
+
+def _section_languages(user: UserData, repo: Repository, requests: Counter):
+    """
+    Gets the languages the repo is written in
+    """
+    return {"languages": list(repo.get_languages().keys())}
+
+
+def _section_forks(user: UserData, repo: Repository, requests: Counter):
+    """
+    Counts the forks made during the year
+    """
+    # Listed newest first
+    forks = iter_year_newest_first(repo.get_forks(), user.year,
+                                   lambda f: f.created_at, requests, "forks")
+    return {"forks_this_year": sum(1 for _ in forks)}
+
+
+def _section_issues(user: UserData, repo: Repository, requests: Counter):
+    """
+    Counts the issues opened during the year, and how many of them were closed
+    """
+    # Counted by the search API, without listing them
+    issues_this_year, closed = count_issues(repo, user.year, requests, "issues")
+    return {"issues_this_year": issues_this_year, "issues_closed": closed}
+
+
+def _section_stargazers(user: UserData, repo: Repository, requests: Counter):
+    """
+    Counts the stars of the repo, in total and given during the year
+    """
+    # Listed oldest first: walked backwards from the last page
+    stargazers = repo.get_stargazers_with_dates()
+    this_year = iter_year_oldest_first(stargazers, user.year, lambda s: s.starred_at,
+                                       user.github_instance.per_page, requests, "stargazers")
+    stargazers_this_year = sum(1 for _ in this_year)
+    return {"stargazers_total": stargazers.totalCount,
+            "stargazers_this_year": stargazers_this_year}
+
+
+def _section_releases(user: UserData, repo: Repository, requests: Counter):
+    """
+    Counts the releases published during the year
+    """
+    # Listed newest first
+    releases = iter_year_newest_first(repo.get_releases(), user.year,
+                                      lambda r: r.created_at, requests, "releases")
+    return {"releases_this_year": sum(1 for _ in releases)}
+
+
+def _timed_section(section, user: UserData, repo: Repository, requests: Counter):
+    """
+    Runs a section, timed as a stage of the installed profiler
+    """
+    with stage(f"repo_statistics.{section.__name__[len('_section_'):]}"):
+        return section(user, repo, requests)
+
+
+SECTIONS = (_section_license, _section_contributors, _section_languages, _section_forks,
+            _section_issues, _section_stargazers, _section_releases)
+
+
+def get_statistics_repos(user: UserData, repos: list, max_workers: int = 16,
+                         on_result=None):
+    """Gets the statistics of several repositories for a user. Every section of
+    every repository runs concurrently on a shared worker pool, so the total
+    time is bounded by the slowest repository rather than by their sum
+
+    Args:
+        user (UserData): User we want to analyze from the point of view of these repos
+        repos (list): Repos
+        max_workers (int): Maximum number of sections running at the same time
+        on_result: If provided, called with the RepoStatistics of each repo as soon as
+        it and every repo before it are complete
+
+    Returns:
+        list: RepoStatistics of every repo, in the same order as repos
+    """
+    # Commit data is memoized by the user: get it once, before going concurrent
+    results = []
+    for repo in repos:
+        data = user.repo_commit[repo]
+        results.append(RepoStatistics(
+            repo.full_name, user.year,
+            commits_this_year=data["total_count"],
+            commits_made_by_user=data["total_count_author"]))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [[executor.submit(_timed_section, section, user, repo,
+                                    stats.request_counts)
+                    for section in SECTIONS]
+                   for repo, stats in zip(repos, results)]
+
+        for stats, repo_futures in zip(results, futures):
+            for future in repo_futures:
+                for name, value in future.result().items():
+                    setattr(stats, name, value)
+            if on_result is not None:
+                on_result(stats)
+
+    return results
+
+
+def get_statistics_repo(user: UserData, repo: Repository):
+    """Gets all statistics for a provided repo and user
 
     Args:
         user (UserData): User we want to analyze from the point of view of this repo
         repo (Repository): Repo
+
+    Returns:
+        RepoStatistics: Statistics of the repo
     """
-    print(f"Showing repository statistics for {repo.full_name} in {user.year}")
+    return get_statistics_repos(user, [repo], max_workers=len(SECTIONS))[0]
+
+
+def render_statistics_repo(stats: RepoStatistics):
+    """Prints the statistics of a repo
+
+    Args:
+        stats (RepoStatistics): Statistics of the repo
+    """
+    print(f"Showing repository statistics for {stats.full_name} in {stats.year}")
 
     # License
-    try:
-        license = repo.get_license()
-    except BaseException:
+    if stats.license is None:
         print("This repository has no license")
     else:
-        print("License: ", license.license.name)
+        print("License: ", stats.license)
 
     # Contributors
-    contributors = repo.get_contributors()
-    print(f"This repository has {contributors.totalCount} contributors:")
-    for c in contributors:
-        print(f"- {c.login}")
+    print(f"This repository has {len(stats.contributors)} contributors:")
+    for c in stats.contributors:
+        print(f"- {c}")
 
     # Languages
-    languages = repo.get_languages().keys()
     print(
-        f"This repository is written in {len(languages)} different languages: ")
-    for l in languages:
+        f"This repository is written in {len(stats.languages)} different languages: ")
+    for l in stats.languages:
         print(f"- {l}")
 
     # Forks
-    forks_this_year = 0
-    for f in repo.get_forks():
-        if f.created_at.year == user.year:
-            forks_this_year += 1
-    if forks_this_year != 0:
+    if stats.forks_this_year != 0:
         print(
-            f"This repository has had {forks_this_year} forks during this year, {user.year}")
+            f"This repository has had {stats.forks_this_year} forks during this year, {stats.year}")
 
     # Issues
-    start_date = datetime.datetime(user.year, 1, 1, 0, 0, 0)
-    issues_this_year = [i for i in repo.get_issues(
-        since=start_date, state="all") if i.created_at.year == user.year]
-    closed = 0
-    for i in issues_this_year:
-        if i.state != "Open":
-            closed += 1
-    if len(issues_this_year) != 0:
+    if stats.issues_this_year != 0:
         print(
-            f"This repository has had {len(issues_this_year)} issues on {user.year}, of which {closed} where closed")
+            f"This repository has had {stats.issues_this_year} issues on {stats.year}, of which {stats.issues_closed} where closed")
 
     # Commits
-    commits_this_year = user.repo_commit[repo]["total_count"]
-    commits_made_by_user = user.repo_commit[repo]["total_count_author"]
     print(
-        f"This repository has had {commits_this_year} commits on {user.year}, of which {commits_made_by_user} were made by you")
+        f"This repository has had {stats.commits_this_year} commits on {stats.year}, of which {stats.commits_made_by_user} were made by you")
 
     # Stargazers
-    stargazers = repo.get_stargazers_with_dates()
-    stargazers_this_year = 0
-    for stg in stargazers:
-        if stg.starred_at.year == user.year:
-            stargazers_this_year += 1
-    if stargazers.totalCount != 0 or stargazers_this_year != 0:
-        print(f"Of {stargazers.totalCount} stars this repository has, {stargazers_this_year} were given this year {user.year}")
+    if stats.stargazers_total != 0 or stats.stargazers_this_year != 0:
+        print(f"Of {stats.stargazers_total} stars this repository has, {stats.stargazers_this_year} were given this year {stats.year}")
 
     # Releases
-    releases_this_year = 0
-    for r in repo.get_releases():
-        if r.created_at.year == user.year:
-            releases_this_year += 1
-    if releases_this_year != 0:
+    if stats.releases_this_year != 0:
         print(
-            f"This repository has had {releases_this_year} releases this year")
+            f"This repository has had {stats.releases_this_year} releases this year")
+
+
+def print_statistics_repo(user: UserData, repo: Repository, request_counts=None):
+    """Prints all statistics for a provided repo and user
+
+    Args:
+        user (UserData): User we want to analyze from the point of view of this repo
+        repo (Repository): Repo
+        request_counts (Counter): If provided, the requests made by the forks, stargazers
+        and releases sections are added to it
+    """
+    stats = get_statistics_repo(user, repo)
+    if request_counts is not None:
+        request_counts.update(stats.request_counts)
+    render_statistics_repo(stats)
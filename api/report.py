@@ -0,0 +1,179 @@
+"""
+Module: report
+
+This module provides the streaming pipeline the report is built with: every section of the
+report has a producer, the producers run concurrently and each section is handed to the
+caller as soon as its data is ready, instead of after every repository has been scanned.
+
+Producers are grouped in stages that run one after another, the producers of a stage running
+at the same time. The repository catalog is the first stage, since every other producer
+iterates it. Long producers (the commit scan, the language aggregation) also report their
+progress while they run, and every producer ends with a done event.
+
+Events arrive in the order the producers make them. For display, the pipeline can keep the
+order of the report instead: the events of the first producer not done yet stream as they
+arrive, those of the producers after it are held until it's done, and progress updates are
+only passed on between sections, so that they never split one.
+
+Classes:
+    ReportEvent: A result, progress update or error of a section of the report.
+
+Functions:
+    - run_pipeline(user, stages, ordered): Runs the producers and yields their events, as
+    they arrive or in the order of the report.
+
+Example:
+    for event in run_pipeline(user_data):
+        if event.kind == "result":
+            print(event.section, event.data)
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from api.repo import get_statistics_repos
+from api.user import UserData
+
+RESULT = "result"
+PROGRESS = "progress"
+ERROR = "error"
+DONE = "done"
+
+
+@dataclass
+class ReportEvent:
+    """
+    A result, progress update, error or end of a section of the report. The data of a
+    progress event is a (done, total) pair, and the one of an error event the exception
+    raised. The section of error and done events is the producer's
+    """
+    section: str
+    kind: str
+    data: object = None
+
+
+def _produce_catalog(user: UserData, emit):
+    """
+    Lists the repositories of the user once, so that the other producers only read them
+    """
+    emit("catalog", len(user.user_repos))
+
+
+def _produce_created(user: UserData, emit):
+    """
+    Repositories created during the year
+    """
+    emit("created", user.get_created_repos())
+
+
+def _produce_commits(user: UserData, emit):
+    """
+    Commits made during the year, scanning every repository
+    """
+    emit("commits", {"total_count": user.total_count, "public_count": user.public_count,
+                     "restricted_count": user.restricted_count})
+
+
+def _produce_contributed(user: UserData, emit):
+    """
+    Repositories contributed to during the year and, if asked for, the statistics of each of
+    them as soon as it's complete
+    """
+    repos = user.get_contributed_repos()
+    emit("contributed", repos)
+    if user.show_repo_info:
+        languages = {repo.full_name: repo.language for repo in repos}
+        get_statistics_repos(user, repos, on_result=lambda stats: emit(
+            "repo_statistics", (stats, languages[stats.full_name])))
+
+
+def _produce_languages(user: UserData, emit):
+    """
+    Changes per language of the user
+    """
+    emit("languages", user.get_languages_user())
+
+
+def _produce_streaks(user: UserData, emit):
+    """
+    Days with commits and longest commit streak
+    """
+    emit("streaks", user.get_commit_data())
+
+
+# Producers of every stage, in the order of the report
+STAGES = (
+    (_produce_catalog,),
+    (_produce_created, _produce_contributed, _produce_languages, _produce_commits,
+     _produce_streaks)
+)
+
+
+def run_pipeline(user: UserData, stages=STAGES, ordered: bool = False):
+    """
+    Runs the producers of the report and yields their events. A producer that fails yields
+    an error event and doesn't stop the others.
+
+    Args:
+        user (UserData): User the report is about
+        stages: Stages of producers, each producer taking the user and a callable
+        emit(section, data)
+        ordered (bool): Whether the events keep the order of the producers in their stage,
+        instead of the order they become available
+
+    Yields:
+        ReportEvent: Events of the sections
+    """
+    # (position of the producer in its stage or None for progress, event)
+    events = queue.Queue()
+    previous_progress = user.progress
+    user.progress = lambda section, done, total: events.put(
+        (None, ReportEvent(section, PROGRESS, (done, total))))
+
+    def run(position, producer):
+        section = producer.__name__[len("_produce_"):]
+
+        def emit(result_section, data):
+            events.put((position, ReportEvent(result_section, RESULT, data)))
+
+        try:
+            producer(user, emit)
+        except Exception as e:
+            events.put((position, ReportEvent(section, ERROR, e)))
+        finally:
+            events.put((position, ReportEvent(section, DONE)))
+
+    try:
+        for stage in stages:
+            with ThreadPoolExecutor(max_workers=len(stage)) as executor:
+                for position, producer in enumerate(stage):
+                    executor.submit(run, position, producer)
+
+                running = len(stage)
+                # Events held until the producers before theirs are done
+                held = [[] for _ in stage]
+                head = 0
+                # Whether the first producer not done yet has yielded events
+                in_section = False
+                while running > 0:
+                    position, event = events.get()
+                    if event.kind == DONE:
+                        running -= 1
+                    if not ordered:
+                        yield event
+                        continue
+                    if position is None:
+                        if not in_section:
+                            yield event
+                        continue
+
+                    held[position].append(event)
+                    while head < len(stage) and held[head]:
+                        head_events, held[head] = held[head], []
+                        yield from head_events
+                        in_section = head_events[-1].kind != DONE
+                        if in_section:
+                            break
+                        head += 1
+    finally:
+        user.progress = previous_progress
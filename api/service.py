@@ -0,0 +1,458 @@
+"""
+Module: service
+
+This module provides the service mode, which keeps the project running as a daemon serving
+wrapped reports over HTTP/JSON, instead of paying for a cold start on every report.
+
+A single WrappedService is shared by every request, so what a run would build from scratch
+stays warm across reports: the Github client and its pooled keep-alive sessions (see
+utils.connection), the response cache and the rate-limit scheduler, the language index
+(loaded once per process) and the reports already computed. Reports are kept in a result
+cache: those of past years until they are evicted (least recently used first), since their
+history doesn't change anymore; those of the current year for a few minutes.
+
+Reports are computed on a work queue with a fixed number of workers, which bounds the
+reports computed at once; when too many are waiting, new ones are turned away (503 with
+Retry-After) instead of piling up. Concurrent requests for the same user and year are
+coalesced: they wait for the single computation already running instead of starting
+another one.
+
+Endpoints:
+    - GET /wrapped/{user}/{year}: Report of a user in a year, as JSON. ?refresh=1 computes
+    it again, ignoring the result cache.
+    - GET /status: Counters of the service (requests, computations, coalesced requests,
+    cache hits, rejections, reports waiting and running).
+
+Reports with the private repositories of the authenticated user (show_private) are only
+served on a loopback host, or to requests with the shared secret of the server as a bearer
+token (Authorization: Bearer <secret>).
+
+Classes:
+    ServiceBusy: Raised when the work queue of the service is full.
+    ServiceExposed: Raised when private reports would be served to anyone on the network.
+    WrappedService: Computes reports on a bounded work queue, coalescing and caching them.
+    WrappedServer: Threaded HTTP server exposing a WrappedService.
+
+Example:
+    service = WrappedService(github_instance, show_private=False, show_repo_info=True)
+    server = WrappedServer(service, port=8080)
+    server.serve_forever()
+
+    curl http://127.0.0.1:8080/wrapped/your_username/2023
+
+Dependencies:
+    - http.server: Used for serving the reports.
+    - threading: Used for coalescing the requests and guarding the caches.
+    - hmac: Used for comparing the shared secret of the requests.
+"""
+
+import hmac
+import ipaddress
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from github import Github, UnknownObjectException
+from api.user import UserData
+from api.catalog import RepoCatalog
+from api.report import run_pipeline, RESULT, ERROR
+from api.snapshot import report_event_json
+from api.sources import RestSource
+
+ROUTE = re.compile(r"/wrapped/(?P<username>[A-Za-z0-9-]+)/(?P<year>\d{4})/?$")
+# Seconds a busy service asks clients to wait before trying again
+RETRY_AFTER = 5
+
+
+class ServiceBusy(Exception):
+    """
+    Raised when the work queue of the service is full
+    """
+
+
+class ServiceExposed(Exception):
+    """
+    Raised when a service including private repositories would listen on a host reachable
+    from the network without a shared secret
+    """
+
+
+class WrappedService:
+    """
+    Computes the reports on a bounded work queue, coalescing the concurrent requests for
+    the same report and caching the results
+    """
+
+    def __init__(self, github_instance: Github, show_private: bool, show_repo_info: bool,
+                 source_factory=RestSource, state_store=None, commit_fetcher=None,
+                 language_aggregator=None, utc_offset: int = 0, workers: int = 2,
+                 queue_size: int = 16, cache_seconds: float = 300,
+                 cache_entries: int = 128):
+        """
+        Args:
+            github_instance (Github): Github instance, shared by every report
+            show_private (bool): Whether the private repositories of the authenticated user
+            are included
+            show_repo_info (bool): Whether the extra info. of every repository is included
+            source_factory: Callable returning a new data source for a report
+            state_store (StateStore): Store of the aggregates of previous reports, if any
+            commit_fetcher (AsyncCommitFetcher): Fetcher for the commit details, if any
+            language_aggregator (LanguageAggregator): Aggregator of the languages, if any
+            utc_offset (int): Hours the calendars are shifted by
+            workers (int): Reports computed at the same time
+            queue_size (int): Reports waiting or running, after which requests are rejected
+            cache_seconds (float): Seconds the reports of the current year are kept
+            cache_entries (int): Reports kept in the result cache
+        """
+        self.__github_instance = github_instance
+        self.__show_private = show_private
+        self.__show_repo_info = show_repo_info
+        self.__source_factory = source_factory
+        self.__state_store = state_store
+        self.__commit_fetcher = commit_fetcher
+        self.__language_aggregator = language_aggregator
+        self.__utc_offset = utc_offset
+        self.__workers = workers
+        self.__queue_size = queue_size
+        self.__cache_seconds = cache_seconds
+        self.__cache_entries = cache_entries
+
+        self.__login = github_instance.get_user().login
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        self.__lock = threading.Lock()
+        # The state store is a single file: saved by one report at a time
+        self.__state_lock = threading.Lock()
+        # (login, year) -> (expiry or None, JSON body)
+        self.__cache = OrderedDict()
+        # (login, year) -> Future of the report being computed
+        self.__in_flight = {}
+        self.__counters = {"requests": 0, "computations": 0, "coalesced": 0,
+                           "cache_hits": 0, "rejected": 0, "failed": 0}
+
+    @property
+    def login(self):
+        """
+        Getter for login, the login of the authenticated user
+        """
+        return self.__login
+
+    @property
+    def show_private(self):
+        """
+        Getter for show_private
+        """
+        return self.__show_private
+
+    @property
+    def workers(self):
+        """
+        Getter for workers
+        """
+        return self.__workers
+
+    @property
+    def queue_size(self):
+        """
+        Getter for queue_size
+        """
+        return self.__queue_size
+
+    def status(self):
+        """
+        Returns the counters of the service
+
+        Returns:
+            dict: Requests, computations, coalesced requests, cache hits, rejections and
+            failures so far; reports in the queue (waiting or running) and in the cache
+        """
+        with self.__lock:
+            return dict(self.__counters, queued=len(self.__in_flight),
+                        cached=len(self.__cache), workers=self.__workers,
+                        queue_size=self.__queue_size)
+
+    def get_wrapped(self, username: str, year: int, refresh: bool = False):
+        """
+        Returns the report of a user in a year: from the result cache, from the computation
+        already running for it, or from a new one on the work queue
+
+        Args:
+            username (str): Login of the user
+            year (int): Year
+            refresh (bool): Whether the result cache is ignored
+
+        Returns:
+            bytes: Report, as JSON
+
+        Raises:
+            ServiceBusy: If the work queue is full
+            UnknownObjectException: If the user doesn't exist
+        """
+        key = (username.lower(), year)
+        with self.__lock:
+            self.__counters["requests"] += 1
+            cached = None if refresh else self.__cached(key)
+            if cached is not None:
+                self.__counters["cache_hits"] += 1
+                return cached
+
+            future = self.__in_flight.get(key)
+            if future is not None:
+                self.__counters["coalesced"] += 1
+            elif len(self.__in_flight) >= self.__queue_size:
+                self.__counters["rejected"] += 1
+                raise ServiceBusy(f"{len(self.__in_flight)} reports are already queued")
+            else:
+                future = Future()
+                self.__in_flight[key] = future
+                self.__counters["computations"] += 1
+                self.__executor.submit(self.__run, key, username, year, future)
+
+        return future.result()
+
+    def __cached(self, key: tuple):
+        """
+        Returns a report of the result cache, or None if it's not there or expired
+
+        Note:
+            - Method is private and must be called holding the lock
+        """
+        entry = self.__cache.get(key)
+        if entry is None:
+            return None
+        expiry, body = entry
+        if expiry is not None and expiry <= time.monotonic():
+            del self.__cache[key]
+            return None
+        self.__cache.move_to_end(key)
+        return body
+
+    def __run(self, key: tuple, username: str, year: int, future: Future):
+        """
+        Computes a report on a worker and hands it to every request waiting for it
+
+        Note:
+            - Method is private
+        """
+        try:
+            report = self.compute(username, year)
+            body = json.dumps(report, separators=(",", ":")).encode("utf-8")
+        except Exception as e:
+            with self.__lock:
+                self.__counters["failed"] += 1
+                del self.__in_flight[key]
+            future.set_exception(e)
+            return
+
+        with self.__lock:
+            # Reports with a failed section are computed again on the next request
+            if not report["errors"]:
+                past = year < datetime.now(timezone.utc).year
+                expiry = None if past else time.monotonic() + self.__cache_seconds
+                self.__cache[key] = (expiry, body)
+                self.__cache.move_to_end(key)
+                while len(self.__cache) > self.__cache_entries:
+                    self.__cache.popitem(last=False)
+            del self.__in_flight[key]
+        future.set_result(body)
+
+    def compute(self, username: str, year: int):
+        """
+        Computes the report of a user in a year, running the report pipeline. The private
+        repositories are only included for the authenticated user
+
+        Args:
+            username (str): Login of the user
+            year (int): Year
+
+        Returns:
+            dict: Every section of the report, and the errors of the failed ones
+        """
+        user = UserData(self.__github_instance, username, year, self.__show_private,
+                        self.__show_repo_info, self.__state_store, self.__source_factory(),
+                        self.__commit_fetcher, utc_offset=self.__utc_offset,
+                        language_aggregator=self.__language_aggregator)
+        if username.lower() != self.__login.lower():
+            named_user = self.__github_instance.get_user(username)
+            user.user = named_user
+            user.user_repos = RepoCatalog(named_user.get_repos())
+            username = named_user.login
+
+        report = {"username": username, "year": year, "repo_statistics": [], "errors": {}}
+        for event in run_pipeline(user):
+            if event.kind == ERROR:
+                report["errors"][event.section] = str(event.data)
+            elif event.kind == RESULT and event.section == "repo_statistics":
+                report["repo_statistics"].append(report_event_json(event, user))
+            elif event.kind == RESULT:
+                report[event.section] = report_event_json(event, user)
+        report["generated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        if not report["errors"]:
+            with self.__state_lock:
+                user.save_state()
+        return report
+
+    def close(self):
+        """
+        Waits for the reports being computed and stops the workers
+        """
+        self.__executor.shutdown(wait=True)
+
+
+class WrappedServer:
+    """
+    Threaded HTTP server exposing a WrappedService
+    """
+
+    def __init__(self, service: WrappedService, host: str = "127.0.0.1", port: int = 8080,
+                 secret: str = None):
+        """
+        Args:
+            service (WrappedService): Service computing the reports
+            host (str): Host to listen on
+            port (int): Port to listen on, or 0 for any free one
+            secret (str): Shared secret. If provided, requests without it as a bearer token
+            are rejected. Required for a service including private repositories on a host
+            other than a loopback one
+
+        Raises:
+            ServiceExposed: If the service includes private repositories, the host isn't a
+            loopback one and there's no secret
+        """
+        if service.show_private and not secret and not _is_loopback(host):
+            raise ServiceExposed(
+                f"Reports with private repositories can't be served on {host} without a "
+                "secret: set serviceSecret, or listen on 127.0.0.1")
+        self.__service = service
+        self.__secret = secret.encode("utf-8") if secret else None
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def service(self):
+        """
+        Getter for service
+        """
+        return self.__service
+
+    @property
+    def base_url(self):
+        """
+        Getter for base_url, the URL the reports are served at
+        """
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """
+        Serves in the current thread, until stop is called from another one
+        """
+        self.__server.serve_forever()
+
+    def start(self):
+        """
+        Starts serving in a background thread
+        """
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops serving
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def dispatch(self, path: str, query: dict, authorization: str = None):
+        """
+        Answers a GET request
+
+        Args:
+            path (str): Path of the request
+            query (dict): Query parameters
+            authorization (str): Authorization header of the request, if any
+
+        Returns:
+            tuple: Status, body (bytes) and extra response headers
+        """
+        if self.__secret is not None:
+            expected = b"Bearer " + self.__secret
+            if not hmac.compare_digest(expected, (authorization or "").encode("utf-8")):
+                return 401, _error("Missing or invalid secret"), \
+                    {"WWW-Authenticate": "Bearer"}
+
+        if path.rstrip("/") == "/status":
+            return 200, json.dumps(self.__service.status()).encode("utf-8"), {}
+
+        match = ROUTE.match(path)
+        if match is None:
+            return 404, _error("Not found"), {}
+
+        refresh = query.get("refresh", "0") not in ("0", "false", "")
+        try:
+            body = self.__service.get_wrapped(match["username"], int(match["year"]), refresh)
+        except ServiceBusy as e:
+            return 503, _error(str(e)), {"Retry-After": str(RETRY_AFTER)}
+        except UnknownObjectException:
+            return 404, _error(f"User {match['username']} not found"), {}
+        except Exception as e:
+            return 500, _error(f"Unable to compute the report: {e}"), {}
+        return 200, body, {}
+
+    def __handler(self):
+        """
+        Returns the request handler class bound to this server
+
+        Note:
+            - Method is private
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written apart: don't let them wait for delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, body, headers = server.dispatch(url.path, query,
+                                                        self.headers.get("Authorization"))
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _is_loopback(host: str):
+    """
+    Returns whether a host only accepts connections from the same machine
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _error(message: str):
+    """
+    Returns the JSON body of an error
+    """
+    return json.dumps({"message": message}).encode("utf-8")
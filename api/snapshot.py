@@ -0,0 +1,430 @@
+"""
+Module: snapshot
+
+This module provides the snapshot of a computed wrapped: a compact, versioned file holding
+every result of a report (repository catalog, created and contributed repositories with
+their commit counts, statistics of every repository, language totals, commit counts and
+the calendar arrays), so that the report can be rendered again without the GitHub API.
+
+A snapshot is a sequence of sections after a short header (magic and version). Every
+section has a name and either a JSON payload or the raw bytes of an array, aligned to 8
+bytes and little-endian. Sections are written one after another as the results of the
+report arrive, so the writer streams and never holds the whole snapshot; a name can be
+written several times (one section per repository statistics, for instance). The reader
+maps the file in memory and only indexes the section headers: JSON payloads are decoded
+when asked for, and arrays are returned as memoryviews over the mapped file, without
+copying them.
+
+Classes:
+    RepoSummary: Summary of a repository, as stored in the catalog.
+    SnapshotWriter: Streaming writer of a snapshot.
+    SnapshotReader: Memory-mapped reader of a snapshot.
+
+Functions:
+    - report_event_json(event, user): Returns the result of a report section as
+    JSON-serializable data.
+    - write_report_event(writer, event, user): Writes the result of a report section.
+    - write_user(writer, user): Writes the settings, repository catalog and calendar arrays
+    of a user.
+    - read_report_events(reader): Returns the results of the report sections stored.
+    - read_calendar(reader): Returns the calendar stored.
+
+Example:
+    with SnapshotWriter("wrapped.snapshot") as writer:
+        writer.write_json("meta", {"username": "your_username", "year": 2023})
+        writer.write_array("calendar.days", calendar.days)
+
+    with SnapshotReader("wrapped.snapshot") as reader:
+        print(reader.json("meta"), len(reader.array("calendar.days")))
+"""
+
+import dataclasses
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from collections import Counter
+from datetime import date
+from api.calendar_stats import CalendarStats
+from api.repo import RepoStatistics
+from api.report import ReportEvent, RESULT, DONE
+
+MAGIC = b"GHWRAPS\0"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sH6x")
+# Name length, kind, array typecode, padding before the payload, payload length
+SECTION = struct.Struct("<HBcIQ")
+JSON_SECTION = 0
+ARRAY_SECTION = 1
+ALIGNMENT = 8
+
+
+@dataclass
+class RepoSummary:
+    """
+    Summary of a repository, as stored in the catalog of a snapshot
+    """
+    full_name: str
+    language: str = None
+    private: bool = False
+    fork: bool = False
+    created_at: str = None
+    total_count: int = 0
+    total_count_author: int = 0
+
+    @classmethod
+    def from_repo(cls, repo, commit_data: dict = None):
+        """
+        Returns the summary of a PyGithub repository
+
+        Args:
+            repo (Repository): Repository
+            commit_data (dict): Commit data of the repository, if it was scanned
+        """
+        commit_data = commit_data or {}
+        return cls(repo.full_name, repo.language, repo.private, repo.fork,
+                   repo.created_at.isoformat() if repo.created_at else None,
+                   commit_data.get("total_count", 0),
+                   commit_data.get("total_count_author", 0))
+
+
+class SnapshotWriter:
+    """
+    Streaming writer of a snapshot. The file is written next to its destination and only
+    replaces it once closed, so an interrupted run never leaves a partial snapshot
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Args:
+            filepath (str): Filepath of the snapshot
+        """
+        self.__filepath = filepath
+        self.__file = open(f"{filepath}.tmp", "wb")
+        self.__file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION))
+        self.__sections = 0
+
+    @property
+    def filepath(self):
+        """
+        Getter for filepath
+        """
+        return self.__filepath
+
+    @property
+    def sections(self):
+        """
+        Getter for sections, the number of sections written
+        """
+        return self.__sections
+
+    def __write(self, name: str, kind: int, typecode: bytes, payload):
+        """
+        Writes a section, padding its payload to the alignment
+
+        Note:
+            - Method is private
+        """
+        name = name.encode("utf-8")
+        start = self.__file.tell() + SECTION.size + len(name)
+        padding = -start % ALIGNMENT
+        self.__file.write(SECTION.pack(len(name), kind, typecode, padding, len(payload)))
+        self.__file.write(name)
+        self.__file.write(bytes(padding))
+        self.__file.write(payload)
+        self.__sections += 1
+
+    def write_json(self, name: str, data):
+        """
+        Writes a section with a JSON payload
+
+        Args:
+            name (str): Name of the section
+            data: JSON-serializable data
+        """
+        self.__write(name, JSON_SECTION, b"\0",
+                     json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def write_array(self, name: str, values: array):
+        """
+        Writes a section with the raw bytes of an array
+
+        Args:
+            name (str): Name of the section
+            values (array): Array of numbers
+        """
+        if sys.byteorder == "big":
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.__write(name, ARRAY_SECTION, values.typecode.encode("ascii"), values.tobytes())
+
+    def close(self):
+        """
+        Finishes the snapshot and moves it to its destination
+        """
+        if self.__file.closed:
+            return
+        self.__file.close()
+        os.replace(f"{self.__filepath}.tmp", self.__filepath)
+
+    def abort(self):
+        """
+        Discards the snapshot being written
+        """
+        if self.__file.closed:
+            return
+        self.__file.close()
+        os.remove(f"{self.__filepath}.tmp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class SnapshotReader:
+    """
+    Memory-mapped reader of a snapshot
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Maps the snapshot and indexes its sections
+
+        Args:
+            filepath (str): Filepath of the snapshot
+
+        Raises:
+            Exception: If the file isn't a snapshot or belongs to another version
+        """
+        self.__filepath = filepath
+        with open(filepath, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise Exception(f"{filepath} is not a wrapped snapshot")
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__view = memoryview(self.__map)
+
+        magic, version = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise Exception(f"{filepath} is not a wrapped snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise Exception(f"{filepath} is a snapshot of version {version}, "
+                            f"expected {SNAPSHOT_VERSION}")
+
+        # Name -> list of (kind, typecode, start, end), in the order they were written
+        self.__sections = {}
+        offset = HEADER.size
+        while offset < len(self.__map):
+            name_length, kind, typecode, padding, length = SECTION.unpack_from(
+                self.__map, offset)
+            offset += SECTION.size
+            name = bytes(self.__view[offset:offset + name_length]).decode("utf-8")
+            start = offset + name_length + padding
+            self.__sections.setdefault(name, []).append(
+                (kind, typecode.decode("ascii"), start, start + length))
+            offset = start + length
+
+    @property
+    def filepath(self):
+        """
+        Getter for filepath
+        """
+        return self.__filepath
+
+    def names(self):
+        """
+        Returns the names of the sections, in the order they were first written
+        """
+        return list(self.__sections)
+
+    def __payloads(self, name: str, kind: int):
+        """
+        Returns the typecode and payload of every section with a name
+
+        Note:
+            - Method is private
+        """
+        for section_kind, typecode, start, end in self.__sections.get(name, []):
+            if section_kind != kind:
+                raise Exception(f"Section {name} of {self.__filepath} has another kind")
+            yield typecode, self.__view[start:end]
+
+    def json_all(self, name: str):
+        """
+        Returns the data of every JSON section with a name, in the order they were written
+        """
+        return [json.loads(bytes(payload)) for _, payload in
+                self.__payloads(name, JSON_SECTION)]
+
+    def json(self, name: str, default=None):
+        """
+        Returns the data of the last JSON section with a name, or default if there's none
+        """
+        data = self.json_all(name)
+        return data[-1] if data else default
+
+    def array(self, name: str):
+        """
+        Returns the values of the last array section with a name, as a memoryview over the
+        mapped file (copied only on big-endian hosts), or None if there's none. Views must
+        be released before the reader is closed
+        """
+        payloads = list(self.__payloads(name, ARRAY_SECTION))
+        if not payloads:
+            return None
+        typecode, payload = payloads[-1]
+        if sys.byteorder == "big":
+            values = array(typecode, bytes(payload))
+            values.byteswap()
+            return memoryview(values)
+        return payload.cast(typecode)
+
+    def close(self):
+        """
+        Unmaps the snapshot
+        """
+        self.__view.release()
+        self.__map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def report_event_json(event: ReportEvent, user=None):
+    """
+    Returns the result of a section of the report as JSON-serializable data
+
+    Args:
+        event (ReportEvent): Result event of the report pipeline
+        user (UserData): User the report is about, for the commit counts of the repositories
+
+    Returns:
+        JSON-serializable data of the section
+    """
+    data = event.data
+    if event.section in ("created", "contributed"):
+        repo_commit = user.repo_commit if user is not None and event.section == "contributed" \
+            else {}
+        return [dataclasses.asdict(RepoSummary.from_repo(repo, repo_commit.get(repo)))
+                for repo in data]
+    if event.section == "repo_statistics":
+        stats, language = data
+        statistics = {f.name: getattr(stats, f.name) for f in dataclasses.fields(stats)}
+        statistics["request_counts"] = dict(stats.request_counts)
+        return {"statistics": statistics, "language": language}
+    if event.section == "languages":
+        # Pairs, since the unknown language (None) can't be a JSON key
+        return list(data.items())
+    if event.section == "streaks":
+        return {key: value.isoformat() if isinstance(value, date) else value
+                for key, value in data.items()}
+    return data
+
+
+def write_report_event(writer: SnapshotWriter, event: ReportEvent, user=None):
+    """
+    Writes the result of a section of the report as it arrives. Progress and errors are
+    not stored
+
+    Args:
+        writer (SnapshotWriter): Writer of the snapshot
+        event (ReportEvent): Event of the report pipeline
+        user (UserData): User the report is about, for the commit counts of the repositories
+    """
+    # Streaks are derived from the calendar arrays when rendered, so that the current
+    # streak is always computed for the day it's rendered on
+    if event.kind != RESULT or event.section == "streaks":
+        return
+    writer.write_json(event.section, report_event_json(event, user))
+
+
+def write_user(writer: SnapshotWriter, user):
+    """
+    Writes the settings of the report of a user, the catalog of their repositories (with
+    the commit counts of those scanned) and the arrays of their calendar
+
+    Args:
+        writer (SnapshotWriter): Writer of the snapshot
+        user (UserData): User the report is about
+    """
+    calendar = user.get_calendar()
+    writer.write_json("meta", {
+        "username": user.username,
+        "year": user.year,
+        "show_private": user.show_private,
+        "show_repo_info": user.show_repo_info,
+        "utc_offset": calendar.utc_offset
+    })
+    repo_commit = user.repo_commit
+    writer.write_json("repositories", [
+        dataclasses.asdict(RepoSummary.from_repo(repo, repo_commit.get(repo)))
+        for repo in user.user_repos])
+    writer.write_array("calendar.days", calendar.days)
+    writer.write_array("calendar.hours", calendar.hours)
+
+
+def read_calendar(reader: SnapshotReader):
+    """
+    Returns the calendar stored in a snapshot
+
+    Args:
+        reader (SnapshotReader): Reader of the snapshot
+
+    Returns:
+        CalendarStats: Calendar of the report, or None if the snapshot has none
+    """
+    meta = reader.json("meta")
+    days = reader.array("calendar.days")
+    hours = reader.array("calendar.hours")
+    if meta is None or days is None or hours is None:
+        return None
+    try:
+        return CalendarStats.from_arrays(meta["year"], days, hours, meta["utc_offset"])
+    finally:
+        days.release()
+        hours.release()
+
+
+def read_report_events(reader: SnapshotReader):
+    """
+    Returns the results of the sections of the report stored in a snapshot, in the order
+    the report displays them, with the end of the contributed section (after the
+    statistics of its repositories). The streaks section is not included: it's computed
+    from the calendar arrays
+
+    Args:
+        reader (SnapshotReader): Reader of the snapshot
+
+    Returns:
+        list: ReportEvent of every result
+    """
+    events = []
+    for data in reader.json_all("catalog"):
+        events.append(ReportEvent("catalog", RESULT, data))
+    for section in ("created", "contributed"):
+        for repos in reader.json_all(section):
+            events.append(ReportEvent(section, RESULT, [RepoSummary(**r) for r in repos]))
+    for data in reader.json_all("repo_statistics"):
+        stats = RepoStatistics(**data["statistics"])
+        stats.request_counts = Counter(stats.request_counts)
+        events.append(ReportEvent("repo_statistics", RESULT, (stats, data["language"])))
+    events.append(ReportEvent("contributed", DONE))
+    for pairs in reader.json_all("languages"):
+        events.append(ReportEvent("languages", RESULT, dict(map(tuple, pairs))))
+    for data in reader.json_all("commits"):
+        events.append(ReportEvent("commits", RESULT, data))
+    return events
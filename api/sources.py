@@ -0,0 +1,826 @@
+"""
+Module: sources
+
+This module provides the data sources UserData can get the commit data of a user from.
+
+A data source returns, for every repository of the user, a dictionary with the commit
+data of the year:
+    - total_count: Commits made to the repository during the year
+    - total_count_author: Commits made by the user to the repository
+    - commits_pending: Commits made by the user not in the commit store of the user yet
+    (lazy iterable of PyGithub Commit, read only if the language statistics are needed)
+    - commit_days: Commits made by the user per day ("YYYY-MM-DD" -> count)
+    - commit_hours: Commits made by the user per UTC hour of the week (str(hour) -> count,
+    0 being Monday 00:00). Empty if the source only knows the days
+    - stored_languages: Changes per language already computed by previous runs
+    - head_sha, head_date: Watermark of the newest commit of the user seen (incremental
+    sources only)
+    - scanned_at: When the repository was last scanned (incremental sources only)
+    - ingested: SHAs of the commits applied from push events since then (incremental
+    sources only)
+
+The commits made by the user (SHA, date, repository) are added to the commit store of the
+user (see utils.commit_store) as they are read, and the PyGithub objects are dropped.
+
+Classes:
+    RestSource: Walks the commits of the user to every repository with the REST API,
+    scanning several repositories concurrently, and counts the rest with pagination
+    headers. Supports incremental runs from stored watermarks.
+    GraphQLSource: Uses the contributionsCollection of the GraphQL API, which only costs a
+    few batched queries. Falls back to a RestSource if the GraphQL API can't be used. It
+    can also provide the commits per day on their own (get_commit_days), with a single query,
+    and the contributions to private repositories the token can't see
+    (get_restricted_count).
+    SharedScanSource: Walks the commits of every repository once for several users at
+    the same time, fanning each commit out to the accumulator of its author. Used by the
+    batch mode, where many users share the same repositories, and by the multi-year mode,
+    where a single user's commits are walked once over several years.
+    StoredSource: Reads the commit data from the state store alone, kept up to date by
+    push events (see api.push_events), without scanning any repository already scanned.
+    Repositories never scanned are scanned with a RestSource.
+
+Example:
+    user_data = UserData(github_instance, "your_username", 2023, True, True,
+                         source=GraphQLSource("your_token"))
+
+Dependencies:
+    - requests: Used for sending the GraphQL queries.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+import math
+import threading
+import time
+import requests
+from utils.state_store import empty_repo_state
+from utils.commit_store import CommitStore
+from api.calendar_stats import hour_of_week
+from api.counts import count_commits
+from utils.profiler import record_request
+from utils.connection import count_requests
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+
+class RestSource:
+    """
+    Data source walking the commits of every repository with the REST API
+    """
+
+    incremental = True
+
+    def __init__(self, max_workers: int = 8):
+        """
+        Args:
+            max_workers (int): Maximum number of repositories scanned at the same time
+        """
+        self.__max_workers = max_workers
+        self.timings = []
+
+    @property
+    def max_workers(self):
+        """
+        Getter for max_workers
+        """
+        return self.__max_workers
+
+    @max_workers.setter
+    def max_workers(self, value):
+        """
+        Setter for max_workers
+        """
+        self.__max_workers = value
+
+    def get_repo_commits(self, user, start: datetime, end: datetime, stored_repos: dict):
+        """
+        Returns the commit data of every repository of the user in [start, end). Up to
+        max_workers repositories are scanned concurrently; the result keeps the order of
+        the user repositories whatever order the scans finish in. If a scan fails, the
+        pending ones are cancelled and the error is raised.
+
+        When stored states are provided, only the commits of the user made after the
+        watermark of each repository are fetched and merged with the stored aggregates. If
+        the watermark commit can't be found anymore (the history was rewritten by a
+        force-push), or the commits of the user counted for the period disagree with the
+        merged total (commits with older dates landed since, such as a merged branch), the
+        repository is scanned again from the start.
+
+        The time spent scanning each repository is kept in timings, and the progress of
+        the scan is reported to the user as each repository is done.
+
+        Args:
+            user (UserData): User whose repositories are scanned
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            stored_repos (dict): Stored repository states, keyed by repository id
+
+        Returns:
+            dict: Commit data of every repository
+        """
+        login = user.user.login
+
+        def scan(repo):
+            begin = time.perf_counter()
+            stored = stored_repos.get(str(repo.id))
+            data = self.scan_repo_commits(login, repo, start, end, stored, user.commit_store)
+            if data is None:
+                # Watermark lost or commits missed: rescan the whole period
+                data = self.scan_repo_commits(login, repo, start, end, None,
+                                              user.commit_store)
+            return data, time.perf_counter() - begin
+
+        # Repositories not pushed to since start can't have commits of the period
+        repos = user.get_active_repos(start)
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            futures = [executor.submit(scan, repo) for repo in repos]
+            for done, future in enumerate(as_completed(futures), 1):
+                if future.exception() is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    raise future.exception()
+                user.report_progress("commits", done, len(futures))
+
+        repo_commit = {}
+        self.timings = []
+        for repo, future in zip(repos, futures):
+            data, seconds = future.result()
+            repo_commit[repo] = data
+            self.timings.append((repo.full_name, seconds, data["total_count"]))
+
+        return repo_commit
+
+    def print_timings(self, top: int = 10):
+        """
+        Prints the repositories whose scan took the longest
+
+        Args:
+            top (int): Number of repositories to print
+        """
+        timings = sorted(self.timings, key=lambda x: x[1], reverse=True)
+        print(f"Scanned {len(timings)} repositories in {sum(t[1] for t in timings):.2f}s "
+              f"(added up over {self.__max_workers} workers). Slowest:")
+        for full_name, seconds, count in timings[:top]:
+            print(f"- {full_name}: {seconds:.2f}s, {count} commits")
+
+    def scan_repo_commits(self, login: str, repo, start: datetime, end: datetime,
+                          stored: dict, store: CommitStore = None):
+        """
+        Scans the commits of the user to a repository in [start, end), or only those newer
+        than the watermark of its stored state, and merges them with the stored aggregates.
+        Commits of other authors are only counted, with a single per_page=1 request. After
+        an incremental scan, the commits of the user are counted the same way: commits that
+        landed after the previous run with older dates (merged branches) are listed after
+        the watermark or before the window, so if the totals disagree the scan is given up
+
+        Args:
+            login (str): Login of the user whose commits are counted
+            repo (Repository): Repository to scan
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            stored (dict): Stored state of the repository, or None for a full scan
+            store (CommitStore): If provided, the commits of the user are added to it
+
+        Returns:
+            dict: Commit data of the repository, or None if the stored watermark was not found
+            or commits were missed, and the whole period has to be scanned again
+        """
+        if stored is None:
+            stored = empty_repo_state(repo.full_name, repo.private)
+        scanned_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        since = start
+        if stored["head_sha"]:
+            # One second of overlap, so that the watermark commit itself is listed
+            since = max(start, datetime.fromisoformat(
+                stored["head_date"]).replace(tzinfo=None) - timedelta(seconds=1))
+
+        # Only the commits of the user are needed one by one
+        commits_repo = repo.get_commits(since=since, until=end, author=login)
+        author_count = 0
+        # Only what the store keeps, until the scan is known to be complete
+        commits_repo_author = []
+        commit_days = defaultdict(int, stored["commit_days"])
+        commit_hours = defaultdict(int, stored.get("commit_hours", {}))
+        head_sha = stored["head_sha"]
+        head_date = stored["head_date"]
+        found_watermark = stored["head_sha"] is None
+
+        for i, c in enumerate(commits_repo):
+            if c.sha == stored["head_sha"]:
+                found_watermark = True
+                break
+            if i == 0:
+                head_sha = c.sha
+                head_date = c.commit.committer.date.isoformat()
+            commits_repo_author.append((c.sha, c.commit.author.date))
+            author_count += 1
+            commit_days[c.commit.author.date.date().isoformat()] += 1
+            commit_hours[str(hour_of_week(c.commit.author.date))] += 1
+
+        if not found_watermark:
+            return None
+        if stored["head_sha"] and count_commits(repo, start, end, login) != \
+                stored["total_count_author"] + author_count:
+            # Commits landed with dates older than the watermark (such as those of a
+            # merged branch) and were listed before it, or not at all
+            return None
+
+        if store is not None:
+            for sha, date in commits_repo_author:
+                store.add_commit(repo.full_name, sha, login, date, repo.private)
+
+        return {
+            "total_count": count_commits(repo, start, end),
+            "total_count_author": stored["total_count_author"] + author_count,
+            "commits_pending": [],
+            "commit_days": dict(commit_days),
+            "commit_hours": dict(commit_hours),
+            "stored_languages": stored["languages"],
+            "head_sha": head_sha,
+            "head_date": head_date,
+            "scanned_at": scanned_at,
+            "ingested": []
+        }
+
+
+class GraphQLSource:
+    """
+    Data source using the contributionsCollection of the GraphQL API
+    """
+
+    incremental = False
+
+    # Number of repositories whose yearly commit count is asked for in a single query
+    REPOS_PER_QUERY = 50
+    # Repositories a contributionsCollection lists at most
+    MAX_REPOSITORIES = 100
+
+    def __init__(self, token: str, url: str = GITHUB_GRAPHQL_URL, fallback=None,
+                 timeout: int = 30):
+        """
+        Args:
+            token (str): Github token
+            url (str): GraphQL endpoint
+            fallback: Data source used if the GraphQL API fails. Defaults to a RestSource
+            timeout (int): Timeout of each query, in seconds
+        """
+        self.__url = url
+        self.__fallback = fallback if fallback is not None else RestSource()
+        self.__timeout = timeout
+        self.__session = requests.Session()
+        self.__session.headers["Authorization"] = f"bearer {token}"
+        self.__contributions = {}
+        # (login, start, end) -> contributions to private repositories the token can't see
+        self.__restricted = {}
+        self.query_count = 0
+
+    @property
+    def url(self):
+        """
+        Getter for url
+        """
+        return self.__url
+
+    @property
+    def fallback(self):
+        """
+        Getter for fallback
+        """
+        return self.__fallback
+
+    def query(self, query: str, variables: dict = None):
+        """
+        Runs a GraphQL query
+
+        Args:
+            query (str): GraphQL query
+            variables (dict): Variables of the query
+
+        Returns:
+            dict: Data of the response
+
+        Raises:
+            Exception: If the query can't be run or the response contains errors
+        """
+        self.query_count += 1
+        start = time.perf_counter()
+        response = self.__session.post(
+            self.__url, json={"query": query, "variables": variables or {}},
+            timeout=self.__timeout)
+        record_request("POST", self.__url, response.status_code, time.perf_counter() - start,
+                       response.headers, self.__session.headers["Authorization"])
+
+        if response.status_code != 200:
+            raise Exception(f"GraphQL query failed with status {response.status_code}")
+
+        body = response.json()
+        if body.get("errors"):
+            raise Exception(f"GraphQL query failed: {body['errors'][0].get('message')}")
+
+        return body["data"]
+
+    def get_repo_commits(self, user, start: datetime, end: datetime, stored_repos: dict):
+        """
+        Returns the commit data of every repository of the user in [start, end). Falls back
+        to the REST data source if the GraphQL API can't be used.
+
+        Args:
+            user (UserData): User whose repositories are scanned
+            start (datetime): Start of the period (at most a year before end)
+            end (datetime): End of the period
+            stored_repos (dict): Stored repository states (ignored: the queries are cheap)
+
+        Returns:
+            dict: Commit data of every repository
+        """
+        try:
+            return self.__get_repo_commits(user, start, end)
+        except Exception as e:
+            print(f"Unable to use the GraphQL API ({e}), falling back to the REST API")
+            return self.__fallback.get_repo_commits(user, start, end, stored_repos)
+
+    def get_commit_days(self, user, start: datetime, end: datetime):
+        """
+        Returns the commits made by the user per day in each of their repositories, without
+        scanning the repositories. Falls back to the REST data source if the GraphQL API
+        can't be used.
+
+        Args:
+            user (UserData): User whose contributions are queried
+            start (datetime): Start of the period (at most a year before end)
+            end (datetime): End of the period
+
+        Returns:
+            dict: For every contributed repository full name, commits per day
+        """
+        try:
+            commit_days = self.__get_commit_days(user.user.login, start, end)
+        except Exception as e:
+            print(f"Unable to use the GraphQL API ({e}), falling back to the REST API")
+            repo_commit = self.__fallback.get_repo_commits(user, start, end, {})
+            return {repo.full_name: data["commit_days"]
+                    for repo, data in repo_commit.items() if data["total_count_author"]}
+
+        names = {repo.full_name for repo in user.user_repos}
+        return {name: days for name, days in commit_days.items() if name in names}
+
+    def get_restricted_count(self, login: str, start: datetime, end: datetime):
+        """
+        Returns the contributions of a user to private repositories the token can't see
+        (commits, issues, pull requests and reviews alike), which the commit data leaves
+        out. Only known once the contributions of the period have been queried
+
+        Args:
+            login (str): Login of the user
+            start (datetime): Start of the period
+            end (datetime): End of the period
+
+        Returns:
+            int: Contributions, or 0 if they weren't queried (such as after falling back to
+            the REST API)
+        """
+        return self.__restricted.get((login, start, end), 0)
+
+    def __get_repo_commits(self, user, start: datetime, end: datetime):
+        """
+        Builds the commit data from the contributions of the user and the commit history
+        of the repositories they contributed to
+
+        Note:
+            - Method is private
+        """
+        login = user.user.login
+        commit_days = self.__get_commit_days(login, start, end)
+
+        repos = {repo.full_name: repo for repo in user.user_repos}
+        contributed = [name for name in commit_days if name in repos]
+        totals = self.__get_history_counts(contributed, start, end)
+
+        repo_commit = {}
+        for name, repo in repos.items():
+            days = commit_days.get(name, {})
+            author_count = sum(days.values())
+            if author_count:
+                commits_pending = repo.get_commits(author=login, since=start, until=end)
+            else:
+                commits_pending = []
+
+            repo_commit[repo] = {
+                "total_count": max(totals.get(name, 0), author_count),
+                "total_count_author": author_count,
+                "commits_pending": commits_pending,
+                "commit_days": days,
+                "commit_hours": {},
+                "stored_languages": [],
+                "head_sha": None,
+                "head_date": None
+            }
+
+        return repo_commit
+
+    def __get_commit_days(self, login: str, start: datetime, end: datetime):
+        """
+        Returns the commits made by the user per repository and day. The period is queried
+        month by month (as aliases of a single query), so that no repository has more than
+        31 daily contributions in a window and no pagination is needed. A month listing the
+        most repositories a collection can list may be missing some, and raises an
+        Exception (so that the REST data source is used instead).
+
+        The result is memoized per login and period.
+
+        Returns:
+            dict: For every repository full name, commits per day
+
+        Note:
+            - Method is private
+        """
+        key = (login, start, end)
+        if key in self.__contributions:
+            return self.__contributions[key]
+
+        windows = []
+        window_start = start
+        while window_start < end:
+            if window_start.month == 12:
+                window_end = datetime(window_start.year + 1, 1, 1)
+            else:
+                window_end = datetime(window_start.year, window_start.month + 1, 1)
+            window_end = min(window_end, end)
+            windows.append((window_start, window_end))
+            window_start = window_end
+
+        aliases = "\n".join(
+            f"""m{i}: contributionsCollection(from: "{a.isoformat()}Z", to: "{(b - timedelta(seconds=1)).isoformat()}Z") {{
+                restrictedContributionsCount
+                commitContributionsByRepository(maxRepositories: {self.MAX_REPOSITORIES}) {{
+                    repository {{ nameWithOwner isPrivate }}
+                    contributions(first: 31) {{ nodes {{ commitCount occurredAt }} }}
+                }}
+            }}""" for i, (a, b) in enumerate(windows))
+        query = f"""query($login: String!) {{
+            user(login: $login) {{
+                {aliases}
+            }}
+        }}"""
+
+        data = self.query(query, {"login": login})["user"]
+
+        commit_days = defaultdict(lambda: defaultdict(int))
+        restricted_count = 0
+        for i in range(len(windows)):
+            collection = data[f"m{i}"]
+            restricted_count += collection["restrictedContributionsCount"]
+            if len(collection["commitContributionsByRepository"]) >= self.MAX_REPOSITORIES:
+                raise Exception(f"{self.MAX_REPOSITORIES} or more repositories contributed to "
+                                "in a month, some may be missing")
+            for by_repository in collection["commitContributionsByRepository"]:
+                name = by_repository["repository"]["nameWithOwner"]
+                for node in by_repository["contributions"]["nodes"]:
+                    commit_days[name][node["occurredAt"][:10]] += node["commitCount"]
+
+        self.__restricted[key] = restricted_count
+        self.__contributions[key] = {name: dict(days) for name, days in commit_days.items()}
+        return self.__contributions[key]
+
+    def __get_history_counts(self, full_names: list, start: datetime, end: datetime):
+        """
+        Returns the number of commits made to the default branch of each repository in the
+        period, asking for REPOS_PER_QUERY repositories per query
+
+        Returns:
+            dict: For every repository full name, its commit count
+
+        Note:
+            - Method is private
+        """
+        totals = {}
+        for first in range(0, len(full_names), self.REPOS_PER_QUERY):
+            batch = full_names[first:first + self.REPOS_PER_QUERY]
+            aliases = "\n".join(
+                f"""r{i}: repository(owner: "{name.split('/')[0]}", name: "{name.split('/')[1]}") {{
+                    defaultBranchRef {{
+                        target {{
+                            ... on Commit {{ history(since: $since, until: $until) {{ totalCount }} }}
+                        }}
+                    }}
+                }}""" for i, name in enumerate(batch))
+            query = f"""query($since: GitTimestamp!, $until: GitTimestamp!) {{
+                {aliases}
+            }}"""
+
+            data = self.query(query, {"since": f"{start.isoformat()}Z",
+                                      "until": f"{end.isoformat()}Z"})
+            for i, name in enumerate(batch):
+                branch = (data.get(f"r{i}") or {}).get("defaultBranchRef")
+                if branch:
+                    totals[name] = branch["target"]["history"]["totalCount"]
+
+        return totals
+
+
+class SharedScanSource:
+    """
+    Data source walking the commits of every repository once, shared by several users or
+    several years. The commits of every author are added to the commit store of the
+    source, which the users must share. With a single user, only the commits of that user
+    are listed, and the commits of every year are counted apart.
+    """
+
+    incremental = False
+
+    def __init__(self, max_workers: int = 8, per_page: int = 30, years: list = None,
+                 author: str = None):
+        """
+        Args:
+            max_workers (int): Maximum number of repositories scanned at the same time
+            per_page (int): Page size of the commit lists, used for estimating the requests
+            of separate scans
+            years (list): Years the users will ask for. Any year among them is read from a
+            single scan of the whole range
+            author (str): Login of the only user of the source, if there's a single one
+        """
+        self.__max_workers = max_workers
+        self.__per_page = per_page
+        self.__years = (min(years), max(years)) if years else None
+        self.__author = author
+        self.__lock = threading.Lock()
+        # (repository id, start, end) -> for every year of the period, the commit count and
+        # the commits per day and per hour of the week by author login
+        self.__scans = {}
+        self.store = CommitStore()
+        # (repository id, start, end) -> requests sent to list and count its commits
+        self.requests = {}
+
+    @property
+    def max_workers(self):
+        """
+        Getter for max_workers
+        """
+        return self.__max_workers
+
+    @max_workers.setter
+    def max_workers(self, value):
+        """
+        Setter for max_workers
+        """
+        self.__max_workers = value
+
+    def period(self, start: datetime, end: datetime):
+        """
+        Returns the period actually scanned for a requested one: the whole range of years
+        of the source if it's within it
+
+        Args:
+            start (datetime): Start of the requested period
+            end (datetime): End of the requested period
+
+        Returns:
+            tuple: Start and end of the period to scan
+        """
+        if self.__years is not None:
+            first, last = self.__years
+            if first <= start.year and end <= datetime(last + 1, 1, 1):
+                return datetime(first, 1, 1), datetime(last + 1, 1, 1)
+        return start, end
+
+    def scan(self, repos: list, start: datetime, end: datetime, on_progress=None):
+        """
+        Scans the commits of the repositories in [start, end) that weren't scanned yet,
+        max_workers of them concurrently, grouping the commits of each one by year (of
+        their author date, so that counts, calendars and languages agree) and author.
+        With a single author, only their commits are listed, and the commits of every
+        year are counted with a request each
+
+        Args:
+            repos (list): Repositories to scan
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            on_progress: If provided, called with the repositories scanned and the total
+        """
+        with self.__lock:
+            pending = {repo.id: repo for repo in repos
+                       if (repo.id, start, end) not in self.__scans}
+            # Claim them, so that concurrent callers wait for these scans instead
+            for repo_id in pending:
+                self.__scans[(repo_id, start, end)] = threading.Event()
+
+        def scan(repo):
+            by_year = defaultdict(lambda: [0, defaultdict(
+                lambda: (defaultdict(int), defaultdict(int)))])
+            with count_requests() as requests_sent:
+                if self.__author is None:
+                    commits = repo.get_commits(since=start, until=end)
+                else:
+                    commits = repo.get_commits(since=start, until=end, author=self.__author)
+                for c in commits:
+                    # By author date, like the days, hours and commit store entries
+                    date = c.commit.author.date
+                    year = by_year[date.year]
+                    year[0] += 1
+                    login = self.__author or (c.author.login if c.author else None)
+                    if login:
+                        self.store.add_commit(repo.full_name, c.sha, login, date,
+                                              repo.private)
+                        days, hours = year[1][login]
+                        days[date.date().isoformat()] += 1
+                        hours[str(hour_of_week(date))] += 1
+
+                if self.__author is not None:
+                    # Only the commits of the user were listed: count everyone's
+                    for year in range(start.year, (end - timedelta(microseconds=1)).year + 1):
+                        by_year[year][0] = count_commits(
+                            repo, max(start, datetime(year, 1, 1)),
+                            min(end, datetime(year + 1, 1, 1)))
+            with self.__lock:
+                claim = self.__scans[(repo.id, start, end)]
+                self.__scans[(repo.id, start, end)] = {
+                    year: (year_count, {login: (dict(days), dict(hours))
+                                        for login, (days, hours) in by_author.items()})
+                    for year, (year_count, by_author) in by_year.items()}
+                self.requests[(repo.id, start, end)] = requests_sent.count
+            claim.set()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+                futures = [executor.submit(scan, repo) for repo in pending.values()]
+                for done, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if on_progress is not None:
+                        on_progress(done, len(futures))
+        except Exception:
+            # Release the failed claims, so that the next caller scans them again
+            with self.__lock:
+                for repo_id in pending:
+                    claim = self.__scans[(repo_id, start, end)]
+                    if isinstance(claim, threading.Event):
+                        del self.__scans[(repo_id, start, end)]
+                        claim.set()
+            raise
+
+    def __scanned(self, repo, start: datetime, end: datetime):
+        """
+        Returns the commit count and the commits per day and per hour of the week by
+        author of a repository in [start, end), from the scan of the period containing it
+
+        Note:
+            - Method is private
+        """
+        key = (repo.id,) + self.period(start, end)
+        with self.__lock:
+            scanned = self.__scans.get(key)
+        if isinstance(scanned, threading.Event):
+            # Being scanned by another user
+            scanned.wait()
+            with self.__lock:
+                scanned = self.__scans.get(key)
+        if scanned is None:
+            raise Exception(f"Unable to scan the commits of {repo.full_name}")
+
+        count = 0
+        by_author = defaultdict(lambda: ({}, {}))
+        for year in range(start.year, (end - timedelta(microseconds=1)).year + 1):
+            year_count, year_authors = scanned.get(year, (0, {}))
+            count += year_count
+            for login, (days, hours) in year_authors.items():
+                author_days, author_hours = by_author[login]
+                for day, day_count in days.items():
+                    author_days[day] = author_days.get(day, 0) + day_count
+                for hour, hour_count in hours.items():
+                    author_hours[hour] = author_hours.get(hour, 0) + hour_count
+        return count, by_author
+
+    def get_repo_commits(self, user, start: datetime, end: datetime, stored_repos: dict):
+        """
+        Returns the commit data of every repository of the user in [start, end) (whole
+        years), scanning only the repositories no other user or year has scanned yet
+
+        Args:
+            user (UserData): User whose repositories are scanned
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            stored_repos (dict): Stored repository states (ignored: scans are shared)
+
+        Returns:
+            dict: Commit data of every repository
+        """
+        if user.commit_store is not self.store:
+            raise Exception("The users of a shared scan must share its commit store")
+
+        login = user.user.login
+        if self.__author is not None and login != self.__author:
+            raise Exception(f"The shared scan only lists the commits of {self.__author}")
+        repos = user.get_active_repos(start)
+        scan_start, scan_end = self.period(start, end)
+        self.scan(repos, scan_start, scan_end,
+                  lambda done, total: user.report_progress("commits", done, total))
+
+        repo_commit = {}
+        for repo in repos:
+            count, by_author = self.__scanned(repo, start, end)
+            commit_days, commit_hours = by_author.get(login, ({}, {}))
+
+            repo_commit[repo] = {
+                "total_count": count,
+                "total_count_author": sum(commit_days.values()),
+                "commits_pending": [],
+                "commit_days": commit_days,
+                "commit_hours": commit_hours,
+                "stored_languages": [],
+                "head_sha": None,
+                "head_date": None
+            }
+
+        return repo_commit
+
+    def get_request_counts(self, users: list):
+        """
+        Returns the requests sent to list and count the commits of the repositories, and
+        those that scanning the repositories of every user (or year) separately with a
+        RestSource would send: the pages of the commits of the user to every repository,
+        and a request counting everyone's
+
+        Args:
+            users (list): UserData of the users sharing this source
+
+        Returns:
+            tuple: Requests sent and requests of the separate scans
+        """
+        with self.__lock:
+            shared = sum(self.requests.values())
+
+        separate = 0
+        for user in users:
+            start = datetime(user.year, 1, 1)
+            end = datetime(user.year + 1, 1, 1)
+            for repo in user.get_active_repos(start):
+                _, by_author = self.__scanned(repo, start, end)
+                commit_days, _ = by_author.get(user.user.login, ({}, {}))
+                separate += max(1, math.ceil(sum(commit_days.values()) / self.__per_page)) + 1
+        return shared, separate
+
+
+class StoredSource:
+    """
+    Data source reading the commit data from the state store alone
+    """
+
+    incremental = True
+
+    def __init__(self, fallback=None):
+        """
+        Args:
+            fallback: Data source scanning the repositories with nothing scanned stored for
+            the user and year. Defaults to a RestSource
+        """
+        self.__fallback = fallback if fallback is not None else RestSource()
+
+    @property
+    def fallback(self):
+        """
+        Getter for fallback
+        """
+        return self.__fallback
+
+    def get_repo_commits(self, user, start: datetime, end: datetime, stored_repos: dict):
+        """
+        Returns the commit data of every repository of the user in [start, end) as stored,
+        making no request but the listing of the repositories. Repositories never scanned
+        (with no stored state, or only one without scanned_at) are scanned with the
+        fallback source, which must provide scan_repo_commits. If no repository has been
+        scanned at all, the fallback source scans every repository instead.
+
+        Args:
+            user (UserData): User whose repositories are read
+            start (datetime): Start of the period
+            end (datetime): End of the period
+            stored_repos (dict): Stored repository states, keyed by repository id
+
+        Returns:
+            dict: Commit data of every repository
+        """
+        if not any(stored.get("scanned_at") for stored in stored_repos.values()):
+            return self.__fallback.get_repo_commits(user, start, end, stored_repos)
+
+        login = user.user.login
+        repo_commit = {}
+        for repo in user.get_active_repos(start):
+            stored = stored_repos.get(str(repo.id))
+            if not stored or not stored.get("scanned_at"):
+                repo_commit[repo] = self.__fallback.scan_repo_commits(
+                    login, repo, start, end, None, user.commit_store)
+                continue
+            repo_commit[repo] = {
+                "total_count": stored["total_count"],
+                "total_count_author": stored["total_count_author"],
+                "commits_pending": [],
+                "commit_days": dict(stored["commit_days"]),
+                "commit_hours": dict(stored.get("commit_hours", {})),
+                "stored_languages": stored["languages"],
+                "head_sha": stored["head_sha"],
+                "head_date": stored["head_date"],
+                "scanned_at": stored["scanned_at"],
+                "ingested": list(stored.get("ingested", []))
+            }
+        return repo_commit
@@ -4,15 +4,38 @@ Module: user_data_handler
 This module provides a UserData class for handling GitHub user data and related functionalities.
 
 Classes:
-    UserData: A class for managing GitHub user data, repositories, commits, and more.
+    UserData: A class for managing GitHub user data, repositories, commits, and more. Commit
+    data comes from a pluggable data source (see api.sources), the REST API by default.
 
 Methods:
     - __init__: Initializes an instance of the UserData class.
     - get_created_repos: Returns a list of repositories created by the user in a certain year.
     - get_contributed_repos: Returns a list of repositories contributed to by the user in a
     certain year.
+    - get_active_repos: Returns the repositories pushed to since the start of the year.
     - get_languages_user: Returns language statistics for the user's contributions.
     - get_commit_data: Returns data related to the user's commit history.
+    - get_calendar: Returns the calendar analytics (streaks, monthly histogram, weekday x
+    hour heatmap, busiest day) of the user's commits.
+    - save_state: Stores the per-repository watermarks and aggregates for incremental runs.
+    - invalidate: Discards every memoized dataset, so that it's computed again when needed.
+    - report_progress: Reports the progress of a long computation to the progress callback.
+
+The repositories of the user are listed once into a RepoCatalog (see api.catalog), which
+answers every query about them without further requests.
+
+Every dataset (repository list, per-repository commit data, contributed repositories,
+languages, commit streaks) is computed on first access and memoized, so callers only
+trigger the requests the data they ask for needs. Each dataset has its own lock, so
+several threads can ask for different datasets at once and none is computed twice.
+
+The commits of the user are kept in a compact CommitStore (see utils.commit_store) rather
+than as PyGithub objects, and the language statistics are computed from it. The files of
+newly fetched commits are classified into languages by a LanguageAggregator (see
+utils.language_aggregation), with one accumulator per worker merged at the end.
+
+The computation of every dataset is timed as a stage of the installed profiler, if any
+(see utils.profiler).
 
 Example:
     # Creating an instance of UserData
@@ -40,10 +63,21 @@ Example:
 """
 
 from github import Github
-from utils.github_helpers import get_language
-from datetime import datetime, timedelta
+from utils.state_store import StateStore, empty_repo_state
+from utils.commit_store import CommitStore
+from api.catalog import RepoCatalog
+from utils.language_aggregation import LanguageAggregator
+from api.calendar_stats import CalendarStats
+from api.sources import RestSource
+from api.commit_details import AsyncCommitFetcher
+from utils.profiler import stage
+from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
+import threading
+
+# Fetched commits classified at once, so that their filenames aren't all kept in memory
+LANGUAGE_BATCH_SIZE = 4096
 
 
 class UserData:
@@ -57,26 +91,57 @@ class UserData:
             username: str,
             year: int,
             show_private: bool,
-            show_repo_info: bool):
+            show_repo_info: bool,
+            state_store: StateStore = None,
+            source=None,
+            commit_fetcher: AsyncCommitFetcher = None,
+            commit_store: CommitStore = None,
+            utc_offset: int = 0,
+            language_aggregator: LanguageAggregator = None):
 
         self.__github_instance = github_instance
         self.__username = username
         self.__year = year
         self.__show_private = show_private
+        # Lazy: no request is made until an attribute of the user is needed
         self.__user = github_instance.get_user()
 
-        if show_private:
-            self.__user_repos = self.user.get_repos(visibility='all')
-        else:
-            self.__user_repos = self.user.get_repos(visibility='public')
-
         self.__show_repo_info = show_repo_info
-
-        self.__commit_years = 0
-        self.__total_count = 0
-        self.__public_count = 0
-        self.__repo_commit = {}
-        self.__get_commit_years_basic_data()
+        self.__state_store = state_store
+        self.__source = source if source is not None else RestSource()
+        self.__commit_fetcher = commit_fetcher
+        self.__language_aggregator = language_aggregator or LanguageAggregator()
+        self.__progress = None
+        self.__utc_offset = utc_offset
+        # A store of our own is emptied along with the datasets; a shared one is not
+        self.__shared_store = commit_store
+
+        self.__locks = {name: threading.RLock() for name in (
+            "user_repos", "repo_commit", "created_repos", "contributed_repos",
+            "languages_repos", "commit_days", "commit_data")}
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Discards every memoized dataset, so that it's computed again on its next access.
+        Changing the year, the privacy toggle, the state store or the data source
+        invalidates them too.
+        """
+        self.__user_repos = None
+        self.__owned_repos = None
+        self.__commit_years = None
+        self.__total_count = None
+        self.__public_count = None
+        self.__repo_commit = None
+        self.__created_repos = None
+        self.__contributed_repos = None
+        self.__languages_repos = None
+        self.__commit_days = None
+        self.__calendar = None
+        if self.__shared_store is not None:
+            self.__commit_store = self.__shared_store
+        else:
+            self.__commit_store = CommitStore()
 
     @property
     def github_instance(self):
@@ -133,6 +198,7 @@ class UserData:
         Setter for year
         """
         self.__year = value
+        self.invalidate()
 
     @property
     def show_private(self):
@@ -147,6 +213,115 @@ class UserData:
         Setter for show_private
         """
         self.__show_private = value
+        self.invalidate()
+
+    @property
+    def state_store(self):
+        """
+        Getter for state_store
+        """
+        return self.__state_store
+
+    @state_store.setter
+    def state_store(self, value):
+        """
+        Setter for state_store
+        """
+        self.__state_store = value
+        self.invalidate()
+
+    @property
+    def source(self):
+        """
+        Getter for source
+        """
+        return self.__source
+
+    @source.setter
+    def source(self, value):
+        """
+        Setter for source
+        """
+        self.__source = value
+        self.invalidate()
+
+    @property
+    def commit_fetcher(self):
+        """
+        Getter for commit_fetcher
+        """
+        return self.__commit_fetcher
+
+    @commit_fetcher.setter
+    def commit_fetcher(self, value):
+        """
+        Setter for commit_fetcher
+        """
+        self.__commit_fetcher = value
+
+    @property
+    def language_aggregator(self):
+        """
+        Getter for language_aggregator
+        """
+        return self.__language_aggregator
+
+    @language_aggregator.setter
+    def language_aggregator(self, value):
+        """
+        Setter for language_aggregator
+        """
+        self.__language_aggregator = value
+
+    @property
+    def utc_offset(self):
+        """
+        Getter for utc_offset, the hours the calendar of the user is shifted by
+        """
+        return self.__utc_offset
+
+    @utc_offset.setter
+    def utc_offset(self, value):
+        """
+        Setter for utc_offset
+        """
+        self.__utc_offset = value
+        self.__calendar = None
+        self.__calendar = None
+
+    @property
+    def commit_store(self):
+        """
+        Getter for commit_store
+        """
+        return self.__commit_store
+
+    @property
+    def progress(self):
+        """
+        Getter for progress, a callable taking a section name, the work done and the
+        total work, called while long datasets are being computed
+        """
+        return self.__progress
+
+    @progress.setter
+    def progress(self, value):
+        """
+        Setter for progress
+        """
+        self.__progress = value
+
+    def report_progress(self, section: str, done: int, total: int):
+        """
+        Reports the progress of a long computation to the progress callback, if any
+
+        Args:
+            section (str): Name of the computation
+            done (int): Work done
+            total (int): Total work
+        """
+        if self.__progress is not None:
+            self.__progress(section, done, total)
 
     @property
     def user(self):
@@ -167,7 +342,10 @@ class UserData:
         """
         Getter for commit_years
         """
-        return self.__commit_years
+        with self.__locks["repo_commit"]:
+            if self.__commit_years is None:
+                self.__get_commit_years_basic_data()
+            return self.__commit_years
 
     @commit_years.setter
     def commit_years(self, value):
@@ -181,7 +359,10 @@ class UserData:
         """
         Getter for total_count
         """
-        return self.__total_count
+        with self.__locks["repo_commit"]:
+            if self.__total_count is None:
+                self.__get_commit_years_basic_data()
+            return self.__total_count
 
     @total_count.setter
     def total_count(self, value):
@@ -195,7 +376,10 @@ class UserData:
         """
         Getter for public_count
         """
-        return self.__public_count
+        with self.__locks["repo_commit"]:
+            if self.__public_count is None:
+                self.__get_commit_years_basic_data()
+            return self.__public_count
 
     @public_count.setter
     def public_count(self, value):
@@ -204,12 +388,30 @@ class UserData:
         """
         self.__public_count = value
 
+    @property
+    def restricted_count(self):
+        """
+        Getter for restricted_count, the contributions of the user during the year to
+        private repositories the token can't see, if the data source knows them (0
+        otherwise)
+        """
+        get_restricted_count = getattr(self.source, "get_restricted_count", None)
+        if get_restricted_count is None:
+            return 0
+        # Known once the commit data has been read
+        self.repo_commit
+        return get_restricted_count(self.user.login, datetime(self.year, 1, 1, 0, 0, 0),
+                                    datetime(self.year + 1, 1, 1, 0, 0, 0))
+
     @property
     def repo_commit(self):
         """
         Getter for repo_commit
         """
-        return self.__repo_commit
+        with self.__locks["repo_commit"]:
+            if self.__repo_commit is None:
+                self.__get_commit_years_basic_data()
+            return self.__repo_commit
 
     @repo_commit.setter
     def repo_commit(self, value):
@@ -221,21 +423,68 @@ class UserData:
     @property
     def user_repos(self):
         """
-        Getter for user_repos
+        Getter for user_repos, the catalog of the repositories of the user, listed on
+        first access
         """
-        return self.__user_repos
+        with self.__locks["user_repos"]:
+            if self.__user_repos is None:
+                with stage("catalog"):
+                    if self.show_private:
+                        self.__user_repos = RepoCatalog(self.user.get_repos(visibility='all'))
+                    else:
+                        self.__user_repos = RepoCatalog(
+                            self.user.get_repos(visibility='public'))
+            return self.__user_repos
 
     @user_repos.setter
     def user_repos(self, value):
         """
-        Setter for user_repos
+        Setter for user_repos. Any iterable of repositories is turned into a catalog
         """
+        if value is not None and not isinstance(value, RepoCatalog):
+            value = RepoCatalog(value)
         self.__user_repos = value
 
+    @property
+    def owned_repos(self):
+        """
+        Getter for owned_repos, the catalog the repositories created by the user are looked
+        up in: user_repos, unless other repositories were set
+        """
+        if self.__owned_repos is not None:
+            return self.__owned_repos
+        return self.user_repos
+
+    @owned_repos.setter
+    def owned_repos(self, value):
+        """
+        Setter for owned_repos, for users whose repositories (such as those of an
+        organization) aren't the ones they created. Any iterable of repositories is
+        turned into a catalog
+        """
+        if value is not None and not isinstance(value, RepoCatalog):
+            value = RepoCatalog(value)
+        self.__owned_repos = value
+
+    def get_active_repos(self, start: datetime = None):
+        """
+        Returns the repositories of the user pushed to since the start of the year (or
+        start), the only ones that can have commits made since then
+
+        Args:
+            start (datetime): Start of the period. Defaults to the start of the year
+
+        Returns:
+            list: Repositories, in the order they were listed
+        """
+        return self.user_repos.query(pushed_since=start or datetime(self.year, 1, 1))
+
     def __get_commit_years_basic_data(self):
         """
         Gets basic data related to commits, such as the total count (and public total count)
-        of commits of the year; and several data related to each repository
+        of commits of the year; and several data related to each repository, from the
+        data source of the user. Incremental sources only fetch the commits made after
+        the watermarks in the state store.
 
         Note:
             - Method is private
@@ -243,37 +492,57 @@ class UserData:
         start = datetime(self.year, 1, 1, 0, 0, 0)
         end = datetime(self.year + 1, 1, 1, 0, 0, 0)
 
+        stored_repos = {}
+        if self.state_store and self.source.incremental:
+            stored_repos = self.state_store.get_repos(self.user.login, self.year)
+
         commits_year = []
         total_count = 0
         public_count = 0
 
-        for repo in self.user_repos:
-            commits_repo = repo.get_commits(since=start, until=end)
-            count = 0
-            author_count = 0
-            commits_repo_author = []
-            for c in commits_repo:
-                count += 1
-                if c.author and c.author.login == self.user.login:
-                    commits_repo_author.append(c)
-                    author_count += 1
-
-            self.repo_commit[repo] = {
-                "total_count": count,
-                "commits_repo_total": commits_repo,
-                "total_count_author": author_count,
-                "commits_repo_author": commits_repo_author
-            }
-
-            total_count += author_count
+        with stage("commit_scan"):
+            self.repo_commit = self.source.get_repo_commits(self, start, end, stored_repos)
+
+        for repo, data in self.repo_commit.items():
+            total_count += data["total_count_author"]
 
             if not repo.private:
-                public_count += author_count
+                public_count += data["total_count_author"]
 
         self.commit_years = commits_year
         self.total_count = total_count
         self.public_count = public_count
 
+    def save_state(self):
+        """
+        Stores the watermark and aggregates of every repository in the state store, so
+        that the next run only fetches newer commits. Does nothing without a state store
+        or with a data source that doesn't support incremental runs.
+        """
+        if not self.state_store or not self.source.incremental:
+            return
+
+        languages_repos = self.__get_languages_repos()
+        repos = {}
+        for repo, data in self.repo_commit.items():
+            state = empty_repo_state(repo.full_name, repo.private)
+            state.update({
+                "head_sha": data["head_sha"],
+                "head_date": data["head_date"],
+                "total_count": data["total_count"],
+                "total_count_author": data["total_count_author"],
+                "commit_days": data["commit_days"],
+                "commit_hours": data["commit_hours"],
+                "languages": sorted(languages_repos.get(repo, {}).items(),
+                                    key=lambda x: (x[0] is None, x[0] or "")),
+                "scanned_at": data.get("scanned_at"),
+                "ingested": data.get("ingested", [])
+            })
+            repos[str(repo.id)] = state
+
+        self.state_store.set_repos(self.user.login, self.year, repos)
+        self.state_store.save()
+
     def get_created_repos(self):
         """
         Returns a list of the repos created by a user in a certain year. You can toggle
@@ -282,10 +551,12 @@ class UserData:
         Returns:
             list: repos created by a user in a certain year
         """
-        repos = [r for r in self.user_repos if r.fork is False and r.created_at.year ==
-                 self.year and r.owner == self.github_instance.get_user(self.username)]
+        with self.__locks["created_repos"]:
+            if self.__created_repos is None:
+                self.__created_repos = self.owned_repos.query(
+                    owner=self.username, fork=False, created_year=self.year)
 
-        return repos
+            return self.__created_repos
 
     def get_contributed_repos(self):
         """
@@ -295,96 +566,220 @@ class UserData:
         Returns:
             list: Repos contributed to by a user in a certain year
         """
-        repositories_return = []
+        with self.__locks["contributed_repos"]:
+            if self.__contributed_repos is None:
+                self.__contributed_repos = [
+                    repo for repo, data in self.repo_commit.items()
+                    if data["total_count_author"] > 0]
+
+            return self.__contributed_repos
+
+    def __get_languages_repos(self):
+        """
+        Returns the changes per language of every contributed repository, adding the
+        languages of the commits fetched in this run to the stored ones. The details of
+        the commits are fetched with the commit fetcher if there is one, or with a
+        thread pool otherwise
 
-        for repo in self.user_repos:
-            # Count commits
-            if self.repo_commit[repo]["total_count_author"] > 0:
-                repositories_return.append(repo)
+        Returns:
+            dict: For every repository, a dictionary of changes per language
+
+        Note:
+            - Method is private
+        """
+        with self.__locks["languages_repos"]:
+            if self.__languages_repos is None:
+                with stage("languages"):
+                    self.__languages_repos = self.__compute_languages_repos()
+            return self.__languages_repos
+
+    def __compute_languages_repos(self):
+        """
+        Computes the changes per language of every contributed repository, from the
+        commit store. The details of the commits whose files aren't stored yet are
+        fetched and, in batches, classified and reduced by the language aggregator;
+        only their changes per language are kept.
+
+        Note:
+            - Method is private
+        """
+        store = self.commit_store
+        start = datetime(self.year, 1, 1, 0, 0, 0)
+        end = datetime(self.year + 1, 1, 1, 0, 0, 0)
 
-        return repositories_return
+        indexes_repos = {}
+        missing = []
+        for repo in self.get_contributed_repos():
+            data = self.repo_commit[repo]
+            # Lazy sources leave the commits to be listed when they are needed
+            for c in data["commits_pending"]:
+                store.add_commit(repo.full_name, c.sha, self.user.login,
+                                 c.commit.author.date, repo.private)
+            data["commits_pending"] = []
+
+            indexes = store.commits(repo.full_name, self.user.login, start, end)
+            indexes_repos[repo] = [i for i in indexes if store.has_files(i)]
+            missing.extend((repo, i) for i in indexes if not store.has_files(i))
+
+        # Changes per language of the fetched commits, per repository
+        fetched_languages = defaultdict(lambda: defaultdict(int))
+        pending = []
+
+        def reduce_pending():
+            with stage("languages.lookup"):
+                classified, totals = self.language_aggregator.aggregate(pending)
+            for index, languages in classified:
+                store.add_files(index, languages)
+            for full_name, languages in totals.items():
+                for language, changes in languages.items():
+                    fetched_languages[full_name][language] += changes
+            pending.clear()
+
+        def add_pending(full_name, index, files):
+            pending.append((full_name, index, files))
+            if len(pending) >= LANGUAGE_BATCH_SIZE:
+                reduce_pending()
+
+        if self.commit_fetcher is not None:
+            commits = {(repo.full_name, store.sha(i)): i for repo, i in missing}
+            processed = 0
+
+            def process_files(full_name, sha, files):
+                nonlocal processed
+                add_pending(full_name, commits[(full_name, sha)], files)
+                processed += 1
+                self.report_progress("languages", processed, len(commits))
+
+            self.commit_fetcher.fetch(list(commits), process_files)
+        else:
+            def fetch_files(repo, index):
+                with stage("languages.details"):
+                    commit = repo.get_commit(store.sha(index))
+                    return [(file.filename, file.changes) for file in commit.files]
+
+            with ThreadPoolExecutor() as executor:
+                futures = [executor.submit(fetch_files, repo, i) for repo, i in missing]
+
+                # Reduced in submission order, whichever finishes first
+                for i, ((repo, index), future) in enumerate(zip(missing, futures), 1):
+                    add_pending(repo.full_name, index, future.result())
+                    self.report_progress("languages", i, len(futures))
+        reduce_pending()
+
+        languages_repos = {}
+        for repo, indexes in indexes_repos.items():
+            repo_languages = defaultdict(int)
+            for language, changes in self.repo_commit[repo]["stored_languages"]:
+                repo_languages[language] += changes
+            for language, changes in store.languages(indexes).items():
+                repo_languages[language] += changes
+            for language, changes in fetched_languages[repo.full_name].items():
+                repo_languages[language] += changes
+            languages_repos[repo] = repo_languages
+
+        return languages_repos
 
     def get_languages_user(self):
+        """
+        Returns the changes made by the user in each language, sorted from the most
+        to the least used
+
+        Returns:
+            dict: Changes per language
+        """
         language_stats = defaultdict(int)
 
-        def process_commit(commit):
-            for file in commit.files:
-                extension = '.' + file.filename.split('.')[-1]
-                language = get_language(extension, "languages_extensions.db")
-                language_stats[language] += file.changes
-
-        with ThreadPoolExecutor() as executor:
-            futures = []
-            for repo in self.get_contributed_repos():
-                for commit in self.repo_commit[repo]["commits_repo_author"]:
-                    if (repo.visibility ==
-                            "private" and self.show_private) or repo.visibility == "public":
-                        futures.append(
-                            executor.submit(
-                                process_commit,
-                                commit,
-                                repo.visibility))
-
-            # Wait for all futures to complete
-            for future in futures:
-                future.result()
+        for repo, repo_languages in self.__get_languages_repos().items():
+            if (repo.visibility ==
+                    "private" and self.show_private) or repo.visibility == "public":
+                for language, changes in repo_languages.items():
+                    language_stats[language] += changes
 
+        # Ties are broken by name, so that the order doesn't depend on the fetch order
         return dict(sorted(language_stats.items(),
-                    key=lambda x: x[1], reverse=True))
+                    key=lambda x: (-x[1], x[0] is None, x[0] or "")))
 
-    def get_commit_data(self):
+    def __get_commit_days(self):
         """
-        Returns some commit dates data related to the longest commit streak duration, start and
-        ending dates; and the total days with commits of the year
+        Returns the commits made by the user per day and per hour of the week in each
+        repository. If the commit data of the repositories hasn't been needed yet and the
+        data source can provide the days on their own, only the requests needed for them
+        are made (the hours are unknown then).
 
         Returns:
-            dict: Dictionary with commit data
+            tuple: For every contributed repository, a dictionary of commits per day; and
+            another of commits per hour of the week
+
+        Note:
+            - Method is private
         """
+        with self.__locks["commit_days"]:
+            if self.__commit_days is None:
+                get_commit_days = getattr(self.source, "get_commit_days", None)
+                if self.__repo_commit is None and get_commit_days is not None:
+                    start = datetime(self.year, 1, 1, 0, 0, 0)
+                    end = datetime(self.year + 1, 1, 1, 0, 0, 0)
+                    self.__commit_days = (
+                        list(get_commit_days(self, start, end).values()), [])
+                else:
+                    repos = self.get_contributed_repos()
+                    self.__commit_days = (
+                        [self.repo_commit[repo]["commit_days"] for repo in repos],
+                        [self.repo_commit[repo]["commit_hours"] for repo in repos])
+
+            return self.__commit_days
 
-        commit_dates = set()
+    def __commit_timestamps(self, commit_days: list):
+        """
+        Returns the timestamps of the commits of the user made during the year, from the
+        commit store, or None if it doesn't hold every commit counted in commit_days (such
+        as those counted by previous runs, or by sources that only give days)
 
+        Note:
+            - Method is private
+        """
+        start = datetime(self.year, 1, 1, 0, 0, 0)
+        end = datetime(self.year + 1, 1, 1, 0, 0, 0)
+        indexes = []
         for repo in self.get_contributed_repos():
-            commits = self.repo_commit[repo]["commits_repo_author"]
-            for c in commits:
-                commit_dates.add(c.commit.author.date.date())
-
-        commit_dates = sorted(commit_dates)
-
-        streak_start_date = None
-        streak_end_date = None
-        streak_duration = 0
-        current_start = None
-        current_end = None
-        current_streak_duration = 0
-
-        for i in range(1, len(commit_dates)):
-            if commit_dates[i] - commit_dates[i - 1] == timedelta(days=1):
-                current_streak_duration += 1
-                current_end = commit_dates[i]
-            else:
-                if current_streak_duration > streak_duration:
-                    streak_duration = current_streak_duration
-                    streak_start_date = current_start
-                    streak_end_date = current_end
-
-                current_start = commit_dates[i]
-                current_end = commit_dates[i]
-                current_streak_duration = 1
-
-        if current_streak_duration > streak_duration:
-            streak_start_date = current_start
-            streak_end_date = current_end
-            streak_duration = current_streak_duration
-
-        if streak_start_date:
-            streak_start_date += timedelta(days=1)
-            streak_duration -= 1
-
-        commit_data = {
-            "days_with_commits_count": len(commit_dates),
-            "streak_start_date": streak_start_date,
-            "streak_end_date": streak_end_date,
-            "streak_duration": streak_duration
-        }
-
-        return commit_data
+            indexes += self.commit_store.commits(repo.full_name, self.user.login, start, end)
+        if len(indexes) != sum(sum(days.values()) for days in commit_days):
+            return None
+        return self.commit_store.timestamps(indexes)
+
+    def get_calendar(self):
+        """
+        Returns the calendar analytics of the commits of the year (streaks, monthly
+        histogram, weekday x hour heatmap, busiest day), in the UTC offset of the user.
+        Shifting the days needs the time of every commit: if the commit store doesn't hold
+        them all, the calendar stays in UTC
+
+        Returns:
+            CalendarStats: Commits per day and per hour of the week
+        """
+        with self.__locks["commit_data"]:
+            if self.__calendar is None:
+                commit_days, commit_hours = self.__get_commit_days()
+                timestamps = self.__commit_timestamps(commit_days) if self.utc_offset \
+                    else None
+                with stage("calendar"):
+                    if timestamps is not None:
+                        self.__calendar = CalendarStats.from_timestamps(
+                            self.year, timestamps, self.utc_offset)
+                    else:
+                        if self.utc_offset:
+                            print("The calendar is shown in UTC: the times of some commits "
+                                  "(such as those of previous runs) aren't known")
+                        self.__calendar = CalendarStats(self.year, commit_days, commit_hours)
+            return self.__calendar
+
+    def get_commit_data(self):
+        """
+        Returns some commit dates data related to the longest and current commit streaks
+        (duration, start and ending dates), the total days with commits of the year, the
+        busiest day, the commits per month and the commits per weekday and hour
+
+        Returns:
+            dict: Dictionary with commit data
+        """
+        return self.get_calendar().commit_data()
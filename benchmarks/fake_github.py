@@ -0,0 +1,663 @@
+"""
+Module: fake_github
+
+This module provides a local stand-in for the GitHub REST API, serving a synthetic user
+whose size is configurable, so that the project can be benchmarked without a token and
+without touching live GitHub.
+
+Everything is generated on the fly and deterministically from the scenario: the same
+scenario always serves the same repositories, commits, files, stargazers, forks, issues and
+releases, the search of issues counts them and comparisons list the commits between two
+of them. Commits are spread over the year of the scenario; stargazers, forks, issues and
+releases over that year and the one before, so that the year-bounded pagination has
+something to skip. Every request is counted per endpoint, and the counts can be read
+(without being counted) from GET /_bench/counts.
+
+POST /graphql answers the GraphQL queries of the project (see api.sources.GraphQLSource)
+from the same commits: the contributionsCollection of a user, per repository and day, and
+the history count of the default branch of repositories. The limits of the GitHub API that
+shape those queries are enforced: at most a year per collection, and at most 100
+repositories and 100 contributions per connection (lists longer than asked for are cut).
+
+Classes:
+    Scenario: Size of the synthetic user.
+    FakeGithub: Threaded HTTP server serving a scenario.
+
+Example:
+    server = FakeGithub(Scenario(repos=10, commits_per_repo=500))
+    server.start()
+    github = connect("any token", base_url=server.base_url)
+    ...
+    print(server.request_counts)
+    server.stop()
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+EXTENSIONS = (".py", ".js", ".md", ".rs", ".go", ".java", ".c", ".html")
+MAX_PER_PAGE = 100
+
+
+@dataclass
+class Scenario:
+    """
+    Size of the synthetic user
+    """
+    login: str = "bench"
+    year: int = 2023
+    repos: int = 5
+    commits_per_repo: int = 100
+    files_per_commit: int = 3
+    # One commit in every author_every is made by the user
+    author_every: int = 2
+    contributors: int = 5
+    stargazers: int = 20
+    forks: int = 10
+    issues: int = 10
+    releases: int = 3
+    # Contributions of the user to private repositories the token can't see, on January 1
+    restricted_contributions: int = 0
+
+    def as_dict(self):
+        """
+        Returns the scenario as a dictionary
+        """
+        return asdict(self)
+
+
+def _iso(date: datetime):
+    """
+    Returns a date in the format of the API
+    """
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _graphql_error(message: str):
+    """
+    Returns the body of a GraphQL response with an error
+    """
+    return {"data": None, "errors": [{"message": message}]}
+
+
+def _parse_date(value: str):
+    """
+    Parses a date of a query string
+    """
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=timezone.utc)
+
+
+class FakeGithub:
+    """
+    Threaded HTTP server serving the repositories of a scenario as the GitHub REST API
+    """
+
+    GRAPHQL_PATH = "/graphql"
+    # Limits of the GraphQL API
+    MAX_GRAPHQL_NODES = 100
+    MAX_COLLECTION_SPAN = timedelta(days=366)
+
+    ROUTES = (
+        (r"/user", "user"),
+        (r"/users/(?P<login>[^/]+)", "named_user"),
+        (r"/user/repos", "repos"),
+        (r"/users/(?P<login>[^/]+)/repos", "repos"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)", "repo"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/commits", "commits"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/commits/(?P<sha>[0-9a-f]{40})", "commit"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/compare/(?P<base>[0-9a-f]{40})\.\.\."
+         r"(?P<head>[0-9a-f]{40})", "compare"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/license", "license"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/contributors", "contributors"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/languages", "languages"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/forks", "forks"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/issues", "issues"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/stargazers", "stargazers"),
+        (r"/repos/(?P<owner>[^/]+)/repo(?P<repo>\d+)/releases", "releases"),
+        (r"/search/issues", "search_issues"),
+    )
+
+    def __init__(self, scenario: Scenario, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            scenario (Scenario): Synthetic user to serve
+            host (str): Host to listen on
+            port (int): Port to listen on, or 0 for any free one
+        """
+        self.__scenario = scenario
+        self.__lock = threading.Lock()
+        self.__counts = Counter()
+        self.__routes = [(re.compile(pattern + "$"), name) for pattern, name in self.ROUTES]
+        self.__year_start = datetime(scenario.year, 1, 1, tzinfo=timezone.utc)
+        self.__year_end = datetime(scenario.year + 1, 1, 1, tzinfo=timezone.utc)
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def scenario(self):
+        """
+        Getter for scenario
+        """
+        return self.__scenario
+
+    @property
+    def base_url(self):
+        """
+        Getter for base_url, the URL the API is served at
+        """
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_counts(self):
+        """
+        Getter for request_counts, the requests received per endpoint
+        """
+        with self.__lock:
+            return Counter(self.__counts)
+
+    def reset_counts(self):
+        """
+        Forgets the requests received so far
+        """
+        with self.__lock:
+            self.__counts.clear()
+
+    def start(self):
+        """
+        Starts serving in a background thread
+        """
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops serving
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __handler(self):
+        """
+        Returns the request handler class bound to this server
+
+        Note:
+            - Method is private
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written apart: don't let them wait for delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == "/_bench/counts":
+                    status, body, headers = 200, dict(fake.request_counts), {}
+                else:
+                    status, body, headers = fake.dispatch(url.path, query, self.headers)
+
+                self.respond(status, body, headers)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                status, body = fake.dispatch_post(url.path, request)
+                self.respond(status, body, {})
+
+            def respond(self, status, body, headers):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("X-RateLimit-Limit", "1000000")
+                self.send_header("X-RateLimit-Remaining", "1000000")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def dispatch(self, path: str, query: dict, headers):
+        """
+        Answers a GET request, counting it under its endpoint
+
+        Args:
+            path (str): Path of the request
+            query (dict): Query parameters
+            headers: Request headers
+
+        Returns:
+            tuple: Status, JSON body and extra response headers
+        """
+        for pattern, name in self.__routes:
+            match = pattern.match(path)
+            if match:
+                with self.__lock:
+                    self.__counts[name] += 1
+                params = match.groupdict()
+                if "repo" in params:
+                    params["repo"] = int(params["repo"])
+                    if params["repo"] >= self.__scenario.repos:
+                        break
+                return getattr(self, f"_get_{name}")(path, query, headers, **params)
+
+        with self.__lock:
+            self.__counts["not_found"] += 1
+        return 404, {"message": "Not Found"}, {}
+
+    def dispatch_post(self, path: str, request: dict):
+        """
+        Answers a POST request: only GraphQL queries are served
+
+        Args:
+            path (str): Path of the request
+            request (dict): JSON body of the request
+
+        Returns:
+            tuple: Status and JSON body
+        """
+        if path == self.GRAPHQL_PATH:
+            return self.graphql(request.get("query", ""), request.get("variables") or {})
+        with self.__lock:
+            self.__counts["not_found"] += 1
+        return 404, {"message": "Not Found"}
+
+    def graphql(self, query: str, variables: dict):
+        """
+        Answers a GraphQL query, counting it. Only the queries of the project are
+        understood: aliases of the contributionsCollection of a user, and aliases of
+        repositories with the history count of their default branch
+
+        Args:
+            query (str): GraphQL query
+            variables (dict): Variables of the query
+
+        Returns:
+            tuple: Status and JSON body
+        """
+        with self.__lock:
+            self.__counts["graphql"] += 1
+
+        limits = [int(n) for n in re.findall(r"(?:maxRepositories|first): (\d+)", query)]
+        if any(n > self.MAX_GRAPHQL_NODES for n in limits):
+            return 200, _graphql_error(
+                f"Requesting more than {self.MAX_GRAPHQL_NODES} records on a connection "
+                "is not allowed")
+
+        collections = re.findall(
+            r'(\w+): contributionsCollection\(from: "([^"]+)", to: "([^"]+)"\)', query)
+        if collections:
+            max_repos = re.search(r"maxRepositories: (\d+)", query)
+            first = re.search(r"contributions\(first: (\d+)\)", query)
+            user = {}
+            for alias, start, end in collections:
+                start, end = _parse_date(start), _parse_date(end)
+                if end - start > self.MAX_COLLECTION_SPAN:
+                    return 200, _graphql_error(
+                        "The total time spanned by 'from' and 'to' must not exceed 1 year")
+                user[alias] = self.__contributions(
+                    variables.get("login", ""), start, end,
+                    int(max_repos[1]) if max_repos else 25, int(first[1]) if first else 0)
+            return 200, {"data": {"user": user}}
+
+        repositories = re.findall(
+            r'(\w+): repository\(owner: "([^"]+)", name: "([^"]+)"\)', query)
+        if repositories:
+            since = _parse_date(variables["since"])
+            until = _parse_date(variables["until"])
+            data = {}
+            for alias, owner, name in repositories:
+                match = re.fullmatch(r"repo(\d+)", name)
+                if owner != self.__scenario.login or match is None \
+                        or int(match[1]) >= self.__scenario.repos:
+                    data[alias] = None
+                    continue
+                count = sum(1 for i in range(self.__scenario.commits_per_repo)
+                            if since <= self.__commit_date(i) <= until)
+                data[alias] = {"defaultBranchRef": {"target": {"history": {
+                    "totalCount": count}}}}
+            return 200, {"data": data}
+
+        return 200, _graphql_error("Unsupported query")
+
+    def __contributions(self, login: str, start: datetime, end: datetime, max_repos: int,
+                        first: int):
+        """
+        Returns the contributionsCollection of a user in [start, end]: the repositories with
+        the most commits first, and the commits of each of them per day
+
+        Note:
+            - Method is private
+        """
+        by_repo = []
+        for repo in range(self.__scenario.repos):
+            days = Counter(
+                self.__commit_date(i).date().isoformat()
+                for i in range(self.__scenario.commits_per_repo)
+                if self.__commit_author(i) == login and start <= self.__commit_date(i) <= end)
+            if days:
+                by_repo.append((repo, days))
+        by_repo.sort(key=lambda x: -sum(x[1].values()))
+        new_year = datetime(self.__scenario.year, 1, 1, tzinfo=start.tzinfo)
+
+        return {
+            "restrictedContributionsCount":
+                self.__scenario.restricted_contributions if start <= new_year <= end else 0,
+            "commitContributionsByRepository": [{
+                "repository": {"nameWithOwner": f"{self.__scenario.login}/repo{repo}",
+                               "isPrivate": self.__repo(repo)["private"]},
+                "contributions": {"nodes": [
+                    {"commitCount": count, "occurredAt": f"{day}T00:00:00Z"}
+                    for day, count in sorted(days.items())[:first]]}
+            } for repo, days in by_repo[:max_repos]]
+        }
+
+    # Objects
+
+    def __user(self, login: str):
+        """
+        Returns a user
+
+        Note:
+            - Method is private
+        """
+        return {"login": login, "id": int(hashlib.sha1(login.encode()).hexdigest()[:8], 16),
+                "type": "User", "url": f"{self.base_url}/users/{login}"}
+
+    def __repo(self, repo: int):
+        """
+        Returns the repo-th repository of the user
+
+        Note:
+            - Method is private
+        """
+        full_name = f"{self.__scenario.login}/repo{repo}"
+        private = repo % 5 == 4
+        return {
+            "id": repo + 1,
+            "name": f"repo{repo}",
+            "full_name": full_name,
+            "owner": self.__user(self.__scenario.login),
+            "private": private,
+            "visibility": "private" if private else "public",
+            "fork": False,
+            "created_at": _iso(self.__year_start - timedelta(days=30 * (repo % 24))),
+            "pushed_at": _iso(self.__commit_date(self.__scenario.commits_per_repo - 1)),
+            "language": "Python",
+            "default_branch": "main",
+            "url": f"{self.base_url}/repos/{full_name}",
+            "clone_url": f"{self.base_url}/{full_name}.git"
+        }
+
+    def __commit_date(self, index: int):
+        """
+        Returns the date of the index-th commit of a repository, oldest first
+
+        Note:
+            - Method is private
+        """
+        span = (self.__year_end - self.__year_start).total_seconds()
+        return self.__year_start + timedelta(
+            seconds=int((index + 0.5) * span / self.__scenario.commits_per_repo))
+
+    def __commit_author(self, index: int):
+        """
+        Returns the login of the author of the index-th commit of a repository
+
+        Note:
+            - Method is private
+        """
+        if index % self.__scenario.author_every == 0:
+            return self.__scenario.login
+        return f"contributor{index % self.__scenario.contributors}"
+
+    @staticmethod
+    def __sha(repo: int, index: int):
+        """
+        Returns the SHA of a commit, which encodes its repository and index
+
+        Note:
+            - Method is private
+        """
+        digest = hashlib.sha1(f"{repo}:{index}".encode()).hexdigest()
+        return f"{repo:08x}{index:08x}{digest[:24]}"
+
+    def __commit(self, repo: int, index: int, files: bool = False):
+        """
+        Returns a commit, with its files if asked for
+
+        Note:
+            - Method is private
+        """
+        sha = self.__sha(repo, index)
+        date = _iso(self.__commit_date(index))
+        author = self.__commit_author(index)
+        full_name = f"{self.__scenario.login}/repo{repo}"
+        commit = {
+            "sha": sha,
+            "url": f"{self.base_url}/repos/{full_name}/commits/{sha}",
+            "commit": {
+                "author": {"name": author, "email": f"{author}@example.com", "date": date},
+                "committer": {"name": author, "email": f"{author}@example.com", "date": date},
+                "message": f"Commit {index}"
+            },
+            "author": self.__user(author),
+            "committer": self.__user(author),
+            "parents": []
+        }
+        if files:
+            commit["files"] = []
+            for f in range(self.__scenario.files_per_commit):
+                additions = (index * 7 + f * 3) % 40 + 1
+                deletions = (index + f) % 10
+                commit["files"].append({
+                    "filename": f"src/file{f}{EXTENSIONS[(index + f) % len(EXTENSIONS)]}",
+                    "status": "modified",
+                    "additions": additions,
+                    "deletions": deletions,
+                    "changes": additions + deletions
+                })
+        return commit
+
+    def __spread(self, index: int, count: int):
+        """
+        Returns the date of the index-th of count items spread over the year and the one
+        before, oldest first
+
+        Note:
+            - Method is private
+        """
+        start = self.__year_start.replace(year=self.__scenario.year - 1)
+        span = (self.__year_end - start).total_seconds()
+        return start + timedelta(seconds=int((index + 0.5) * span / max(count, 1)))
+
+    def __page(self, path: str, query: dict, count: int, item):
+        """
+        Returns a page of a list of count items, with the Link header of the API
+
+        Note:
+            - Method is private
+        """
+        per_page = min(int(query.get("per_page", 30)), MAX_PER_PAGE)
+        page = int(query.get("page", 1))
+        last = max(1, -(-count // per_page))
+        items = [item(i) for i in range((page - 1) * per_page, min(page * per_page, count))]
+
+        # As the API does: no Link header for a single page, and no next and last links on
+        # the last page
+        links = []
+        for rel, number in (("prev", page - 1), ("next", page + 1), ("last", last),
+                            ("first", 1)):
+            if (rel in ("prev", "first") and page <= 1) or \
+                    (rel in ("next", "last") and page >= last):
+                continue
+            params = dict(query, page=number)
+            links.append(f'<{self.base_url}{path}?{urlencode(params)}>; rel="{rel}"')
+        return 200, items, {"Link": ", ".join(links)} if links else {}
+
+    # Endpoints
+
+    def _get_user(self, path, query, headers):
+        return 200, self.__user(self.__scenario.login), {}
+
+    def _get_named_user(self, path, query, headers, login):
+        return 200, self.__user(login), {}
+
+    def _get_repos(self, path, query, headers, login=None):
+        repos = [self.__repo(i) for i in range(self.__scenario.repos)]
+        # Only the public repositories of a named user; those of the authenticated user
+        # by visibility
+        visibility = "public" if login is not None else query.get("visibility", "all")
+        if visibility != "all":
+            repos = [repo for repo in repos if repo["visibility"] == visibility]
+        return self.__page(path, query, len(repos), lambda i: repos[i])
+
+    def _get_repo(self, path, query, headers, owner, repo):
+        return 200, self.__repo(repo), {}
+
+    def _get_commits(self, path, query, headers, owner, repo):
+        count = self.__scenario.commits_per_repo
+        indexes = range(count - 1, -1, -1)
+        if "since" in query:
+            since = _parse_date(query["since"])
+            indexes = [i for i in indexes if self.__commit_date(i) >= since]
+        if "until" in query:
+            until = _parse_date(query["until"])
+            indexes = [i for i in indexes if self.__commit_date(i) <= until]
+        if "author" in query:
+            indexes = [i for i in indexes if self.__commit_author(i) == query["author"]]
+        indexes = list(indexes)
+        return self.__page(path, query, len(indexes),
+                           lambda i: self.__commit(repo, indexes[i]))
+
+    def _get_commit(self, path, query, headers, owner, repo, sha):
+        index = int(sha[8:16], 16)
+        if index >= self.__scenario.commits_per_repo or sha != self.__sha(repo, index):
+            return 404, {"message": "Not Found"}, {}
+        return 200, self.__commit(repo, index, files=True), {}
+
+    def _get_compare(self, path, query, headers, owner, repo, base, head):
+        base_index, head_index = int(base[8:16], 16), int(head[8:16], 16)
+        if any(index >= self.__scenario.commits_per_repo or sha != self.__sha(repo, index)
+               for sha, index in ((base, base_index), (head, head_index))):
+            return 404, {"message": "Not Found"}, {}
+        # Commits are a straight line: head is ahead of base by the commits in between
+        ahead = max(head_index - base_index, 0)
+        return 200, {
+            "url": f"{self.base_url}{path}",
+            "status": "ahead" if ahead else "identical",
+            "ahead_by": ahead,
+            "behind_by": 0,
+            "total_commits": ahead,
+            # Oldest first, at most 250
+            "commits": [self.__commit(repo, i)
+                        for i in range(base_index + 1, head_index + 1)][:250],
+            "files": []
+        }, {}
+
+    def _get_license(self, path, query, headers, owner, repo):
+        if repo % 2:
+            return 404, {"message": "Not Found"}, {}
+        return 200, {
+            "name": "LICENSE", "path": "LICENSE", "content": "", "encoding": "base64",
+            "url": f"{self.base_url}{path}",
+            "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT",
+                        "url": f"{self.base_url}/licenses/mit"}
+        }, {}
+
+    def _get_contributors(self, path, query, headers, owner, repo):
+        logins = [self.__scenario.login] + [f"contributor{i}"
+                                            for i in range(self.__scenario.contributors)]
+        return self.__page(path, query, len(logins), lambda i: self.__user(logins[i]))
+
+    def _get_languages(self, path, query, headers, owner, repo):
+        return 200, {"Python": 10000 + repo, "Markdown": 500}, {}
+
+    def _get_forks(self, path, query, headers, owner, repo):
+        count = self.__scenario.forks
+
+        def fork(i):
+            fork_repo = self.__repo(repo)
+            fork_repo.update({"id": 100000 + i, "fork": True,
+                              "created_at": _iso(self.__spread(count - 1 - i, count))})
+            return fork_repo
+
+        # Newest first
+        return self.__page(path, query, count, fork)
+
+    def _get_issues(self, path, query, headers, owner, repo):
+        count = self.__scenario.issues
+        since = _parse_date(query["since"]) if "since" in query else None
+        dates = [self.__spread(i, count) for i in range(count)]
+        indexes = [i for i in range(count - 1, -1, -1) if since is None or dates[i] >= since]
+
+        def issue(i):
+            index = indexes[i]
+            return {"number": index + 1, "title": f"Issue {index}",
+                    "state": "closed" if index % 3 == 0 else "open",
+                    "created_at": _iso(dates[index]), "updated_at": _iso(dates[index]),
+                    "user": self.__user(self.__scenario.login),
+                    "url": f"{self.base_url}/repos/{owner}/repo{repo}/issues/{index + 1}"}
+
+        return self.__page(path, query, len(indexes), issue)
+
+    def _get_search_issues(self, path, query, headers):
+        # Only the qualifiers the project uses: repo:, is:issue, is:open/closed, created:
+        qualifiers = query.get("q", "").split()
+        terms = dict(term.split(":", 1) for term in qualifiers if ":" in term)
+        match = re.match(r"[^/]+/repo(\d+)$", terms.get("repo", ""))
+        if match is None:
+            return 422, {"message": "Validation Failed"}, {}
+        count = self.__scenario.issues
+        indexes = range(count)
+        if "created" in terms:
+            start, end = (datetime.fromisoformat(d).replace(tzinfo=timezone.utc)
+                          for d in terms["created"].split(".."))
+            indexes = [i for i in indexes
+                       if start <= self.__spread(i, count) < end + timedelta(days=1)]
+        if "is:closed" in qualifiers:
+            indexes = [i for i in indexes if i % 3 == 0]
+        elif "is:open" in qualifiers:
+            indexes = [i for i in indexes if i % 3 != 0]
+
+        status, items, link = self.__page(path, query, len(indexes), lambda i: {
+            "number": indexes[i] + 1, "title": f"Issue {indexes[i]}",
+            "state": "closed" if indexes[i] % 3 == 0 else "open"})
+        return status, {"total_count": len(indexes), "incomplete_results": False,
+                        "items": items}, dict(link, **{"X-RateLimit-Resource": "search"})
+
+    def _get_stargazers(self, path, query, headers, owner, repo):
+        count = self.__scenario.stargazers
+
+        # Oldest first
+        return self.__page(path, query, count, lambda i: {
+            "starred_at": _iso(self.__spread(i, count)),
+            "user": self.__user(f"stargazer{i}")})
+
+    def _get_releases(self, path, query, headers, owner, repo):
+        count = self.__scenario.releases
+
+        def release(i):
+            date = _iso(self.__spread(count - 1 - i, count))
+            return {"id": i + 1, "tag_name": f"v{count - i}", "name": f"v{count - i}",
+                    "created_at": date, "published_at": date,
+                    "url": f"{self.base_url}/repos/{owner}/repo{repo}/releases/{i + 1}"}
+
+        # Newest first
+        return self.__page(path, query, count, release)
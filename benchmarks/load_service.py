@@ -0,0 +1,145 @@
+"""
+Script load testing the service mode (see api.service) against a local fake GitHub API.
+
+A FakeGithub server and a WrappedService on top of it are started in this process, and
+concurrent clients send GET /wrapped/{user}/{year} requests, spread over several users and
+years. The script reports the latency percentiles and throughput of the requests, the
+responses per status, the counters of the service (computations, coalesced requests,
+cache hits, rejections) and the requests the fake API received, so that coalescing and
+caching can be checked: however many clients ask for a report at once, it's computed once.
+
+Example:
+    python -m benchmarks.load_service --requests 200 --concurrency 20 --users 3
+    python -m benchmarks.load_service --scenario medium --workers 4 --queue-size 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from benchmarks.fake_github import FakeGithub, Scenario
+from benchmarks.run_benchmarks import SCENARIOS
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentile(values: list, percentile: float):
+    """
+    Returns a percentile of sorted values, by nearest rank
+    """
+    rank = max(int(-(-percentile * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def run_load(scenario: Scenario, total: int, concurrency: int, users: int, years: int,
+             workers: int, queue_size: int):
+    """
+    Serves a scenario, starts a service on top of it and sends the requests
+
+    Args:
+        scenario (Scenario): Scenario served by the fake API
+        total (int): Requests sent to the service
+        concurrency (int): Requests sent at the same time
+        users (int): Distinct users asked for, the first one being the authenticated one
+        years (int): Distinct years asked for, up to the year of the scenario
+        workers (int): Reports computed at the same time by the service
+        queue_size (int): Reports queued by the service before it rejects requests
+
+    Returns:
+        dict: Metrics of the run
+    """
+    from utils.helpers import connect, disconnect
+    from api.service import WrappedService, WrappedServer
+
+    fake = FakeGithub(scenario)
+    fake.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        github = connect("bench", max_rate=1e6, base_url=fake.base_url)
+    if github is None:
+        fake.stop()
+        raise Exception(f"Unable to connect to {fake.base_url}")
+
+    service = WrappedService(github, True, True, workers=workers, queue_size=queue_size)
+    server = WrappedServer(service, port=0)
+    server.start()
+
+    logins = [scenario.login] + [f"user{i}" for i in range(1, users)]
+    paths = [f"/wrapped/{login}/{scenario.year - y}" for y in range(years) for login in logins]
+    api_before = Counter(fake.request_counts)
+
+    def send(i):
+        start = time.perf_counter()
+        response = requests.get(f"{server.base_url}{paths[i % len(paths)]}", timeout=600)
+        return response.status_code, time.perf_counter() - start
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total)))
+    wall = time.perf_counter() - begin
+
+    status = service.status()
+    server.stop()
+    service.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        disconnect(github)
+    api_requests = Counter(fake.request_counts) - api_before
+    fake.stop()
+
+    latencies = sorted(seconds for _, seconds in results)
+    return dict(
+        {"wall_seconds": wall,
+         "requests_per_second": total / wall,
+         "statuses": dict(Counter(str(code) for code, _ in results)),
+         "service": status,
+         "api_requests": sum(api_requests.values()),
+         "api_requests_per_endpoint": dict(api_requests)},
+        **{f"p{p}_ms": _percentile(latencies, p) * 1000 for p in PERCENTILES},
+        max_ms=latencies[-1] * 1000)
+
+
+def main():
+    """
+    Main entry point of the script
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scenario", default="small", choices=list(SCENARIOS),
+                        help="Scenario served by the fake API")
+    parser.add_argument("--requests", type=int, default=100, help="Requests sent")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Requests sent at the same time")
+    parser.add_argument("--users", type=int, default=2, help="Distinct users asked for")
+    parser.add_argument("--years", type=int, default=1, help="Distinct years asked for")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Reports computed at the same time by the service")
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="Reports queued by the service before it rejects requests")
+    parser.add_argument("--output", help="Filepath the metrics are written to, as JSON")
+    args = parser.parse_args()
+
+    metrics = run_load(Scenario(**SCENARIOS[args.scenario].as_dict()), args.requests,
+                       args.concurrency, args.users, args.years, args.workers,
+                       args.queue_size)
+
+    print(f"{args.requests} requests in {metrics['wall_seconds']:.2f}s "
+          f"({metrics['requests_per_second']:.1f}/s), statuses {metrics['statuses']}")
+    print("Latency: " + ", ".join(f"p{p} {metrics[f'p{p}_ms']:.1f} ms" for p in PERCENTILES)
+          + f", max {metrics['max_ms']:.1f} ms")
+    service = metrics["service"]
+    print(f"Service: {service['computations']} computations, {service['coalesced']} coalesced, "
+          f"{service['cache_hits']} cache hits, {service['rejected']} rejected, "
+          f"{service['failed']} failed")
+    print(f"Fake API: {metrics['api_requests']} requests")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(metrics, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Script running the benchmarks of the project against a local fake GitHub API.
+
+Every scenario starts a FakeGithub server in this process and runs the benchmark itself in
+a fresh subprocess, so that its peak memory is its own. The benchmark goes end-to-end
+through UserData and print_statistics_repo, stage by stage:
+    - scan: commit scan of every repository (total_count)
+    - languages: language statistics (get_languages_user)
+    - calendar: commit streaks and calendar (get_commit_data)
+    - repo_statistics: print_statistics_repo of every contributed repository
+
+For each stage the wall time and the API requests per endpoint are recorded, along with the
+peak RSS of the run and the throughput of the scan and language paths. Results are written
+as JSON and can be compared with a previous run, flagging slower stages and extra requests
+as regressions.
+
+Example:
+    python -m benchmarks.run_benchmarks --scenario small medium --output results.json
+    python -m benchmarks.run_benchmarks --scenario small --compare results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.fake_github import FakeGithub, Scenario
+
+RESULTS_VERSION = 1
+# Slowdowns smaller than this, in seconds, are noise rather than regressions
+MIN_SLOWDOWN = 0.05
+
+SCENARIOS = {
+    "small": Scenario(repos=5, commits_per_repo=100, files_per_commit=3, stargazers=20,
+                      forks=10, issues=10, releases=3),
+    "medium": Scenario(repos=20, commits_per_repo=500, files_per_commit=5, stargazers=200,
+                       forks=50, issues=50, releases=10),
+    "large": Scenario(repos=50, commits_per_repo=2000, files_per_commit=5, stargazers=1000,
+                      forks=200, issues=200, releases=30),
+}
+
+
+def _get_counts(base_url: str):
+    """
+    Returns the requests received so far by the fake server, per endpoint
+    """
+    import requests
+    return Counter(requests.get(f"{base_url}/_bench/counts", timeout=30).json())
+
+
+def run_worker(base_url: str, scenario: Scenario, async_fetcher: bool):
+    """
+    Runs the benchmark of a scenario against the server at base_url, in this process
+
+    Args:
+        base_url (str): URL of the fake API
+        scenario (Scenario): Scenario the server is serving
+        async_fetcher (bool): Whether commit details are fetched with AsyncCommitFetcher
+
+    Returns:
+        dict: Metrics of the run
+    """
+    from utils.helpers import connect, disconnect
+    from api.user import UserData
+    from api.repo import print_statistics_repo
+    from api.commit_details import AsyncCommitFetcher
+
+    stages = {}
+    output = io.StringIO()
+    begin = time.perf_counter()
+
+    def stage(name, function):
+        counts = _get_counts(base_url)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            function()
+        stages[name] = {"seconds": time.perf_counter() - start,
+                        "requests": dict(_get_counts(base_url) - counts)}
+
+    with contextlib.redirect_stdout(output):
+        github = connect("bench", max_rate=1e6, base_url=base_url)
+    if github is None:
+        raise Exception(f"Unable to connect to {base_url}: {output.getvalue()}")
+
+    commit_fetcher = None
+    if async_fetcher:
+        commit_fetcher = AsyncCommitFetcher("bench", base_url)
+    user = UserData(github, scenario.login, scenario.year, True, True,
+                    commit_fetcher=commit_fetcher)
+
+    stage("scan", lambda: user.total_count)
+    stage("languages", user.get_languages_user)
+    stage("calendar", user.get_commit_data)
+    stage("repo_statistics", lambda: [print_statistics_repo(user, repo)
+                                      for repo in user.get_contributed_repos()])
+    wall = time.perf_counter() - begin
+
+    with contextlib.redirect_stdout(output):
+        disconnect(github)
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+
+    commits = sum(data["total_count"] for data in user.repo_commit.values())
+    requests_total = sum(sum(s["requests"].values()) for s in stages.values())
+    return {
+        "wall_seconds": wall,
+        "stages": stages,
+        "requests_total": requests_total,
+        "peak_rss_mib": peak / 1024,
+        "commits_scanned": commits,
+        "commits_authored": user.total_count,
+        "scan_commits_per_second": commits / stages["scan"]["seconds"],
+        "languages_commits_per_second":
+            user.total_count / stages["languages"]["seconds"]
+            if stages["languages"]["seconds"] else None,
+        "requests_per_second": requests_total / wall
+    }
+
+
+def run_scenario(name: str, scenario: Scenario, async_fetcher: bool):
+    """
+    Serves a scenario and runs its benchmark in a subprocess
+
+    Args:
+        name (str): Name of the scenario
+        scenario (Scenario): Scenario
+        async_fetcher (bool): Whether commit details are fetched with AsyncCommitFetcher
+
+    Returns:
+        dict: Parameters and metrics of the scenario
+    """
+    server = FakeGithub(scenario)
+    server.start()
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run_benchmarks", "--worker", server.base_url,
+             "--scenario-json", json.dumps(scenario.as_dict())]
+            + (["--async-fetcher"] if async_fetcher else []),
+            cwd=root, capture_output=True, text=True)
+    finally:
+        server.stop()
+
+    if result.returncode != 0:
+        raise Exception(f"Benchmark {name} failed:\n{result.stderr}")
+
+    return {"parameters": dict(scenario.as_dict(), async_fetcher=async_fetcher),
+            "metrics": json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def compare(baseline: dict, results: dict, threshold: float):
+    """
+    Prints every metric of the scenarios of results next to its baseline, flagging the
+    stages slower than threshold (and by more than MIN_SLOWDOWN seconds) and any extra
+    request as regressions
+
+    Args:
+        baseline (dict): Results of a previous run
+        results (dict): Results of this run
+        threshold (float): Relative slowdown tolerated, such as 0.1 for 10%
+
+    Returns:
+        int: Number of regressions
+    """
+    regressions = 0
+    for name, scenario in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name}: not in the baseline")
+            continue
+        if base["parameters"] != scenario["parameters"]:
+            print(f"{name}: parameters differ from the baseline, not compared")
+            continue
+
+        print(f"{name}:")
+        rows = [("wall_seconds", base["metrics"]["wall_seconds"],
+                 scenario["metrics"]["wall_seconds"], "time")]
+        for stage, metrics in scenario["metrics"]["stages"].items():
+            base_stage = base["metrics"]["stages"].get(stage, {})
+            rows.append((f"{stage}.seconds", base_stage.get("seconds", 0.0), metrics["seconds"],
+                         "time"))
+            rows.append((f"{stage}.requests", sum(base_stage.get("requests", {}).values()),
+                         sum(metrics["requests"].values()), "requests"))
+        rows.append(("peak_rss_mib", base["metrics"]["peak_rss_mib"],
+                     scenario["metrics"]["peak_rss_mib"], "memory"))
+
+        for metric, before, after, kind in rows:
+            change = (after - before) / before if before else 0.0
+            if kind == "requests":
+                regression = after > before
+            else:
+                regression = change > threshold and (kind != "time"
+                                                     or after - before > MIN_SLOWDOWN)
+            regressions += bool(regression)
+            flag = "  REGRESSION" if regression else ""
+            print(f"  {metric:<28}{before:>12.3f}{after:>12.3f}{change:>+9.1%}{flag}")
+
+    return regressions
+
+
+def main():
+    """
+    Main entry point of the script
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scenario", nargs="+", default=["small"], choices=list(SCENARIOS),
+                        help="Scenarios to run")
+    parser.add_argument("--repos", type=int, help="Overrides the repositories of the scenarios")
+    parser.add_argument("--commits", type=int,
+                        help="Overrides the commits per repository of the scenarios")
+    parser.add_argument("--files", type=int,
+                        help="Overrides the files per commit of the scenarios")
+    parser.add_argument("--async-fetcher", action="store_true",
+                        help="Fetches commit details with AsyncCommitFetcher (needs aiohttp)")
+    parser.add_argument("--output", help="Filepath the results are written to, as JSON")
+    parser.add_argument("--compare", help="Results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown flagged as a regression (default: 0.1)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario-json", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        metrics = run_worker(args.worker, Scenario(**json.loads(args.scenario_json)),
+                             args.async_fetcher)
+        print(json.dumps(metrics))
+        return
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {}
+    }
+    for name in args.scenario:
+        scenario = Scenario(**SCENARIOS[name].as_dict())
+        if args.repos is not None:
+            scenario.repos = args.repos
+        if args.commits is not None:
+            scenario.commits_per_repo = args.commits
+        if args.files is not None:
+            scenario.files_per_commit = args.files
+
+        print(f"Running {name}...")
+        result = run_scenario(name, scenario, args.async_fetcher)
+        results["scenarios"][name] = result
+        metrics = result["metrics"]
+        print(f"  {metrics['wall_seconds']:.2f}s, {metrics['requests_total']} requests, "
+              f"peak RSS {metrics['peak_rss_mib']:.1f} MiB")
+        for stage, stage_metrics in metrics["stages"].items():
+            requests = ", ".join(f"{endpoint}: {count}" for endpoint, count
+                                 in sorted(stage_metrics["requests"].items()))
+            print(f"  - {stage}: {stage_metrics['seconds']:.2f}s ({requests})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,45 @@
 Main script for fetching and displaying various details related to a GitHub user.
 
 Functions:
-    - repositories_details: Displays information related to repositories, including 
-    those created and contributed to by the user.
-    - commits_details: Displays information related to commits made by the user, 
-    such as the number of commits, commit streak duration, etc.
-    - social_details: Displays social-related information, including stars received, 
-    top collaborators, new followers, and new accounts followed.
+    - render_created: Displays the repositories created by the user this year.
+    - render_contributed: Displays the repositories contributed to by the user this year.
+    - render_repo_statistics: Displays the extra info. of a repository contributed to.
+    - render_languages: Displays the languages the user coded in this year.
+    - render_commits: Displays the number of commits made by the user.
+    - render_streaks: Displays the days with commits, the commit streaks, the busiest
+    day, the histogram of commits per month and the weekday x hour heatmap.
+    - render_event: Displays an event of the report pipeline, as soon as it arrives.
+    - render_report: Displays the report of a user, streaming its sections, and optionally
+    writes them to a snapshot.
+    - render_snapshot: Displays the report stored in a snapshot, with no GitHub connection.
+    - batch_details: Displays the reports of many users (a list of logins or the members
+    of an organization), scanning every shared repository only once.
+    - multi_year_details: Displays the reports of several years and their year-over-year
+    comparison, fetching the history of every repository only once.
+    - render_year_over_year: Displays the main figures of every year side by side.
+    - make_source: Returns the data source of the commit data chosen in the configuration.
+    - serve_details: Serves the reports of any user and year over HTTP/JSON (see
+    api.service), keeping the connection and caches warm between requests.
+    - ingest_details: Applies push events (replayed from JSON files or received as
+    webhooks) to the stored aggregates of the user (see api.push_events).
+    - memory_details: Displays the memory taken by the commits kept for the report.
+    - parse_args: Parses the command line options.
     - main: Main entry point for the script, which orchestrates the execution of 
     various functions.
 
+The report is streamed: each section is displayed as soon as its data is ready (see
+api.report), with progress updates for the long ones, instead of after every repository
+has been scanned.
+
 Example:
     python githubwrapped.py
+    python githubwrapped.py --profile
+    python githubwrapped.py --profile json --profile-output profile.json
+    python githubwrapped.py --snapshot wrapped.snapshot
+    python githubwrapped.py --render wrapped.snapshot
+    python githubwrapped.py --serve 8080
+    python githubwrapped.py --ingest events/
+    python githubwrapped.py --webhook 8081
 
 Note:
     Make sure to install the required dependencies by running:
@@ -20,40 +48,70 @@ Note:
 """
 
 from utils.helpers import load_json, connect, disconnect
-from api.repo import print_statistics_repo
+from api.repo import RepoStatistics, render_statistics_repo
+from api.report import ReportEvent, run_pipeline, PROGRESS, ERROR, DONE
 from api.user import UserData
+from api.batch import get_batch_users, scan_batch, print_batch_cost
+from api.multi_year import get_multi_year_users, scan_years, get_year_over_year
+from api.sources import RestSource, GraphQLSource, StoredSource, GITHUB_GRAPHQL_URL
+from api.git_source import GitSource
+from api.commit_details import AsyncCommitFetcher, aiohttp_available
+from utils.state_store import StateStore
+from utils.profiler import Profiler, install_profiler
+from utils.language_aggregation import LanguageAggregator
+from api.service import WrappedService, WrappedServer, ServiceExposed
+from api.push_events import PushIngestor, WebhookReceiver
+from api.snapshot import (SnapshotWriter, SnapshotReader, write_report_event, write_user,
+                          read_report_events, read_calendar)
+import argparse
+from collections import Counter
+import sys
 from datetime import datetime
 
 
-def repositories_details(user: UserData):
-    """
-    Displays info. related to repositories
-    """
+SEPARATOR = "\n------------------------------------------------\n"
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HEATMAP_SHADES = " .:-=+*#%@"
 
-    print("------------------------------------------------")
-    print("Repositories and code")
-    print("------------------------------------------------")
 
-    # Repositories created this year
-    repos = user.get_created_repos()
+def render_created(repos: list):
+    """
+    Displays the repositories created this year
+    """
     print("Repositories created this year: ")
     for r in repos:
         print(r.full_name, " Top Language: ", r.language)
-    print("\n------------------------------------------------\n")
+    print(SEPARATOR)
 
-    # Repositories contributed to this year
-    repos = user.get_contributed_repos()
+
+def render_contributed(show_repo_info: bool, repos: list):
+    """
+    Displays the repositories contributed to this year. With the extra info. enabled, each
+    repository is displayed along with its statistics as they arrive, and the section is
+    closed once they are all done
+    """
     print("Repositories contributed to this year: ")
+    if show_repo_info:
+        return
     for r in repos:
         print(r.full_name, " Top Language: ", r.language)
-        # Extra info.
-        if user.show_repo_info:
-            print_statistics_repo(user, r)
-            print("\n")
-    print("\n------------------------------------------------\n")
-
-    # Languages top and count
-    languages = user.get_languages_user()
+    print(SEPARATOR)
+
+
+def render_repo_statistics(stats: RepoStatistics, language: str):
+    """
+    Displays a repository contributed to this year along with its extra info.
+    """
+    print(stats.full_name, " Top Language: ", language)
+    render_statistics_repo(stats)
+    print("\n")
+
+
+def render_languages(languages: dict):
+    """
+    Displays the languages top and count
+    """
     languages_list = list(languages.items())
 
     if len(languages_list) > 0:
@@ -71,28 +129,30 @@ def repositories_details(user: UserData):
         if top_language != None:
             print(top_language)
             print(f"But your favourite was without a doubt {top_language}")
-    
+        print(SEPARATOR)
 
 
-def commits_details(user: UserData):
+def render_commits(counts: dict):
     """
-    Displays info. related to commits made by the user
+    Displays the num. of commits of the year, and the contributions to private repositories
+    that couldn't be seen, if any
     """
-    # Commits
-    print("Commits")
-    data = user.get_commit_data()
-
-    # Num. of commits of the year
     print(
         "You made",
-        user.total_count,
+        counts["total_count"],
         "commits this year, of which",
-        user.public_count,
-        "were public contributions. You commited for",
-        data["days_with_commits_count"],
-        "days this year!")
+        counts["public_count"],
+        "were public contributions.")
+    if counts.get("restricted_count"):
+        print(f"+{counts['restricted_count']} private contributions")
 
-    # Max streak of commits (dates)
+
+def render_streaks(data: dict):
+    """
+    Displays the days with commits, the longest and current streaks of commits (dates),
+    the busiest day, the histogram of commits per month and the weekday x hour heatmap
+    """
+    print("You commited for", data["days_with_commits_count"], "days this year!")
     print(
         "Your longest commit streak lasted for",
         data["streak_duration"],
@@ -100,14 +160,317 @@ def commits_details(user: UserData):
         data["streak_start_date"],
         "and",
         data["streak_end_date"])
+    if data["current_streak_duration"] > 0:
+        print(
+            "Your current commit streak has lasted for",
+            data["current_streak_duration"],
+            "days, since",
+            data["current_streak_start_date"])
+    if data["busiest_day"] is not None:
+        print(f"Your busiest day was {data['busiest_day']}, with "
+              f"{data['busiest_day_count']} commits")
+
+    # Histogram of commits per month
+    histogram = data["monthly_histogram"]
+    scale = max(histogram) or 1
+    print("Commits per month:")
+    for month, count in zip(MONTHS, histogram):
+        print(f"{month} {'#' * round(40 * count / scale):<40} {count}")
+
+    # Heatmap of commits per weekday and hour
+    heatmap = data["heatmap"]
+    scale = max(max(hours) for hours in heatmap)
+    if scale > 0:
+        print("Commits per weekday and hour:")
+        print("    " + "".join(f"{hour:<3}" for hour in range(0, 24, 3)))
+        for weekday, hours in zip(WEEKDAYS, heatmap):
+            print(weekday, "".join(
+                HEATMAP_SHADES[-(-count * (len(HEATMAP_SHADES) - 1) // scale)]
+                for count in hours))
+    print(SEPARATOR)
+
+
+def render_event(show_repo_info: bool, event: ReportEvent, progress: dict,
+                 request_counts=None):
+    """
+    Displays an event of the report pipeline. Progress is displayed every 10%, keeping the
+    last step displayed of each section in progress. If request_counts is provided, the
+    requests made for the repository statistics are counted in it by section
+    """
+    if event.kind == PROGRESS:
+        done, total = event.data
+        step = done * 10 // total if total else 10
+        if step > progress.get(event.section, -1):
+            progress[event.section] = step
+            print(f"[{event.section}] {done}/{total}")
+    elif event.kind == ERROR:
+        print(f"Unable to get the {event.section} section: {event.data}")
+    elif event.kind == DONE:
+        if event.section == "contributed" and show_repo_info:
+            print(SEPARATOR)
+    elif event.section == "catalog":
+        print(f"Found {event.data} repositories")
+        print(SEPARATOR)
+    elif event.section == "created":
+        render_created(event.data)
+    elif event.section == "contributed":
+        render_contributed(show_repo_info, event.data)
+    elif event.section == "repo_statistics":
+        stats, language = event.data
+        render_repo_statistics(stats, language)
+        if request_counts is not None:
+            request_counts.update(stats.request_counts)
+    elif event.section == "languages":
+        render_languages(event.data)
+    elif event.section == "commits":
+        render_commits(event.data)
+    elif event.section == "streaks":
+        render_streaks(event.data)
+
+
+def render_report(user: UserData, request_counts=None, snapshot: SnapshotWriter = None):
+    """
+    Displays the report of a user, in the order of the report, each section as soon as its
+    data and those before it are ready. If a snapshot writer is provided, every result is
+    written to it, along with the repository catalog and the calendar of the user at the end
+    """
+    progress = {}
+    for event in run_pipeline(user, ordered=True):
+        render_event(user.show_repo_info, event, progress, request_counts)
+        if snapshot is not None:
+            write_report_event(snapshot, event, user)
+    if snapshot is not None:
+        write_user(snapshot, user)
+
+
+def render_snapshot(filepath: str):
+    """
+    Displays the report stored in a snapshot, without connecting to the GitHub API
+    """
+    with SnapshotReader(filepath) as reader:
+        meta = reader.json("meta", {})
+        print(f"Wrapped of {meta.get('username')} in {meta.get('year')}, from {filepath}")
+        print(SEPARATOR)
+        progress = {}
+        for event in read_report_events(reader):
+            render_event(meta.get("show_repo_info", False), event, progress)
+        calendar = read_calendar(reader)
+    if calendar is not None:
+        render_streaks(calendar.commit_data())
+
+
+def batch_details(github, jsonfile: dict, commit_fetcher=None, language_aggregator=None):
+    """
+    Displays the reports of every user of the batch, and the requests saved by scanning
+    the repositories they share only once
+    """
+    users = get_batch_users(github, jsonfile.get('year'), jsonfile.get('showPrivate'),
+                            jsonfile.get("showRepoInfo"), jsonfile.get("batchUsers"),
+                            jsonfile.get("batchOrganization"),
+                            jsonfile.get("scanWorkers", 8), commit_fetcher)
+    progress = {}
+    scan_batch(users, lambda done, total: render_event(
+        False, ReportEvent("batch", PROGRESS, (done, total)), progress))
 
-    # Histogram of commits per month    TODO (when GUI)
+    for user in users:
+        user.utc_offset = jsonfile.get("utcOffset", 0)
+        if language_aggregator is not None:
+            user.language_aggregator = language_aggregator
+        print("================================================")
+        print(f"Wrapped of {user.username}")
+        print("================================================")
+        render_report(user)
+
+    print_batch_cost(users)
+    if users and jsonfile.get("showMemoryUsage"):
+        memory_details(users[0])
+
+
+def render_year_over_year(rows: list):
+    """
+    Displays the main figures of every year and the change of the commits from the
+    year before
+    """
+    print("Year over year:")
+    print(f"{'Year':<6}{'Commits':>9}{'Change':>9}{'Public':>8}{'Days':>6}{'Streak':>8}"
+          f"{'Created':>9}{'Contrib.':>10}  Top language")
+    for row in rows:
+        change = "" if row["commits_change"] is None else f"{row['commits_change']:+.0%}"
+        print(f"{row['year']:<6}{row['commits']:>9}{change:>9}{row['public_commits']:>8}"
+              f"{row['days_with_commits']:>6}{row['longest_streak']:>8}"
+              f"{row['created_repos']:>9}{row['contributed_repos']:>10}  "
+              f"{row['top_language'] or '-'}")
+    print(SEPARATOR)
+
+
+def multi_year_details(github, jsonfile: dict, commit_fetcher=None,
+                       language_aggregator=None):
+    """
+    Displays the report of every year and the year-over-year comparison, from a single
+    scan of the history of every repository over the whole range of years
+    """
+    users = get_multi_year_users(github, jsonfile.get('username'), jsonfile.get("years"),
+                                 jsonfile.get('showPrivate'), jsonfile.get("showRepoInfo"),
+                                 jsonfile.get("scanWorkers", 8), commit_fetcher,
+                                 jsonfile.get("utcOffset", 0))
+    progress = {}
+    scan_years(users, lambda done, total: render_event(
+        False, ReportEvent("history", PROGRESS, (done, total)), progress))
+
+    for user in users:
+        if language_aggregator is not None:
+            user.language_aggregator = language_aggregator
+        print("================================================")
+        print(f"Wrapped of {user.year}")
+        print("================================================")
+        render_report(user)
+
+    render_year_over_year(get_year_over_year(users))
+    print_batch_cost(users)
+    if jsonfile.get("showMemoryUsage"):
+        memory_details(users[0])
+
+
+def memory_details(user: UserData):
+    """
+    Displays the memory taken by the commit store, per commit, and the peak memory of
+    the process where it can be known
+    """
+    store = user.commit_store
+    size = store.memory_usage()
+    per_commit = size / len(store) if len(store) else 0
+    print(f"Commit store: {len(store)} commits, {store.file_count} files, "
+          f"{size / 1024:.1f} KiB ({per_commit:.1f} bytes per commit)")
+    try:
+        import resource
+    except ImportError:
+        return
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    print(f"Peak memory of the process: {peak / 1024:.1f} MiB")
+
+
+def make_source(jsonfile: dict):
+    """
+    Returns the data source of the commit data chosen in the configuration
+    """
+    token = jsonfile.get('token')
+    if jsonfile.get("dataSource", "rest") == "graphql":
+        return GraphQLSource(token, jsonfile.get("graphqlUrl", GITHUB_GRAPHQL_URL))
+    if jsonfile.get("dataSource") == "git":
+        return GitSource(jsonfile.get("cloneDir", "clones"),
+                         jsonfile.get("gitAuthorEmails", []), token,
+                         jsonfile.get("scanWorkers", 8))
+    if jsonfile.get("dataSource") == "events":
+        return StoredSource(RestSource(jsonfile.get("scanWorkers", 8)))
+    return RestSource(jsonfile.get("scanWorkers", 8))
+
+
+def serve_details(github, jsonfile: dict, host: str, port: int, state_store=None,
+                  commit_fetcher=None, language_aggregator=None):
+    """
+    Serves the reports over HTTP/JSON until interrupted, keeping the connection, the caches
+    and the computed reports warm between requests
+    """
+    service = WrappedService(github, jsonfile.get('showPrivate'), jsonfile.get("showRepoInfo"),
+                             lambda: make_source(jsonfile), state_store, commit_fetcher,
+                             language_aggregator, jsonfile.get("utcOffset", 0),
+                             jsonfile.get("serviceWorkers", 2),
+                             jsonfile.get("serviceQueueSize", 16),
+                             jsonfile.get("serviceCacheSeconds", 300),
+                             jsonfile.get("serviceCacheEntries", 128))
+    try:
+        server = WrappedServer(service, host, port, jsonfile.get("serviceSecret"))
+    except ServiceExposed as e:
+        print(e)
+        service.close()
+        return
+    print(f"Serving reports at {server.base_url}/wrapped/<user>/<year> (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        server.stop()
+        service.close()
+
+
+def ingest_details(github, jsonfile: dict, state_store: StateStore, path: str = None,
+                   host: str = None, port: int = None):
+    """
+    Applies push events to the stored aggregates of the user: those of the JSON files of
+    path, replayed, or those delivered to a webhook receiver until interrupted
+    """
+    if state_store is None:
+        print("Push events are applied to the stored aggregates: set statePath first")
+        return
+    ingestor = PushIngestor(state_store, jsonfile.get('username'),
+                            jsonfile.get("gitAuthorEmails", []), github)
+    if path is not None:
+        counts = ingestor.ingest_path(path)
+        print(f"Replayed {path}: {counts['applied']} commits applied, "
+              f"{counts['skipped']} already applied, {counts['unscanned']} left for a "
+              f"first scan, {counts['undated']} without a date, "
+              f"{counts['missing']} missing, {counts['ignored']} events ignored")
+        return
+
+    receiver = WebhookReceiver(ingestor, host, port, jsonfile.get("webhookSecret"))
+    print(f"Receiving push webhooks at {receiver.base_url} (Ctrl+C to stop)")
+    try:
+        receiver.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        receiver.stop()
+
+
+def parse_args():
+    """
+    Parses the command line options. Everything else is read from config.json
+    """
+    parser = argparse.ArgumentParser(description="Your year on GitHub, wrapped")
+    parser.add_argument("--profile", nargs="?", const="table", choices=("table", "json"),
+                        help="Profiles the run: requests per endpoint with their latency, "
+                             "time per stage and rate-limit quota consumed, printed as a "
+                             "table (default) or exported as JSON")
+    parser.add_argument("--profile-output",
+                        help="File the JSON profile is written to, instead of printed")
+    parser.add_argument("--snapshot",
+                        help="File the results of the report are written to, so that it can "
+                             "be displayed again with --render")
+    parser.add_argument("--render", metavar="SNAPSHOT",
+                        help="Displays the report stored in a snapshot, without connecting "
+                             "to GitHub")
+    parser.add_argument("--serve", nargs="?", const=8080, type=int, metavar="PORT",
+                        help="Serves the reports of any user and year over HTTP/JSON, at "
+                             "/wrapped/<user>/<year>, on PORT (default: 8080)")
+    parser.add_argument("--ingest", metavar="PATH",
+                        help="Applies the push events of a JSON file, or of every JSON file "
+                             "of a directory, to the stored aggregates")
+    parser.add_argument("--webhook", nargs="?", const=8081, type=int, metavar="PORT",
+                        help="Receives push webhooks on PORT (default: 8081) and applies "
+                             "them to the stored aggregates")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Host the reports or webhooks are served on "
+                             "(default: 127.0.0.1)")
+    return parser.parse_args()
 
 
 def main():
     """
     Main entry point for the script. This script performs all the functionality. 
     """
+    args = parse_args()
+    if args.render:
+        render_snapshot(args.render)
+        return
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        install_profiler(profiler)
 
     now = datetime.now()
     current_time = now.strftime("%H:%M:%S")
@@ -121,19 +484,72 @@ def main():
     year = jsonfile.get('year')
     show_private = jsonfile.get('showPrivate')
     show_repo_info = jsonfile.get("showRepoInfo")
+    cache_path = jsonfile.get("cachePath")
+    cache_max_size = jsonfile.get("cacheMaxSizeMB", 256) * 1024 * 1024
+    state_path = jsonfile.get("statePath")
+    state_store = StateStore(state_path) if state_path else None
+    source = make_source(jsonfile)
+
+    commit_fetcher = None
+    if jsonfile.get("asyncCommitFetcher"):
+        if aiohttp_available():
+            commit_fetcher = AsyncCommitFetcher(
+                token, max_in_flight=jsonfile.get("maxInFlight", 16))
+        else:
+            print("aiohttp is not installed, commit details will be fetched with a thread pool")
 
-    github = connect(token)
-    user = UserData(github, username, year, show_private, show_repo_info)
+    language_aggregator = LanguageAggregator(jsonfile.get("languageWorkers"),
+                                             jsonfile.get("languageProcesses", False))
 
-    if github:
-        repositories_details(user)
-        commits_details(user)
+    github = connect(token, cache_path, cache_max_size,
+                     jsonfile.get("extraTokens", []),
+                     jsonfile.get("maxRequestsPerSecond", 10))
+    user = UserData(github, username, year, show_private,
+                    show_repo_info, state_store, source, commit_fetcher,
+                    utc_offset=jsonfile.get("utcOffset", 0),
+                    language_aggregator=language_aggregator)
+
+    if github and (args.ingest or args.webhook is not None):
+        ingest_details(github, jsonfile, state_store, args.ingest, args.host, args.webhook)
+    elif github and args.serve is not None:
+        serve_details(github, jsonfile, args.host, args.serve, state_store, commit_fetcher,
+                      language_aggregator)
+    elif github and (jsonfile.get("batchUsers") or jsonfile.get("batchOrganization")):
+        batch_details(github, jsonfile, commit_fetcher, language_aggregator)
+    elif github and jsonfile.get("years"):
+        multi_year_details(github, jsonfile, commit_fetcher, language_aggregator)
+    elif github:
+        request_counts = Counter()
+        if args.snapshot:
+            with SnapshotWriter(args.snapshot) as snapshot:
+                render_report(user, request_counts, snapshot)
+            print(f"Report written to {args.snapshot}")
+        else:
+            render_report(user, request_counts)
+        user.save_state()
+        if jsonfile.get("showScanTimings") and isinstance(source, RestSource):
+            source.print_timings()
+        if jsonfile.get("showRequestCounts"):
+            print("Requests made for the repository statistics, per section:")
+            for section, count in request_counts.most_common():
+                print(f"- {section}: {count}")
+        if jsonfile.get("showMemoryUsage"):
+            memory_details(user)
 
     disconnect(github)
 
+    if profiler is not None:
+        print(SEPARATOR)
+        if args.profile == "json":
+            profiler.export_json(args.profile_output)
+        else:
+            profiler.print_summary()
+
     now = datetime.now()
     current_time = now.strftime("%H:%M:%S")
     print("End: ", current_time)
 
 
-main()
+# Guarded, so that worker processes importing this module don't run it again
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Module: fake_case
+
+This module provides the base of the tests run offline against the fake GitHub API of the
+benchmarks (see benchmarks.fake_github).
+
+Classes:
+    FakeGithubTestCase: Serves a scenario with the fake GitHub API for every test.
+"""
+
+import contextlib
+import io
+import unittest
+from benchmarks.fake_github import FakeGithub, Scenario
+from utils.helpers import connect, disconnect
+from api.user import UserData
+from api.catalog import RepoCatalog
+
+
+class FakeGithubTestCase(unittest.TestCase):
+    """
+    Serves a scenario with the fake GitHub API for every test
+    """
+
+    scenario = Scenario()
+
+    def setUp(self):
+        self.fake = FakeGithub(self.scenario)
+        self.fake.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.github = connect("test", max_rate=1e6, base_url=self.fake.base_url)
+
+    def tearDown(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            disconnect(self.github)
+        self.fake.stop()
+
+    def repo_commit(self, source, login: str = None):
+        """
+        Returns the counts and days of every repository of the scenario, with a source, for
+        the user of the scenario or another login
+        """
+        user = UserData(self.github, login or self.scenario.login, self.scenario.year, True,
+                        False, source=source)
+        if login is not None:
+            user.user = self.github.get_user(login)
+            user.user_repos = RepoCatalog(user.user.get_repos())
+        return {repo.full_name: (data["total_count"], data["total_count_author"],
+                                 data["commit_days"])
+                for repo, data in user.repo_commit.items()}
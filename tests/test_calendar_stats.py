@@ -0,0 +1,132 @@
+"""
+Tests of api.calendar_stats: the counts built from days and hours of the week and those
+built from the timestamps of the same commits, and the calendars of users in another UTC
+offset, against the fake GitHub API of the benchmarks (see benchmarks.fake_github).
+
+Example:
+    python -m unittest tests.test_calendar_stats
+"""
+
+import contextlib
+import io
+import unittest
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from benchmarks.fake_github import FakeGithub, Scenario
+from api.calendar_stats import CalendarStats, hour_of_week
+from api.sources import RestSource, GraphQLSource
+from api.user import UserData
+from tests.fake_case import FakeGithubTestCase
+
+YEAR = 2023
+
+
+def timestamps():
+    """
+    Returns the timestamps of commits spread over the year, some of them around midnight
+    and at both ends of the year
+    """
+    start = datetime(YEAR, 1, 1, tzinfo=timezone.utc)
+    dates = [start + timedelta(hours=37 * i + i % 5) for i in range(230)]
+    dates += [datetime(YEAR, 3, 6, 23, 30, tzinfo=timezone.utc),
+              datetime(YEAR, 3, 7, 0, 10, tzinfo=timezone.utc),
+              datetime(YEAR, 12, 31, 23, 59, tzinfo=timezone.utc),
+              datetime(YEAR - 1, 12, 31, 22, 0, tzinfo=timezone.utc)]
+    return [int(d.timestamp()) for d in dates]
+
+
+def days_and_hours(commit_timestamps):
+    """
+    Returns the commits per UTC day and per UTC hour of the week of those made during the
+    year, as the sources give them
+    """
+    dates = [datetime.fromtimestamp(t, timezone.utc) for t in commit_timestamps]
+    dates = [d for d in dates if d.year == YEAR]
+    return (dict(Counter(d.date().isoformat() for d in dates)),
+            dict(Counter(str(hour_of_week(d)) for d in dates)))
+
+
+class CalendarStatsTest(unittest.TestCase):
+    """
+    Builds calendars from days and hours, and from timestamps
+    """
+
+    def test_same_commits(self):
+        days, hours = days_and_hours(timestamps())
+        from_days = CalendarStats(YEAR, [days], [hours])
+        from_timestamps = CalendarStats.from_timestamps(YEAR, timestamps())
+        self.assertEqual(from_days.days, from_timestamps.days)
+        self.assertEqual(from_days.hours, from_timestamps.hours)
+        today = date(YEAR, 12, 31)
+        self.assertEqual(from_days.commit_data(today), from_timestamps.commit_data(today))
+        # The commit of the year before isn't counted
+        self.assertEqual(from_days.total(), len(timestamps()) - 1)
+
+    def test_utc_offset(self):
+        # Monday 23:30 and Tuesday 00:10 UTC: both on Tuesday at UTC+2, none on Monday
+        commits = [int(datetime(YEAR, 3, 6, 23, 30, tzinfo=timezone.utc).timestamp()),
+                   int(datetime(YEAR, 3, 7, 0, 10, tzinfo=timezone.utc).timestamp())]
+        stats = CalendarStats.from_timestamps(YEAR, commits, 2)
+        self.assertEqual(stats.utc_offset, 2)
+        self.assertEqual(stats.busiest_day(), (date(YEAR, 3, 7), 2))
+        self.assertEqual(stats.heatmap()[1][1], 1)
+        self.assertEqual(stats.heatmap()[1][2], 1)
+        self.assertEqual(sum(stats.heatmap()[0]), 0)
+
+        # The last hours of the year fall in the next one at UTC+2
+        stats = CalendarStats.from_timestamps(YEAR, timestamps(), 2)
+        self.assertEqual(stats.days[-1], 0)
+        self.assertEqual(sum(stats.days), sum(stats.hours))
+
+    def test_from_arrays(self):
+        stats = CalendarStats.from_timestamps(YEAR, timestamps(), -5)
+        copy = CalendarStats.from_arrays(YEAR, stats.days, stats.hours, stats.utc_offset)
+        self.assertEqual(copy.commit_data(), stats.commit_data())
+        self.assertEqual(copy.utc_offset, -5)
+
+
+class UserCalendarTest(FakeGithubTestCase):
+    """
+    Builds the calendar of the user of the scenario in another UTC offset
+    """
+
+    scenario = Scenario(repos=3, commits_per_repo=200)
+
+    def user(self, source, utc_offset: int):
+        """
+        Returns the UserData of the user of the scenario
+        """
+        return UserData(self.github, self.scenario.login, self.scenario.year, True, False,
+                        source=source, utc_offset=utc_offset)
+
+    def commit_timestamps(self):
+        """
+        Returns the timestamps of the commits of the user of the scenario
+        """
+        return [int(c.commit.author.date.timestamp())
+                for repo in self.github.get_user().get_repos()
+                for c in repo.get_commits(author=self.scenario.login)]
+
+    def test_utc_offset(self):
+        for utc_offset in (0, 9, -7):
+            calendar = self.user(RestSource(), utc_offset).get_calendar()
+            expected = CalendarStats.from_timestamps(self.scenario.year,
+                                                     self.commit_timestamps(), utc_offset)
+            self.assertEqual(calendar.utc_offset, utc_offset)
+            self.assertEqual(calendar.days, expected.days)
+            self.assertEqual(calendar.hours, expected.hours)
+
+    def test_days_only(self):
+        # The GraphQL source only gives days: the calendar stays in UTC
+        source = GraphQLSource("test", self.fake.base_url + FakeGithub.GRAPHQL_PATH)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            calendar = self.user(source, 9).get_calendar()
+        self.assertIn("shown in UTC", output.getvalue())
+        self.assertEqual(calendar.utc_offset, 0)
+        self.assertEqual(calendar.days, CalendarStats.from_timestamps(
+            self.scenario.year, self.commit_timestamps()).days)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests of api.catalog.RepoCatalog: the queries of the catalog are compared with filters
+over the repositories it was built from, stubbed or listed from the fake GitHub API of the
+benchmarks (see benchmarks.fake_github).
+
+Example:
+    python -m unittest tests.test_catalog
+"""
+
+import itertools
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from benchmarks.fake_github import Scenario
+from api.catalog import RepoCatalog
+from tests.fake_case import FakeGithubTestCase
+
+
+def stub_repo(i: int):
+    """
+    Returns a stubbed repository, with the owner, flags and dates depending on i
+    """
+    created_at = datetime(2020 + i % 4, 1 + i % 12, 1)
+    return SimpleNamespace(
+        full_name=f"{('Octocat', 'hubot', 'monalisa')[i % 3]}/catalog-repo{i}",
+        owner=SimpleNamespace(login=("Octocat", "hubot", "monalisa")[i % 3]),
+        fork=i % 5 == 0, private=False, created_at=created_at,
+        # Every seventh repository reports no last push
+        pushed_at=None if i % 7 == 0 else created_at + timedelta(days=37 * i))
+
+
+def matches(repo, owner=None, fork=None, private=None, created_year=None,
+            pushed_since=None):
+    """
+    Returns whether a repository matches the criteria of a query, without the indexes
+    """
+    pushed_since = pushed_since and pushed_since.replace(
+        tzinfo=pushed_since.tzinfo or timezone.utc)
+    pushed_at = repo.pushed_at and repo.pushed_at.replace(
+        tzinfo=repo.pushed_at.tzinfo or timezone.utc)
+    return ((owner is None or repo.owner.login.lower() == owner.lower())
+            and (fork is None or repo.fork == fork)
+            and (private is None or repo.private == private)
+            and (created_year is None or repo.created_at.year == created_year)
+            and (pushed_since is None or pushed_at is None or pushed_at >= pushed_since))
+
+
+class RepoCatalogTest(unittest.TestCase):
+    """
+    Queries a catalog of stubbed repositories
+    """
+
+    def setUp(self):
+        self.repos = [stub_repo(i) for i in range(60)]
+        self.catalog = RepoCatalog(iter(self.repos))
+
+    def test_listing(self):
+        self.assertEqual(len(self.catalog), 60)
+        self.assertEqual(list(self.catalog), self.repos)
+        self.assertIs(self.catalog[7], self.repos[7])
+
+    def test_queries(self):
+        owners = (None, "octocat", "HUBOT", "nobody")
+        forks = (None, True, False)
+        years = (None, 2021, 2019)
+        since = (None, datetime(2022, 6, 1), datetime(2023, 1, 1, tzinfo=timezone.utc),
+                 datetime(2040, 1, 1))
+        for owner, fork, year, pushed_since in itertools.product(owners, forks, years, since):
+            criteria = dict(owner=owner, fork=fork, created_year=year,
+                            pushed_since=pushed_since)
+            self.assertEqual(self.catalog.query(**criteria),
+                             [repo for repo in self.repos if matches(repo, **criteria)],
+                             criteria)
+
+    def test_unknown_push(self):
+        # Repositories with no known last push are never skipped
+        self.assertEqual(self.catalog.query(pushed_since=datetime(2040, 1, 1)),
+                         [repo for repo in self.repos if repo.pushed_at is None])
+
+    def test_empty(self):
+        catalog = RepoCatalog()
+        self.assertEqual(len(catalog), 0)
+        self.assertEqual(catalog.query(owner="octocat", pushed_since=datetime(2023, 1, 1)), [])
+
+
+class FakeRepoCatalogTest(FakeGithubTestCase):
+    """
+    Queries the catalog of the repositories of the fake GitHub API
+    """
+
+    scenario = Scenario(repos=5)
+
+    def test_single_listing(self):
+        repos = list(self.github.get_user().get_repos())
+        self.fake.reset_counts()
+        catalog = RepoCatalog(self.github.get_user().get_repos())
+        requests = sum(self.fake.request_counts.values())
+
+        for private, year in itertools.product((None, True, False),
+                                               (self.scenario.year - 1, self.scenario.year)):
+            criteria = dict(owner=self.scenario.login, private=private, created_year=year)
+            self.assertEqual([repo.full_name for repo in catalog.query(**criteria)],
+                             [repo.full_name for repo in repos if matches(repo, **criteria)])
+        self.assertEqual(len(catalog.query(private=True)), 1)
+        # Queries are answered without any request
+        self.assertEqual(sum(self.fake.request_counts.values()), requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests of api.commit_details.AsyncCommitFetcher, run offline against the fake GitHub API of
+the benchmarks (see benchmarks.fake_github): the language statistics built with it are
+compared with those built with the thread pool, along with the requests each one makes.
+
+Example:
+    python -m unittest tests.test_commit_details
+"""
+
+import threading
+import unittest
+from benchmarks.fake_github import Scenario
+from api.commit_details import AsyncCommitFetcher, aiohttp_available
+from api.sources import RestSource
+from api.user import UserData
+from tests.fake_case import FakeGithubTestCase
+
+
+@unittest.skipUnless(aiohttp_available(), "aiohttp is not installed")
+class AsyncCommitFetcherTest(FakeGithubTestCase):
+    """
+    Fetches the details of the commits of a scenario asynchronously
+    """
+
+    scenario = Scenario(repos=3, commits_per_repo=60)
+
+    def languages(self, commit_fetcher=None):
+        """
+        Returns the languages of the user of the scenario and the requests of commit
+        details they took
+        """
+        user = UserData(self.github, self.scenario.login, self.scenario.year, True, False,
+                        source=RestSource(), commit_fetcher=commit_fetcher)
+        user.get_contributed_repos()
+        self.fake.reset_counts()
+        languages = user.get_languages_user()
+        return languages, self.fake.request_counts["commit"]
+
+    def test_matches_thread_pool(self):
+        fetcher = AsyncCommitFetcher("test", self.fake.base_url, max_in_flight=8)
+        languages, requests = self.languages(fetcher)
+        self.assertEqual((languages, requests), self.languages())
+        commits = self.scenario.repos * self.scenario.commits_per_repo \
+            // self.scenario.author_every
+        self.assertEqual(requests, commits)
+        self.assertEqual(fetcher.requests, commits)
+
+    def test_consumer_thread(self):
+        fetcher = AsyncCommitFetcher("test", self.fake.base_url, max_in_flight=4)
+        repo = self.github.get_repo(f"{self.scenario.login}/repo0")
+        commits = [(repo.full_name, c.sha) for c in repo.get_commits()[:10]]
+        threads = set()
+        results = []
+
+        def on_result(full_name, sha, files):
+            threads.add(threading.get_ident())
+            results.append((full_name, sha, len(files)))
+
+        fetcher.fetch(commits + commits[:3], on_result)
+        # Off the calling thread (and its event loop), one thread for every result
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual(sorted(results), sorted(
+            (full_name, sha, self.scenario.files_per_commit)
+            for full_name, sha in commits + commits[:3]))
+        self.assertEqual(fetcher.duplicates, 3)
+
+    def test_callback_error(self):
+        fetcher = AsyncCommitFetcher("test", self.fake.base_url)
+        repo = self.github.get_repo(f"{self.scenario.login}/repo0")
+
+        def on_result(full_name, sha, files):
+            raise ValueError(sha)
+
+        with self.assertRaises(ValueError):
+            fetcher.fetch([(repo.full_name, c.sha) for c in repo.get_commits()[:5]],
+                          on_result)
+
+
+if __name__ == "__main__":
+    unittest.main()
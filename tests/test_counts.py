@@ -0,0 +1,145 @@
+"""
+Tests of api.counts: the Link headers and search totals are read from a stubbed requester,
+and the counts of commits and issues are compared with the scenario of the fake GitHub API
+of the benchmarks (see benchmarks.fake_github).
+
+Example:
+    python -m unittest tests.test_counts
+"""
+
+import unittest
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+from benchmarks.fake_github import Scenario
+from api.counts import last_page, count_list, count_search, count_commits, count_issues
+from tests.fake_case import FakeGithubTestCase
+
+URL = "https://api.github.com/repos/owner/name/commits"
+
+
+def link(**pages):
+    """
+    Returns a Link header with a link per relation, such as link(next=2, last=5)
+    """
+    return ", ".join(f'<{URL}?per_page=1&page={page}>; rel="{rel}"'
+                     for rel, page in pages.items())
+
+
+class StubRequester:
+    """
+    Answers every request with the same headers and data, recording the requests
+    """
+
+    def __init__(self, headers: dict, data):
+        self.headers = headers
+        self.data = data
+        self.requests = []
+
+    def requestJsonAndCheck(self, verb, url, parameters=None):
+        self.requests.append((verb, url, parameters))
+        return self.headers, self.data
+
+
+def stub(headers: dict, data):
+    """
+    Returns an object with the requester of a PyGithub object
+    """
+    return SimpleNamespace(_requester=StubRequester(headers, data))
+
+
+class LastPageTest(unittest.TestCase):
+    """
+    Reads the last page of Link headers
+    """
+
+    def test_last(self):
+        self.assertEqual(last_page(link(next=2, last=57)), 57)
+
+    def test_spaces(self):
+        self.assertEqual(last_page(f'<{URL}?page=3>;rel = "last"'), 3)
+
+    def test_without_last(self):
+        self.assertIsNone(last_page(link(prev=56, first=1)))
+
+    def test_last_without_page(self):
+        self.assertIsNone(last_page(f'<{URL}?per_page=1>; rel="last"'))
+
+
+class CountListTest(unittest.TestCase):
+    """
+    Counts lists from a stubbed requester
+    """
+
+    def test_last_page(self):
+        github_object = stub({"link": link(next=2, last=42)}, [{}])
+        self.assertEqual(count_list(github_object, URL, {"author": "me"}), 42)
+        self.assertEqual(github_object._requester.requests,
+                         [("GET", URL, {"author": "me", "per_page": 1})])
+
+    def test_single_page(self):
+        self.assertEqual(count_list(stub({}, [{}]), URL), 1)
+
+    def test_empty(self):
+        self.assertEqual(count_list(stub({}, []), URL), 0)
+
+    def test_without_last(self):
+        self.assertEqual(count_list(stub({"link": link(prev=1, first=1)}, [{}]), URL), 1)
+
+    def test_search_total(self):
+        github_object = stub({}, {"total_count": 1234, "items": [{}]})
+        self.assertEqual(count_search(github_object, "issues", "repo:owner/name"), 1234)
+        self.assertEqual(github_object._requester.requests, [
+            ("GET", "/search/issues", {"q": "repo:owner/name", "per_page": 1})])
+
+
+class CountsTest(FakeGithubTestCase):
+    """
+    Counts the commits and issues of the fake GitHub API
+    """
+
+    scenario = Scenario(repos=1, commits_per_repo=100, issues=250)
+
+    def setUp(self):
+        super().setUp()
+        self.repo = self.github.get_repo(f"{self.scenario.login}/repo0")
+        self.fake.reset_counts()
+
+    def test_commits(self):
+        start, end = datetime(2023, 1, 1), datetime(2024, 1, 1)
+        self.assertEqual(count_commits(self.repo), 100)
+        self.assertEqual(count_commits(self.repo, start, end, self.scenario.login), 50)
+        self.assertEqual(self.fake.request_counts["commits"], 2)
+
+    def test_commits_empty(self):
+        self.assertEqual(count_commits(self.repo, author="nobody"), 0)
+        self.assertEqual(count_commits(self.repo, since=datetime(2024, 1, 1)), 0)
+
+    def test_commits_single(self):
+        self.assertEqual(count_commits(self.repo, until=datetime(2023, 1, 3)), 1)
+
+    def test_issues(self):
+        # 250 issues spread over 2022 and 2023: 125 a year, a third of them closed
+        requests = Counter()
+        self.assertEqual(count_issues(self.repo, 2023, requests, "issues"), (125, 42))
+        self.assertEqual(requests["issues"], 2)
+        self.assertEqual(count_issues(self.repo, 2021), (0, 0))
+        self.assertEqual(self.fake.request_counts["search_issues"], 3)
+
+
+class CountIssuesPageTest(FakeGithubTestCase):
+    """
+    Counts the issues of a repository whose issues of the year fit in a single page
+    """
+
+    scenario = Scenario(repos=1, issues=10)
+
+    def test_single_request(self):
+        requests = Counter()
+        repo = self.github.get_repo(f"{self.scenario.login}/repo0")
+        self.assertEqual(count_issues(repo, 2023, requests, "issues"), (5, 2))
+        self.assertEqual(requests["issues"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
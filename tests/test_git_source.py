@@ -0,0 +1,107 @@
+"""
+Tests of api.git_source, run fully offline against local repositories created with git
+init in a temporary directory.
+
+Example:
+    python -m unittest tests.test_git_source
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+from api.git_source import GitSource
+from utils.commit_store import CommitStore
+
+USER_EMAIL = "me@example.com"
+OTHER_EMAIL = "other@example.com"
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class GitSourceTest(unittest.TestCase):
+    """
+    Reads the commits of a local repository with a GitSource
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.origin = os.path.join(self.tmp.name, "origin")
+        self.git("init", "--quiet", "--initial-branch=main", self.origin, cwd=self.tmp.name)
+
+        # Outside of the year
+        self.commit({"old.py": 5}, USER_EMAIL, "2022-12-31T23:00:00")
+        self.commit({"main.py": 3, "app.js": 2}, USER_EMAIL, "2023-03-06T10:00:00")
+        self.commit({"main.py": 1}, OTHER_EMAIL, "2023-03-07T11:00:00")
+        self.commit({"lib.rs": 4}, "ME@example.com", "2023-03-07T12:00:00")
+
+        self.repo = SimpleNamespace(id=1, full_name="owner/origin", clone_url=self.origin,
+                                    private=False)
+        self.source = GitSource(os.path.join(self.tmp.name, "clones"), [USER_EMAIL])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def git(self, *args, cwd=None, env=None):
+        subprocess.run(["git", *args], cwd=cwd or self.origin, check=True,
+                       capture_output=True, env=env)
+
+    def commit(self, files: dict, email: str, date: str):
+        """
+        Commits files with a number of added lines each, by an author at a date (UTC)
+        """
+        for filename, lines in files.items():
+            with open(os.path.join(self.origin, filename), "a", encoding="utf-8") as file:
+                file.write("line\n" * lines)
+        self.git("add", *files)
+        env = dict(os.environ, GIT_AUTHOR_NAME="author", GIT_AUTHOR_EMAIL=email,
+                   GIT_COMMITTER_NAME="author", GIT_COMMITTER_EMAIL=email,
+                   GIT_AUTHOR_DATE=f"{date}+0000", GIT_COMMITTER_DATE=f"{date}+0000")
+        self.git("commit", "--quiet", "-m", f"Commit by {email}", env=env)
+
+    def scan(self, store: CommitStore):
+        return self.source.scan_repo_commits("me", self.repo, datetime(2023, 1, 1),
+                                             datetime(2024, 1, 1), store)
+
+    def test_counts_and_days(self):
+        data = self.scan(CommitStore())
+        self.assertEqual(data["total_count"], 3)
+        self.assertEqual(data["total_count_author"], 2)
+        self.assertEqual(data["commit_days"], {"2023-03-06": 1, "2023-03-07": 1})
+        # Monday 10:00 and Tuesday 12:00
+        self.assertEqual(data["commit_hours"], {"10": 1, "36": 1})
+
+    def test_numstat_languages(self):
+        store = CommitStore()
+        self.scan(store)
+        indexes = store.commits("owner/origin", "me")
+        self.assertEqual(len(indexes), 2)
+        self.assertEqual(store.languages(indexes),
+                         {"Python": 3, "JavaScript": 2, "Rust": 4})
+
+    def test_fetches_new_commits(self):
+        self.scan(CommitStore())
+        self.commit({"main.py": 2}, USER_EMAIL, "2023-03-08T09:00:00")
+        data = self.scan(CommitStore())
+        self.assertEqual(data["total_count_author"], 3)
+        self.assertEqual(data["commit_days"]["2023-03-08"], 1)
+
+    def test_token_not_on_command_line(self):
+        source = GitSource(os.path.join(self.tmp.name, "clones"), [USER_EMAIL], "secret")
+        with mock.patch("api.git_source.subprocess.run") as run:
+            run.return_value = SimpleNamespace(returncode=0, stdout="", stderr="")
+            source.mirror("owner/other", "https://github.com/owner/other.git")
+        args, kwargs = run.call_args
+        self.assertFalse(any("secret" in arg or "Authorization" in arg for arg in args[0]))
+        env = kwargs["env"]
+        count = int(env["GIT_CONFIG_COUNT"])
+        self.assertEqual(env[f"GIT_CONFIG_KEY_{count - 1}"],
+                         "http.https://github.com/.extraHeader")
+        self.assertTrue(env[f"GIT_CONFIG_VALUE_{count - 1}"].startswith("Authorization: Basic"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests of utils.github_helpers: language snapshots built from a small excerpt of linguist's
+languages.yml are written to a temporary directory, and filenames are looked up in them.
+
+Example:
+    python -m unittest tests.test_github_helpers
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+from utils.github_helpers import (SNAPSHOT_MAGIC, github_languages, folded_extensions,
+                                  write_languages_snapshot, read_languages_snapshot,
+                                  get_language_from_filename)
+
+# Excerpt of linguist's languages.yml
+LANGUAGES = {
+    "C": {"type": "programming", "extensions": [".c", ".h"]},
+    "C++": {"type": "programming", "extensions": [".cpp", ".C", ".hpp"]},
+    "GCC Machine Description": {"type": "programming", "extensions": [".md"]},
+    "Markdown": {"type": "prose", "extensions": [".md", ".markdown"]},
+    "Python": {"type": "programming", "extensions": [".py", ".pyw"]},
+    "Rust": {"type": "programming", "extensions": [".rs", ".rs.in"]},
+    "JSON": {"type": "data", "extensions": [".json"]},
+}
+
+
+class LanguageSnapshotTest(unittest.TestCase):
+    """
+    Looks filenames up in snapshots of the excerpt
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp.name, "languages.bin")
+        self.mapping = github_languages(languages=LANGUAGES)
+        self.folded = folded_extensions(languages=LANGUAGES)
+        write_languages_snapshot(self.mapping, self.filepath, "test", self.folded)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def language(self, filename: str):
+        """
+        Returns the language of a filename in the snapshot
+        """
+        return get_language_from_filename(filename, self.filepath)
+
+    def test_mapping(self):
+        self.assertEqual(self.mapping[".md"], "GCC Machine Description")
+        self.assertNotIn(".json", self.mapping)
+        # Claimed in another case or by a language that isn't programming
+        self.assertEqual(self.folded, {".h", ".cpp", ".hpp", ".py", ".pyw", ".rs", ".rs.in"})
+
+    def test_round_trip(self):
+        self.assertEqual(read_languages_snapshot(self.filepath),
+                         ("test", self.mapping, self.folded))
+
+    def test_exact(self):
+        self.assertEqual(self.language("src/main.c"), "C")
+        self.assertEqual(self.language("src/main.C"), "C++")
+        self.assertEqual(self.language("docs/gcc.md"), "GCC Machine Description")
+        self.assertEqual(self.language("src/lib.rs.in"), "Rust")
+        self.assertIsNone(self.language("Makefile"))
+
+    def test_other_case(self):
+        self.assertEqual(self.language("MAIN.PY"), "Python")
+        self.assertEqual(self.language("lib.RS.IN"), "Rust")
+        self.assertEqual(self.language("main.Cpp"), "C++")
+        # Markdown also claims .md, and C++ .C
+        self.assertIsNone(self.language("README.MD"))
+        self.assertIsNone(self.language("main.Md"))
+
+    def test_version_1(self):
+        # Snapshots without the folded field only match extensions exactly
+        body = "\n".join(f"{extension}\t{language}"
+                         for extension, language in sorted(self.mapping.items()))
+        with open(self.filepath, "wb") as file:
+            file.write(struct.pack("<4sHHI", SNAPSHOT_MAGIC, 1, 2, len(self.mapping)))
+            file.write(b"v1" + body.encode("utf-8"))
+        self.assertEqual(read_languages_snapshot(self.filepath), ("v1", self.mapping, set()))
+        self.assertEqual(self.language("main.py"), "Python")
+        self.assertIsNone(self.language("MAIN.PY"))
+
+
+if __name__ == "__main__":
+    unittest.main()
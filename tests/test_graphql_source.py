@@ -0,0 +1,103 @@
+"""
+Tests of api.sources.GraphQLSource, run offline against the fake GitHub API of the
+benchmarks (see benchmarks.fake_github), which also answers the GraphQL queries. The
+commit data of the GraphQL source is compared with the one of the REST source on the
+same scenario.
+
+Example:
+    python -m unittest tests.test_graphql_source
+"""
+
+import contextlib
+import io
+import unittest
+from benchmarks.fake_github import FakeGithub, Scenario
+from api.sources import RestSource, GraphQLSource
+from api.user import UserData
+from githubwrapped import render_commits
+from tests.fake_case import FakeGithubTestCase
+
+
+class GraphQLSourceTest(FakeGithubTestCase):
+    """
+    Builds the commit data of a scenario with the GraphQL and the REST sources
+    """
+
+    scenario = Scenario(repos=5, commits_per_repo=100)
+
+    def test_matches_rest(self):
+        source = GraphQLSource("test", self.fake.base_url + FakeGithub.GRAPHQL_PATH)
+        graphql = self.repo_commit(source)
+        self.assertEqual(graphql, self.repo_commit(RestSource()))
+        # One query for the contributions of the year, one for the history counts
+        self.assertEqual(source.query_count, 2)
+        self.assertEqual(self.fake.request_counts["graphql"], 2)
+
+    def test_monthly_windows(self):
+        # More days with commits than a single window of 31 contributions could list
+        source = GraphQLSource("test", self.fake.base_url + FakeGithub.GRAPHQL_PATH)
+        days = [days for _, _, days in self.repo_commit(source).values()]
+        self.assertTrue(any(len(repo_days) > 31 for repo_days in days))
+        self.assertEqual(sum(sum(repo_days.values()) for repo_days in days),
+                         self.scenario.repos * self.scenario.commits_per_repo
+                         // self.scenario.author_every)
+
+    def test_rest_fallback(self):
+        source = GraphQLSource("test", self.fake.base_url + "/missing")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            graphql = self.repo_commit(source)
+        self.assertIn("falling back to the REST API", output.getvalue())
+        self.assertEqual(graphql, self.repo_commit(RestSource()))
+
+
+class GraphQLSourceRestrictedTest(FakeGithubTestCase):
+    """
+    Builds the report of a user with contributions to private repositories the token
+    can't see
+    """
+
+    scenario = Scenario(repos=3, restricted_contributions=7)
+
+    def test_restricted_count(self):
+        source = GraphQLSource("test", self.fake.base_url + FakeGithub.GRAPHQL_PATH)
+        user = UserData(self.github, self.scenario.login, self.scenario.year, True, False,
+                        source=source)
+        self.assertEqual(user.restricted_count, 7)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            render_commits({"total_count": user.total_count,
+                            "public_count": user.public_count,
+                            "restricted_count": user.restricted_count})
+        self.assertIn("+7 private contributions", output.getvalue())
+
+    def test_rest_source(self):
+        user = UserData(self.github, self.scenario.login, self.scenario.year, True, False,
+                        source=RestSource())
+        self.assertEqual(user.restricted_count, 0)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            render_commits({"total_count": 1, "public_count": 1})
+        self.assertNotIn("private contributions", output.getvalue())
+
+
+class GraphQLSourceManyReposTest(FakeGithubTestCase):
+    """
+    Builds the commit data of a user who contributed to more repositories in a month than
+    a collection can list
+    """
+
+    # Every commit made by the user, in April and October of every repository
+    scenario = Scenario(repos=110, commits_per_repo=2, author_every=1)
+
+    def test_rest_fallback(self):
+        source = GraphQLSource("test", self.fake.base_url + FakeGithub.GRAPHQL_PATH)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            graphql = self.repo_commit(source)
+        self.assertIn("falling back to the REST API", output.getvalue())
+        self.assertEqual(graphql, self.repo_commit(RestSource()))
+
+
+if __name__ == "__main__":
+    unittest.main()
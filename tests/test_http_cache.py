@@ -0,0 +1,93 @@
+"""
+Tests of utils.http_cache.ResponseCache: responses are stored in a cache in a temporary
+directory, and the commits of the fake GitHub API of the benchmarks (see
+benchmarks.fake_github) are fetched through it from several threads.
+
+Example:
+    python -m unittest tests.test_http_cache
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_github import Scenario
+from utils.connection import GithubConnection
+from utils.helpers import connect, disconnect
+from utils.http_cache import ResponseCache, CachedResponse
+from tests.fake_case import FakeGithubTestCase
+
+
+class ResponseCacheTest(unittest.TestCase):
+    """
+    Stores responses and counts the requests served through the cache
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_store(self):
+        response = CachedResponse(200, {"ETag": '"a"'}, '{"sha": "a"}', '"a"', None, False)
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.store("key", response)
+        self.assertEqual(self.cache.get("key"), response)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_record_from_threads(self):
+        def record(i):
+            for _ in range(2000):
+                self.cache.record(("hits", "revalidated", "misses")[i % 3])
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(record, range(6)))
+        self.assertEqual((self.cache.hits, self.cache.revalidated, self.cache.misses),
+                         (4000, 4000, 4000))
+
+
+class CachedConnectionTest(FakeGithubTestCase):
+    """
+    Fetches the commits of the fake GitHub API through a response cache
+    """
+
+    scenario = Scenario(repos=1, commits_per_repo=60)
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            disconnect(self.github)
+            self.github = connect("test", os.path.join(self.tmp.name, "cache.db"),
+                                  max_rate=1e6, base_url=self.fake.base_url)
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def test_commits(self):
+        repo = self.github.get_repo(f"{self.scenario.login}/repo0")
+        shas = [commit.sha for commit in repo.get_commits()]
+        cache = GithubConnection.cache
+        misses = cache.misses
+
+        self.fake.reset_counts()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(2):
+                list(executor.map(lambda sha: repo.get_commit(sha).files, shas))
+
+        # Commits addressed by SHA never change: requested once, then served from the cache
+        self.assertEqual(self.fake.request_counts["commit"], len(shas))
+        self.assertEqual(cache.misses - misses, len(shas))
+        self.assertEqual(cache.hits, len(shas))
+
+
+if __name__ == "__main__":
+    unittest.main()
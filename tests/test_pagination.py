@@ -0,0 +1,140 @@
+"""
+Tests of api.pagination: the items of a year are read from stubbed paginated lists, around
+the pages where the year starts and ends, counting the pages requested.
+
+Example:
+    python -m unittest tests.test_pagination
+"""
+
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from api.pagination import iter_year_newest_first, iter_year_oldest_first
+
+YEAR = 2023
+PER_PAGE = 10
+
+
+class StubPaginatedList:
+    """
+    Pages of a list of dates, recording the pages requested
+    """
+
+    def __init__(self, dates: list, per_page: int = PER_PAGE):
+        self.dates = dates
+        self.per_page = per_page
+        self.pages = []
+
+    @property
+    def totalCount(self):
+        return len(self.dates)
+
+    def get_page(self, page: int):
+        self.pages.append(page)
+        return self.dates[page * self.per_page:(page + 1) * self.per_page]
+
+
+def days(first: datetime, count: int):
+    """
+    Returns count dates a day apart from first, oldest first
+    """
+    return [first + timedelta(days=i) for i in range(count)]
+
+
+class NewestFirstTest(unittest.TestCase):
+    """
+    Walks lists sorted from the newest to the oldest item
+    """
+
+    def walk(self, dates: list):
+        """
+        Returns the dates of the year of a newest-first list, the pages requested and the
+        requests counted
+        """
+        paginated = StubPaginatedList(sorted(dates, reverse=True))
+        requests = Counter()
+        items = list(iter_year_newest_first(paginated, YEAR, lambda d: d, requests, "forks"))
+        return items, paginated.pages, requests["forks"]
+
+    def test_first_page_past_year(self):
+        items, pages, requests = self.walk(days(datetime(YEAR - 2, 3, 1), 35))
+        self.assertEqual(items, [])
+        self.assertEqual((pages, requests), ([0], 1))
+
+    def test_straddles_new_year(self):
+        # 15 items of the next year, 20 of the year and 15 of the previous one: the third
+        # page straddles January 1 and the walk stops there
+        dates = days(datetime(YEAR - 1, 12, 17), 15) + days(datetime(YEAR, 6, 1), 20) + \
+            days(datetime(YEAR + 1, 1, 1), 15)
+        items, pages, requests = self.walk(dates)
+        self.assertEqual(items, sorted(days(datetime(YEAR, 6, 1), 20), reverse=True))
+        self.assertEqual((pages, requests), ([0, 1, 2, 3], 4))
+
+    def test_page_ends_on_new_year(self):
+        # The last item of the year closes a page: the next page is needed to know
+        dates = days(datetime(YEAR - 1, 12, 1), 10) + days(datetime(YEAR, 1, 1), 20)
+        items, pages, _ = self.walk(dates)
+        self.assertEqual(len(items), 20)
+        self.assertEqual(pages, [0, 1, 2])
+
+    def test_short_last_page(self):
+        items, pages, _ = self.walk(days(datetime(YEAR, 1, 1), 25))
+        self.assertEqual(len(items), 25)
+        self.assertEqual(pages, [0, 1, 2])
+
+    def test_full_last_page(self):
+        # Nothing tells the last page is full: an empty page ends the walk
+        items, pages, _ = self.walk(days(datetime(YEAR, 1, 1), 20))
+        self.assertEqual(len(items), 20)
+        self.assertEqual(pages, [0, 1, 2])
+
+    def test_empty(self):
+        self.assertEqual(self.walk([]), ([], [0], 1))
+
+
+class OldestFirstTest(unittest.TestCase):
+    """
+    Walks lists sorted from the oldest to the newest item, backwards from the last page
+    """
+
+    def walk(self, dates: list):
+        """
+        Returns the dates of the year of an oldest-first list, the pages requested and the
+        requests counted (with the one for the total)
+        """
+        paginated = StubPaginatedList(sorted(dates))
+        requests = Counter()
+        items = list(iter_year_oldest_first(paginated, YEAR, lambda d: d, PER_PAGE,
+                                            requests, "stargazers"))
+        return items, paginated.pages, requests["stargazers"]
+
+    def test_last_page_straddles_new_year(self):
+        # 25 items: the last page (20 to 24) starts in the previous year
+        dates = days(datetime(YEAR - 1, 12, 1), 23) + days(datetime(YEAR, 1, 1), 2)
+        items, pages, requests = self.walk(dates)
+        self.assertEqual(items, sorted(days(datetime(YEAR, 1, 1), 2), reverse=True))
+        self.assertEqual((pages, requests), ([2], 2))
+
+    def test_next_year(self):
+        # The newest items are skipped, and the walk goes on until the previous year
+        dates = days(datetime(YEAR - 1, 12, 30), 2) + days(datetime(YEAR, 3, 1), 20) + \
+            days(datetime(YEAR + 1, 1, 1), 12)
+        items, pages, requests = self.walk(dates)
+        self.assertEqual(items, sorted(days(datetime(YEAR, 3, 1), 20), reverse=True))
+        self.assertEqual((pages, requests), ([3, 2, 1, 0], 5))
+
+    def test_whole_list_in_year(self):
+        items, pages, _ = self.walk(days(datetime(YEAR, 1, 1), 30))
+        self.assertEqual(len(items), 30)
+        self.assertEqual(pages, [2, 1, 0])
+
+    def test_list_past_year(self):
+        items, pages, _ = self.walk(days(datetime(YEAR - 2, 1, 1), 30))
+        self.assertEqual((items, pages), ([], [2]))
+
+    def test_empty(self):
+        self.assertEqual(self.walk([]), ([], [], 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
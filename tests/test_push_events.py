@@ -0,0 +1,284 @@
+"""
+Tests of api.push_events: push events built from the commits of the fake GitHub API of the
+benchmarks (see benchmarks.fake_github) are replayed against a state store with a scanned
+repository.
+
+Example:
+    python -m unittest tests.test_push_events
+"""
+
+import contextlib
+import copy
+import hashlib
+import hmac
+import io
+import json
+import os
+import tempfile
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from benchmarks.fake_github import Scenario
+from api.push_events import PushIngestor, WebhookReceiver
+from utils.state_store import StateStore, empty_repo_state
+from tests.fake_case import FakeGithubTestCase
+
+YEAR = 2023
+REPO_ID = "1"
+# After the scan of the repository, in the state store
+SCANNED_AT = datetime(YEAR, 12, 1, tzinfo=timezone.utc)
+PUSHED_AT = "2024-01-01T00:10:00Z"
+
+
+def _iso(date: datetime):
+    """
+    Returns a date as the payloads give it
+    """
+    return date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class PushEventsTestCase(FakeGithubTestCase):
+    """
+    Builds pushes of the commits of the fake GitHub API, with a state store where the
+    first repository has been scanned
+    """
+
+    scenario = Scenario(repos=2, commits_per_repo=100)
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_store = StateStore(os.path.join(self.tmp.name, "state.json"))
+        self.state_store.set_repos(self.scenario.login, YEAR, {REPO_ID: dict(
+            empty_repo_state(f"{self.scenario.login}/repo0", False),
+            scanned_at=SCANNED_AT.isoformat())})
+        self.ingestor = PushIngestor(self.state_store, self.scenario.login,
+                                     github_instance=self.github)
+        # Oldest first
+        self.commits = list(reversed(list(
+            self.github.get_repo(f"{self.scenario.login}/repo0").get_commits())))
+        self.fake.reset_counts()
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def webhook(self, first: int, last: int, repo: int = 0, forced: bool = False):
+        """
+        Returns the payload of a push webhook of the commits [first, last) of a repository
+        """
+        commits = self.commits[first:last]
+        return {
+            "ref": "refs/heads/main",
+            "before": self.commits[first - 1].sha,
+            "after": commits[-1].sha,
+            "forced": forced,
+            "repository": {"id": repo + 1, "full_name": f"{self.scenario.login}/repo{repo}",
+                           "private": False, "default_branch": "main",
+                           "pushed_at": PUSHED_AT},
+            "commits": [{
+                "id": c.sha,
+                "timestamp": _iso(c.commit.author.date),
+                "author": {"username": c.author.login, "email": c.commit.author.email}
+            } for c in commits]
+        }
+
+    def event(self, first: int, last: int, listed: int = 20):
+        """
+        Returns a PushEvent of the Events API of the commits [first, last) of the first
+        repository, listing at most the newest listed of them
+        """
+        commits = self.commits[first:last]
+        return {
+            "type": "PushEvent",
+            "public": True,
+            "created_at": PUSHED_AT,
+            "repo": {"id": 1, "name": f"{self.scenario.login}/repo0"},
+            "payload": {
+                "ref": "refs/heads/main",
+                "size": len(commits),
+                "before": self.commits[first - 1].sha,
+                "head": commits[-1].sha,
+                "commits": [{"sha": c.sha, "author": {"email": c.commit.author.email}}
+                            for c in commits[-listed:]]
+            }
+        }
+
+    def state(self, year: int = YEAR):
+        """
+        Returns the stored state of the first repository in a year, or None
+        """
+        return self.state_store.get_repos(self.scenario.login, year).get(REPO_ID)
+
+    def ingest(self, *payloads):
+        """
+        Replays payloads, returning the counts
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.ingestor.ingest_payloads(payloads)
+
+
+class PushIngestorTest(PushEventsTestCase):
+    """
+    Replays pushes of the last commits of the year to a scanned repository
+    """
+
+    def test_apply(self):
+        counts = self.ingest(self.webhook(90, 100))
+        self.assertEqual(counts["applied"], 10)
+        state = self.state()
+        self.assertEqual((state["total_count"], state["total_count_author"]), (10, 5))
+        self.assertEqual(sum(state["commit_days"].values()), 5)
+        self.assertEqual(state["head_sha"], self.commits[98].sha)
+        # The changed files of the commits of the user only
+        self.assertEqual(self.fake.request_counts["commit"], 5)
+        self.assertEqual(sum(changes for _, changes in state["languages"]),
+                         sum(f.changes for c in self.commits[90:100:2]
+                             for f in self.github.get_repo(f"{self.scenario.login}/repo0")
+                             .get_commit(c.sha).files))
+
+    def test_idempotent(self):
+        payload = self.webhook(90, 100)
+        self.ingest(payload)
+        state = copy.deepcopy(self.state())
+        counts = self.ingest(payload, self.event(90, 100))
+        self.assertEqual(counts["applied"], 0)
+        self.assertEqual(counts["skipped"], 20)
+        self.assertEqual(self.state(), state)
+
+    def test_unscanned(self):
+        counts = self.ingest(self.webhook(90, 100, repo=1))
+        self.assertEqual(counts["unscanned"], 10)
+        self.assertEqual(counts["applied"], 0)
+        self.assertEqual(self.fake.request_counts["commit"], 0)
+        self.assertEqual(set(self.state_store.get_repos(self.scenario.login, YEAR)),
+                         {REPO_ID})
+
+    def test_older_than_scan(self):
+        payload = self.webhook(90, 100)
+        payload["repository"]["pushed_at"] = _iso(SCANNED_AT)
+        self.assertEqual(self.ingest(payload)["skipped"], 10)
+        self.assertEqual(self.state()["total_count"], 0)
+
+    def test_forced(self):
+        counts = self.ingest(self.webhook(90, 100, forced=True))
+        self.assertEqual(counts["ignored"], 1)
+        self.assertEqual(self.state()["total_count"], 0)
+
+    def test_other_branch(self):
+        payload = self.webhook(90, 100)
+        payload["ref"] = "refs/heads/feature"
+        self.assertEqual(self.ingest(payload)["ignored"], 1)
+
+    def test_year_of_commit(self):
+        # Pushed on January 1, the December commits count in the year they were made
+        counts = self.ingest(self.webhook(95, 100))
+        self.assertEqual(counts["applied"], 5)
+        self.assertEqual(self.state()["total_count"], 5)
+        self.assertIsNone(self.state(YEAR + 1))
+        self.assertTrue(all(day.startswith(f"{YEAR}-12-")
+                            for day in self.state()["commit_days"]))
+
+    def test_event_dates(self):
+        # The Events API gives no dates: they are requested, not taken from the push
+        counts = self.ingest(self.event(95, 100))
+        self.assertEqual(counts["applied"], 5)
+        self.assertEqual(self.fake.request_counts["commit"], 5)
+        self.assertIsNone(self.state(YEAR + 1))
+        self.assertEqual(self.state()["total_count"], 5)
+
+    def test_event_without_github(self):
+        ingestor = PushIngestor(self.state_store, self.scenario.login)
+        counts = ingestor.ingest(self.event(95, 100))
+        self.assertEqual(counts["undated"], 5)
+        self.assertEqual(self.state()["total_count"], 0)
+
+    def test_truncated(self):
+        # 25 commits, of which the event lists 20: the push is requested as a comparison
+        counts = self.ingest(self.event(75, 100))
+        self.assertEqual(counts["applied"], 25)
+        self.assertEqual(counts["missing"], 0)
+        self.assertEqual(self.fake.request_counts["compare"], 1)
+        state = self.state()
+        self.assertEqual((state["total_count"], state["total_count_author"]), (25, 12))
+        self.assertEqual(self.fake.request_counts["commit"], 12)
+
+    def test_truncated_without_github(self):
+        ingestor = PushIngestor(self.state_store, self.scenario.login)
+        payload = self.webhook(75, 100)
+        payload["size"] = 25
+        payload["commits"] = payload["commits"][-20:]
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = ingestor.ingest(payload)
+        self.assertEqual(counts["missing"], 5)
+        self.assertEqual(counts["applied"], 20)
+
+    def test_replay_files(self):
+        for name, payload in (("1.json", self.webhook(90, 95)),
+                              ("2.json", [self.event(95, 100)])):
+            with open(os.path.join(self.tmp.name, name), "w", encoding="utf-8") as file:
+                json.dump(payload, file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = self.ingestor.ingest_path(self.tmp.name)
+        self.assertEqual(counts["applied"], 10)
+        self.assertEqual(StateStore(self.state_store.filepath).get_repos(
+            self.scenario.login, YEAR)[REPO_ID]["total_count"], 10)
+
+
+class WebhookReceiverTest(PushEventsTestCase):
+    """
+    Delivers pushes to a webhook receiver with a secret
+    """
+
+    SECRET = b"secret"
+
+    def setUp(self):
+        super().setUp()
+        self.receiver = WebhookReceiver(self.ingestor, port=0, secret=self.SECRET.decode())
+        self.receiver.start()
+
+    def tearDown(self):
+        self.receiver.stop()
+        super().tearDown()
+
+    def sign(self, body: bytes, secret: bytes = SECRET):
+        """
+        Returns the X-Hub-Signature-256 of a body
+        """
+        return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+    def test_signed(self):
+        body = json.dumps(self.webhook(90, 100)).encode()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status, response = self.receiver.receive("push", body, self.sign(body))
+        self.assertEqual(status, 200)
+        self.assertEqual(response["applied"], 10)
+
+    def test_bad_signature(self):
+        body = json.dumps(self.webhook(90, 100)).encode()
+        signature = self.sign(body)
+        tampered = signature[:-1] + ("1" if signature[-1] == "0" else "0")
+        for signature in (None, "", self.sign(body, b"other"), tampered):
+            self.assertEqual(self.receiver.receive("push", body, signature)[0], 401)
+        # The signature of another body
+        self.assertEqual(self.receiver.receive("push", body + b" ", self.sign(body))[0], 401)
+        self.assertEqual(self.state()["total_count"], 0)
+
+    def test_delivery(self):
+        body = json.dumps(self.webhook(90, 100)).encode()
+        for signature, status in (("sha256=0", 401), (self.sign(body), 200)):
+            request = urllib.request.Request(
+                self.receiver.base_url, body, method="POST",
+                headers={"X-GitHub-Event": "push", "X-Hub-Signature-256": signature})
+            try:
+                with contextlib.redirect_stdout(io.StringIO()), \
+                        urllib.request.urlopen(request) as response:
+                    self.assertEqual(response.status, status)
+            except urllib.error.HTTPError as e:
+                self.assertEqual(e.code, status)
+        self.assertEqual(self.state()["total_count"], 10)
+
+    def test_other_events(self):
+        body = b"{}"
+        self.assertEqual(self.receiver.receive("ping", body, self.sign(body))[0], 200)
+        self.assertEqual(self.receiver.receive("issues", body, self.sign(body))[0], 202)
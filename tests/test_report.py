@@ -0,0 +1,109 @@
+"""
+Tests of api.report.run_pipeline: stubbed producers finish in another order than the one
+of the report, and the events are checked as they arrive and in the order of the report.
+
+Example:
+    python -m unittest tests.test_report
+"""
+
+import threading
+import unittest
+from types import SimpleNamespace
+from api.report import run_pipeline, RESULT, PROGRESS, ERROR, DONE
+
+
+def kinds(events):
+    """
+    Returns the section and kind of events
+    """
+    return [(event.section, event.kind) for event in events]
+
+
+class RunPipelineTest(unittest.TestCase):
+    """
+    Runs producers that finish in the reverse order of the report
+    """
+
+    def setUp(self):
+        self.user = SimpleNamespace(progress=None)
+        # Set once the producer of a section is done
+        self.done = {"second": threading.Event(), "third": threading.Event()}
+
+    def stages(self, producers_signal: bool = True):
+        """
+        Returns a catalog stage, and a stage whose third producer finishes first and whose
+        first producer reports progress and only finishes last. Each producer waits for the
+        one after it, which signals it's done (or the events of the pipeline, if
+        producers_signal is False)
+        """
+        def _produce_catalog(user, emit):
+            emit("catalog", 3)
+
+        def _produce_first(user, emit):
+            self.done["second"].wait(5)
+            emit("first", 1)
+            user.progress("first", 1, 2)
+            emit("first", 2)
+
+        def _produce_second(user, emit):
+            self.done["third"].wait(5)
+            user.progress("second", 1, 1)
+            emit("second", "b")
+            if producers_signal:
+                self.done["second"].set()
+
+        def _produce_third(user, emit):
+            try:
+                raise ValueError("third")
+            finally:
+                if producers_signal:
+                    self.done["third"].set()
+
+        return ((_produce_catalog,), (_produce_first, _produce_second, _produce_third))
+
+    def test_arrival_order(self):
+        events = []
+        for event in run_pipeline(self.user, self.stages(producers_signal=False)):
+            events.append(event)
+            if event.kind == DONE and event.section in self.done:
+                self.done[event.section].set()
+        self.assertEqual(kinds(events), [
+            ("catalog", RESULT), ("catalog", DONE),
+            ("third", ERROR), ("third", DONE),
+            ("second", PROGRESS), ("second", RESULT), ("second", DONE),
+            ("first", RESULT), ("first", PROGRESS), ("first", RESULT), ("first", DONE)])
+        self.assertIsInstance(events[2].data, ValueError)
+        self.assertIsNone(self.user.progress)
+
+    def test_report_order(self):
+        events = list(run_pipeline(self.user, self.stages(), ordered=True))
+        # Held until the first producer is done, and the progress that would split the
+        # first section is dropped
+        self.assertEqual(kinds(events), [
+            ("catalog", RESULT), ("catalog", DONE),
+            ("second", PROGRESS),
+            ("first", RESULT), ("first", RESULT), ("first", DONE),
+            ("second", RESULT), ("second", DONE),
+            ("third", ERROR), ("third", DONE)])
+        self.assertEqual([event.data for event in events if event.section == "first"
+                          and event.kind == RESULT], [1, 2])
+
+    def test_stages(self):
+        # The producers of a stage start once the previous stage is done
+        started = []
+
+        def _produce_catalog(user, emit):
+            started.append("catalog")
+            emit("catalog", 0)
+
+        def _produce_next(user, emit):
+            started.append("next")
+            emit("next", started[:])
+
+        events = list(run_pipeline(self.user, ((_produce_catalog,), (_produce_next,)),
+                                   ordered=True))
+        self.assertEqual(events[2].data, ["catalog", "next"])
+
+
+if __name__ == "__main__":
+    unittest.main()
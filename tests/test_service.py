@@ -0,0 +1,142 @@
+"""
+Tests of api.service: reports are computed by a WrappedService against the fake GitHub API
+of the benchmarks (see benchmarks.fake_github), and served by a WrappedServer on a free
+port.
+
+Example:
+    python -m unittest tests.test_service
+"""
+
+import contextlib
+import io
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from benchmarks.fake_github import Scenario
+from api.service import WrappedService, WrappedServer, ServiceExposed
+from tests.fake_case import FakeGithubTestCase
+
+
+class BlockingService(WrappedService):
+    """
+    Counts the reports computed, each of them waiting for release to be set
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runs = 0
+        self.release = threading.Event()
+
+    def compute(self, username: str, year: int):
+        self.runs += 1
+        self.release.wait(10)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return super().compute(username, year)
+
+
+class ServiceTestCase(FakeGithubTestCase):
+    """
+    Serves the reports of the scenario
+    """
+
+    scenario = Scenario(repos=2, commits_per_repo=20)
+
+    def service(self, show_private: bool = False):
+        """
+        Returns a service of the fake GitHub API, closed at the end of the test
+        """
+        service = BlockingService(self.github, show_private, False)
+        self.addCleanup(service.close)
+        self.addCleanup(service.release.set)
+        return service
+
+    def get(self, url: str, authorization: str = None):
+        """
+        Returns the status and the JSON body of a GET request
+        """
+        headers = {"Authorization": authorization} if authorization else {}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) \
+                    as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+
+class WrappedServiceTest(ServiceTestCase):
+    """
+    Requests the same report several times at once
+    """
+
+    def test_coalesced(self):
+        service = self.service()
+        server = WrappedServer(service, port=0)
+        server.start()
+        self.addCleanup(server.stop)
+        url = f"{server.base_url}/wrapped/{self.scenario.login}/{self.scenario.year}"
+
+        results = [None, None]
+
+        def request(i):
+            results[i] = self.get(url)
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        # Both requests wait for the computation before it ends
+        deadline = time.monotonic() + 10
+        while service.status()["coalesced"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        service.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(service.runs, 1)
+        self.assertEqual(results[0], results[1])
+        status, report = results[0]
+        self.assertEqual(status, 200)
+        self.assertEqual((report["username"], report["errors"]), (self.scenario.login, {}))
+
+        # And the next one is served from the result cache
+        self.assertEqual(self.get(url), results[0])
+        self.assertEqual(service.runs, 1)
+        counters = service.status()
+        self.assertEqual((counters["requests"], counters["computations"],
+                          counters["coalesced"], counters["cache_hits"]), (3, 1, 1, 1))
+
+
+class WrappedServerPrivateTest(ServiceTestCase):
+    """
+    Serves reports with private repositories on loopback and network hosts
+    """
+
+    def test_network_host(self):
+        with self.assertRaises(ServiceExposed):
+            WrappedServer(self.service(show_private=True), host="0.0.0.0", port=0)
+        # Without private repositories, or only reachable from this machine
+        for service, host in ((self.service(), "0.0.0.0"),
+                              (self.service(show_private=True), "127.0.0.1"),
+                              (self.service(show_private=True), "localhost")):
+            server = WrappedServer(service, host=host, port=0)
+            server.start()
+            server.stop()
+
+    def test_secret(self):
+        server = WrappedServer(self.service(show_private=True), host="0.0.0.0", port=0,
+                               secret="secret")
+        server.start()
+        self.addCleanup(server.stop)
+        port = server.base_url.rsplit(":", 1)[1]
+        url = f"http://127.0.0.1:{port}/status"
+        for authorization in (None, "Bearer other", "secret"):
+            self.assertEqual(self.get(url, authorization)[0], 401)
+        status, counters = self.get(url, "Bearer secret")
+        self.assertEqual(status, 200)
+        self.assertEqual(counters["requests"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests of api.sources.SharedScanSource, through the batch and multi-year modes, run offline
+against the fake GitHub API of the benchmarks (see benchmarks.fake_github). The commit data
+of every report is compared with the one of a RestSource, and the requests the source
+reports with those the fake API received.
+
+Example:
+    python -m unittest tests.test_shared_scan
+"""
+
+import contextlib
+import io
+from benchmarks.fake_github import Scenario
+from api.sources import RestSource
+from api.batch import get_batch_users, scan_batch, print_batch_cost
+from api.multi_year import get_multi_year_users, scan_years
+from tests.fake_case import FakeGithubTestCase
+
+
+def commit_data(user):
+    """
+    Returns the counts and days of every repository of a report
+    """
+    return {repo.full_name: (data["total_count"], data["total_count_author"],
+                             data["commit_days"])
+            for repo, data in user.repo_commit.items()}
+
+
+class SharedScanTest(FakeGithubTestCase):
+    """
+    Builds the reports of several users and of several years from shared scans
+    """
+
+    scenario = Scenario(repos=3, commits_per_repo=100)
+
+    def test_multi_year(self):
+        users = get_multi_year_users(self.github, self.scenario.login, [2022, 2023],
+                                     False, False)
+        self.fake.reset_counts()
+        scan_years(users)
+        # Only the commits of the user are listed (50, in 2 pages), and counted every year
+        self.assertEqual(self.fake.request_counts["commits"], self.scenario.repos * (2 + 2))
+        shared, separate = users[0].source.get_request_counts(users)
+        self.assertEqual(shared, self.fake.request_counts["commits"])
+        # Each year on its own: a page (or two) and a count
+        self.assertEqual(separate, self.scenario.repos * ((1 + 1) + (2 + 1)))
+
+        self.assertEqual(commit_data(users[1]), self.repo_commit(RestSource()))
+        self.assertEqual(users[0].total_count, 0)
+
+    def test_batch(self):
+        logins = [self.scenario.login, "contributor1"]
+        users = get_batch_users(self.github, self.scenario.year, False, False, logins)
+        self.fake.reset_counts()
+        scan_batch(users)
+        # Every commit listed once (100, in 4 pages), without counts
+        self.assertEqual(self.fake.request_counts["commits"], self.scenario.repos * 4)
+        shared, separate = users[0].source.get_request_counts(users)
+        self.assertEqual(shared, self.fake.request_counts["commits"])
+        # Per user, the pages of their commits (50 and 10) and a count
+        self.assertEqual(separate, self.scenario.repos * ((2 + 1) + (1 + 1)))
+
+        for user in users:
+            self.assertEqual(commit_data(user), self.repo_commit(RestSource(), user.username))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_batch_cost(users)
+        self.assertIn(f"with {shared} requests, instead of an estimated {separate}",
+                      output.getvalue())
+
+    def test_batch_single_user(self):
+        users = get_batch_users(self.github, self.scenario.year, False, False,
+                                [self.scenario.login])
+        self.fake.reset_counts()
+        scan_batch(users)
+        # Only the commits of the user are listed, and counted once
+        self.assertEqual(self.fake.request_counts["commits"], self.scenario.repos * (2 + 1))
+        self.assertEqual(commit_data(users[0]), self.repo_commit(RestSource()))
+
+
+class BatchPrivateTest(FakeGithubTestCase):
+    """
+    Lists the repositories of the users of a batch, some of them private
+    """
+
+    scenario = Scenario(repos=5)
+
+    def test_batch_private(self):
+        for show_private in (False, True):
+            users = get_batch_users(self.github, self.scenario.year, show_private, False,
+                                    [self.scenario.login, "contributor1"])
+            for user in users:
+                private = [repo.full_name for repo in user.user_repos if repo.private]
+                # Only the owner of the token can list private repositories
+                self.assertEqual(bool(private), show_private and
+                                 user.username == self.scenario.login)
@@ -0,0 +1,181 @@
+"""
+Tests of api.snapshot: sections are written to snapshots in a temporary directory and read
+back through the memory-mapped reader, and the report of the fake GitHub API of the
+benchmarks (see benchmarks.fake_github) is rendered again from its snapshot.
+
+Example:
+    python -m unittest tests.test_snapshot
+"""
+
+import contextlib
+import dataclasses
+import io
+import os
+import tempfile
+import unittest
+from array import array
+from benchmarks.fake_github import Scenario
+from api.report import run_pipeline, RESULT, DONE
+from api.snapshot import (MAGIC, HEADER, SECTION, SnapshotWriter, SnapshotReader, report_event_json,
+                          read_report_events, read_calendar)
+from api.user import UserData
+from githubwrapped import render_report, render_snapshot
+from tests.fake_case import FakeGithubTestCase
+
+
+class SnapshotTestCase(unittest.TestCase):
+    """
+    Writes snapshots to a temporary directory
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp.name, "wrapped.snapshot")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class SnapshotFormatTest(SnapshotTestCase):
+    """
+    Writes JSON and array sections and reads them back
+    """
+
+    def test_round_trip(self):
+        days = array("I", range(366))
+        timestamps = array("q", [-1, 0, 2 ** 40])
+        with SnapshotWriter(self.filepath) as writer:
+            writer.write_json("meta", {"username": "octocat", "year": 2023})
+            # Names of odd lengths, so that the payloads need padding
+            writer.write_json("a", [1, "two", None])
+            writer.write_array("calendar.days", days)
+            writer.write_json("a", {"three": 3.5})
+            writer.write_array("ts", timestamps)
+            self.assertEqual(writer.sections, 5)
+        self.assertFalse(os.path.exists(f"{self.filepath}.tmp"))
+
+        with SnapshotReader(self.filepath) as reader:
+            self.assertEqual(reader.names(), ["meta", "a", "calendar.days", "ts"])
+            self.assertEqual(reader.json("meta"), {"username": "octocat", "year": 2023})
+            self.assertEqual(reader.json_all("a"), [[1, "two", None], {"three": 3.5}])
+            self.assertEqual(reader.json("a"), {"three": 3.5})
+            self.assertEqual(reader.json("missing", {}), {})
+            self.assertIsNone(reader.array("missing"))
+            for name, values in (("calendar.days", days), ("ts", timestamps)):
+                view = reader.array(name)
+                self.assertEqual((view.format, view.tolist()),
+                                 (values.typecode, values.tolist()))
+                view.release()
+            with self.assertRaises(Exception):
+                reader.array("meta")
+
+    def test_empty(self):
+        with SnapshotWriter(self.filepath):
+            pass
+        with SnapshotReader(self.filepath) as reader:
+            self.assertEqual(reader.names(), [])
+
+    def test_interrupted(self):
+        with self.assertRaises(ValueError):
+            with SnapshotWriter(self.filepath) as writer:
+                writer.write_json("meta", {})
+                raise ValueError("interrupted")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_not_a_snapshot(self):
+        for data in (b"", b"GHWRAPS", b"NOTASNAP" + bytes(HEADER.size)):
+            with open(self.filepath, "wb") as file:
+                file.write(data)
+            with self.assertRaisesRegex(Exception, "is not a wrapped snapshot"):
+                SnapshotReader(self.filepath)
+
+        with open(self.filepath, "wb") as file:
+            file.write(HEADER.pack(MAGIC, 99))
+        with self.assertRaisesRegex(Exception, "version 99"):
+            SnapshotReader(self.filepath)
+
+    def test_alignment(self):
+        with SnapshotWriter(self.filepath) as writer:
+            for length in range(1, 9):
+                writer.write_array("x" * length, array("d", [length]))
+        with open(self.filepath, "rb") as file:
+            data = file.read()
+        offset = HEADER.size
+        while offset < len(data):
+            name_length, _, _, padding, length = SECTION.unpack_from(data, offset)
+            start = offset + SECTION.size + name_length + padding
+            self.assertEqual(start % 8, 0)
+            offset = start + length
+
+
+class ReportSnapshotTest(FakeGithubTestCase, SnapshotTestCase):
+    """
+    Renders the report of the scenario again from its snapshot
+    """
+
+    scenario = Scenario(repos=3, commits_per_repo=40)
+
+    def setUp(self):
+        FakeGithubTestCase.setUp(self)
+        SnapshotTestCase.setUp(self)
+
+    def tearDown(self):
+        SnapshotTestCase.tearDown(self)
+        FakeGithubTestCase.tearDown(self)
+
+    def user(self):
+        """
+        Returns the UserData of the user of the scenario, with the repository statistics
+        """
+        return UserData(self.github, self.scenario.login, self.scenario.year, True, True)
+
+    def test_report(self):
+        user = self.user()
+        live = io.StringIO()
+        with contextlib.redirect_stdout(live), SnapshotWriter(self.filepath) as writer:
+            render_report(user, snapshot=writer)
+
+        # The results of another run, as JSON
+        expected = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            other = self.user()
+            for event in run_pipeline(other):
+                if event.kind == RESULT and event.section not in ("catalog", "streaks"):
+                    expected.setdefault(event.section, []).append(
+                        report_event_json(event, other))
+
+        with SnapshotReader(self.filepath) as reader:
+            self.assertEqual(reader.json("meta")["username"], self.scenario.login)
+            self.assertEqual(len(reader.json("repositories")), self.scenario.repos)
+            events = read_report_events(reader)
+            calendar = read_calendar(reader)
+
+        self.assertEqual(events[-1].kind, RESULT)
+        self.assertIn(DONE, [event.kind for event in events])
+        stored = {}
+        for event in events:
+            if event.kind == RESULT and event.section in ("created", "contributed"):
+                stored.setdefault(event.section, []).append(
+                    [dataclasses.asdict(repo) for repo in event.data])
+            elif event.kind == RESULT and event.section != "catalog":
+                stored.setdefault(event.section, []).append(report_event_json(event))
+        self.assertEqual(stored.keys(), expected.keys())
+        # The statistics of the repositories arrive in the order they are complete
+        for data in (stored, expected):
+            data["repo_statistics"].sort(key=lambda s: s["statistics"]["full_name"])
+        self.assertEqual(stored, expected)
+
+        self.assertEqual(calendar.days, user.get_calendar().days)
+        self.assertEqual(calendar.hours, user.get_calendar().hours)
+
+        rendered = io.StringIO()
+        with contextlib.redirect_stdout(rendered):
+            render_snapshot(self.filepath)
+        commits = [line for line in live.getvalue().splitlines()
+                   if line.startswith("You made")]
+        self.assertEqual(len(commits), 1)
+        self.assertIn(commits[0], rendered.getvalue().splitlines())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Script for refreshing the bundled extension to language snapshot (languages_extensions.bin).
+
+The snapshot is compiled from linguist's languages.yml. This is the only step of the
+project that may need network access, and it can be run offline by pointing it to a local
+copy of languages.yml.
+
+Example:
+    python update_languages.py
+    python update_languages.py --source path/to/languages.yml --revision v7.27.0
+
+Note:
+    Building the snapshot requires PyYAML (and requests when downloading languages.yml).
+"""
+
+import argparse
+from utils.github_helpers import (LANGUAGES_SNAPSHOT, LINGUIST_LANGUAGES_URL,
+                                  build_languages_snapshot, read_languages_snapshot)
+
+
+def main():
+    """
+    Main entry point for the script. Builds the snapshot and prints a summary of it.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compile linguist's languages.yml into the language snapshot")
+    parser.add_argument("--source", default=LINGUIST_LANGUAGES_URL,
+                        help="URL or local path of linguist's languages.yml")
+    parser.add_argument("--output", default=LANGUAGES_SNAPSHOT,
+                        help="Filepath of the snapshot to write")
+    parser.add_argument("--revision", default=None,
+                        help="Label of the linguist revision (defaults to source and date)")
+    args = parser.parse_args()
+
+    count = build_languages_snapshot(args.output, args.source, args.revision)
+    revision, _, folded = read_languages_snapshot(args.output)
+    print(f"Wrote {count} extensions to {args.output} ({revision}), "
+          f"{len(folded)} of them matched in any case")
+
+
+if __name__ == "__main__":
+    main()
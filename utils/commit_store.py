@@ -0,0 +1,260 @@
+"""
+Module: commit_store
+
+This module provides a compact, columnar store for the commits of a run, so that memory
+doesn't grow with the raw API payloads of accounts with hundreds of thousands of commits.
+
+Only what the report needs is kept: the SHA (20 raw bytes), the author date (a timestamp),
+the repository and author (interned ids, the repository carrying the private flag) and,
+once the details of a commit are known, the changes of each of its files per language
+(also interned, and stored contiguously per commit, so the files of some commits are read
+without scanning the others). Every column is an array, so a commit costs a few dozen
+bytes however big its payload was, and the PyGithub objects can be dropped as soon as
+they are read.
+
+Classes:
+    CommitStore: Columnar store of commits and of the changes of their files.
+
+Example:
+    store = CommitStore()
+    i = store.add_commit("owner/repo", sha, "your_username", date, private=False)
+    store.add_files(i, [("Python", 12), ("Markdown", 3)])
+    print(store.languages(store.commits("owner/repo")), store.memory_usage())
+"""
+
+import sys
+import threading
+from array import array
+from datetime import datetime, timezone
+
+SHA_SIZE = 20
+
+
+class CommitStore:
+    """
+    Columnar store of commits and of the changes of their files
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+
+        # Interned values: value -> id, and id -> value
+        self.__repo_ids = {}
+        self.__repo_names = []
+        self.__repo_private = bytearray()
+        self.__author_ids = {}
+        self.__author_names = []
+        self.__language_ids = {}
+        self.__language_names = []
+
+        # One entry per commit
+        self.__shas = bytearray()
+        self.__commit_repo = array("I")
+        self.__commit_author = array("I")
+        self.__commit_date = array("q")
+        self.__commit_has_files = bytearray()
+        # Range of the changed files of each commit, which are stored contiguously
+        self.__commit_file_start = array("Q")
+        self.__commit_file_count = array("I")
+        self.__repo_commits = {}
+
+        # One entry per changed file
+        self.__file_language = array("I")
+        self.__file_changes = array("I")
+
+    def __len__(self):
+        return len(self.__commit_repo)
+
+    @property
+    def file_count(self):
+        """
+        Getter for file_count, the number of changed files stored
+        """
+        return len(self.__file_language)
+
+    @staticmethod
+    def __intern(value, ids: dict, values: list):
+        """
+        Returns the id of a value, registering it if it's new
+
+        Note:
+            - Method is private and must be called holding the lock
+        """
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = len(values)
+            ids[value] = value_id
+            values.append(value)
+        return value_id
+
+    def add_commit(self, full_name: str, sha: str, author: str, date: datetime,
+                   private: bool = False):
+        """
+        Stores a commit
+
+        Args:
+            full_name (str): Full name of the repository
+            sha (str): SHA of the commit
+            author (str): Login of the author
+            date (datetime): Author date (naive dates are taken as UTC)
+            private (bool): Whether the repository is private
+
+        Returns:
+            int: Index of the commit in the store
+        """
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+
+        with self.__lock:
+            repo_id = self.__repo_ids.get(full_name)
+            if repo_id is None:
+                repo_id = self.__intern(full_name, self.__repo_ids, self.__repo_names)
+                self.__repo_private.append(bool(private))
+                self.__repo_commits[repo_id] = array("I")
+
+            index = len(self.__commit_repo)
+            self.__shas += bytes.fromhex(sha)
+            self.__commit_repo.append(repo_id)
+            self.__commit_author.append(
+                self.__intern(author, self.__author_ids, self.__author_names))
+            self.__commit_date.append(int(date.timestamp()))
+            self.__commit_has_files.append(0)
+            self.__commit_file_start.append(0)
+            self.__commit_file_count.append(0)
+            self.__repo_commits[repo_id].append(index)
+
+        return index
+
+    def add_files(self, index: int, files):
+        """
+        Stores the changes of the files of a commit (once: they replace those stored before)
+
+        Args:
+            index (int): Index of the commit
+            files: Iterable of (language, changes) pairs, one per changed file
+        """
+        with self.__lock:
+            self.__commit_file_start[index] = len(self.__file_language)
+            for language, changes in files:
+                self.__file_language.append(
+                    self.__intern(language, self.__language_ids, self.__language_names))
+                self.__file_changes.append(changes)
+            self.__commit_file_count[index] = \
+                len(self.__file_language) - self.__commit_file_start[index]
+            self.__commit_has_files[index] = 1
+
+    def has_files(self, index: int):
+        """
+        Returns whether the changes of the files of a commit are stored
+        """
+        return self.__commit_has_files[index] == 1
+
+    def sha(self, index: int):
+        """
+        Returns the SHA of a commit
+        """
+        return self.__shas[index * SHA_SIZE:(index + 1) * SHA_SIZE].hex()
+
+    def date(self, index: int):
+        """
+        Returns the author date of a commit, in UTC
+        """
+        return datetime.fromtimestamp(self.__commit_date[index], timezone.utc)
+
+    def timestamps(self, indexes):
+        """
+        Returns the author dates of some commits, as Unix timestamps
+
+        Args:
+            indexes: Indexes of the commits
+
+        Returns:
+            array: Timestamps, in seconds
+        """
+        return array("q", map(self.__commit_date.__getitem__, indexes))
+
+    def repo(self, index: int):
+        """
+        Returns the full name of the repository of a commit
+        """
+        return self.__repo_names[self.__commit_repo[index]]
+
+    def private(self, index: int):
+        """
+        Returns whether a commit was made to a private repository
+        """
+        return self.__repo_private[self.__commit_repo[index]] == 1
+
+    def commits(self, full_name: str, author: str = None, start: datetime = None,
+                end: datetime = None):
+        """
+        Returns the indexes of the commits of a repository, optionally only those of an
+        author or made in [start, end) (naive dates are taken as UTC)
+
+        Args:
+            full_name (str): Full name of the repository
+            author (str): Login of the author
+            start (datetime): Start of the period
+            end (datetime): End of the period
+
+        Returns:
+            list: Indexes of the commits, in the order they were stored
+        """
+        with self.__lock:
+            repo_id = self.__repo_ids.get(full_name)
+            if repo_id is None:
+                return []
+            indexes = list(self.__repo_commits[repo_id])
+            author_id = self.__author_ids.get(author, -1)
+
+        if author is not None:
+            indexes = [i for i in indexes if self.__commit_author[i] == author_id]
+        if start is not None:
+            first = int(start.replace(tzinfo=start.tzinfo or timezone.utc).timestamp())
+            indexes = [i for i in indexes if self.__commit_date[i] >= first]
+        if end is not None:
+            last = int(end.replace(tzinfo=end.tzinfo or timezone.utc).timestamp())
+            indexes = [i for i in indexes if self.__commit_date[i] < last]
+        return indexes
+
+    def languages(self, indexes):
+        """
+        Returns the changes per language of some commits. Only the files of those commits
+        are read, so the cost doesn't grow with the rest of the store
+
+        Args:
+            indexes: Indexes of the commits
+
+        Returns:
+            dict: Changes per language
+        """
+        with self.__lock:
+            totals = {}
+            for i in indexes:
+                start = self.__commit_file_start[i]
+                for f in range(start, start + self.__commit_file_count[i]):
+                    language = self.__file_language[f]
+                    totals[language] = totals.get(language, 0) + self.__file_changes[f]
+            return {self.__language_names[language]: changes
+                    for language, changes in totals.items()}
+
+    def memory_usage(self):
+        """
+        Returns the bytes taken by the store
+
+        Returns:
+            int: Size of the columns and of the interned values, in bytes
+        """
+        with self.__lock:
+            columns = [self.__shas, self.__commit_repo, self.__commit_author,
+                       self.__commit_date, self.__commit_has_files, self.__commit_file_start,
+                       self.__commit_file_count, self.__file_language, self.__file_changes,
+                       self.__repo_private]
+            size = sum(sys.getsizeof(column) for column in columns)
+            size += sum(sys.getsizeof(commits) for commits in self.__repo_commits.values())
+            for ids, values in ((self.__repo_ids, self.__repo_names),
+                                (self.__author_ids, self.__author_names),
+                                (self.__language_ids, self.__language_names)):
+                size += sys.getsizeof(ids) + sys.getsizeof(values)
+                size += sum(sys.getsizeof(value) for value in values)
+        return size
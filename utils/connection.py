@@ -0,0 +1,354 @@
+"""
+Module: connection
+
+This module provides the HTTP connection classes used by PyGithub to talk to the GitHub API.
+
+PyGithub lets applications inject their own connection classes. The ones provided here keep
+a single keep-alive session per host shared by every thread (PyGithub creates a new connection
+object per request once custom classes are injected), and serve GET requests through an
+optional persistent ResponseCache: stored responses are revalidated with If-None-Match /
+If-Modified-Since, a 304 Not Modified is answered with the stored body, and immutable
+resources skip revalidation altogether. Requests that reach the network go through an
+optional RequestScheduler, which paces them, spreads read-only ones for public data across
+a pool of tokens and sends rate-limited ones again. Responses to requests kept on the token
+of the client are cached in its scope, and those spread across the pool in a shared one.
+Every request sent is recorded in the installed profiler, if any (see utils.profiler), and
+counted by the request counters of the thread sending it.
+
+Classes:
+    HTTPSGithubConnection: Connection class for https:// API URLs.
+    HTTPGithubConnection: Connection class for http:// API URLs (local test servers).
+
+Functions:
+    - install_connection(cache: ResponseCache, scheduler: RequestScheduler): Injects the
+    connection classes into PyGithub.
+    - cache_scope(verb, url, authorization) -> str: Returns the authentication scope a
+    response is cached in.
+    - register_private_repo(full_name): Keeps the requests about a private repository on
+    the token of the client.
+    - count_requests() -> RequestCounter: Counts the requests the current thread sends
+    over the network.
+    - close_connections(): Closes the shared sessions and the installed cache.
+
+Dependencies:
+    - requests: Used for the underlying HTTP sessions.
+    - github.Requester: Used for injecting the connection classes.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+import requests.adapters
+from github.Requester import Requester
+from utils.http_cache import CachedResponse, ResponseCache, cache_key, is_immutable
+from utils.rate_limit import RequestScheduler, PRIVATE_STATUSES
+from utils.profiler import record_request
+
+_UNCACHED_HEADERS = ("x-ratelimit-", "date", "retry-after")
+# Paths of the search API, which has a rate limit of its own
+SEARCH_PATHS = ("/search/", "/api/v3/search/")
+# Request counters of every thread
+_counters = threading.local()
+
+
+class GithubResponse:
+    """
+    Response object mimicking the httplib response expected by PyGithub
+    """
+
+    def __init__(self, status: int, headers: dict, text: str):
+        self.status = status
+        self.headers = headers
+        self.text = text
+
+    def getheaders(self):
+        """
+        Returns the response headers as (name, value) pairs
+        """
+        return self.headers.items()
+
+    def read(self):
+        """
+        Returns the response body
+        """
+        return self.text
+
+
+class GithubConnection:
+    """
+    Connection object mimicking the httplib connection expected by PyGithub
+    """
+
+    protocol = "https"
+    default_port = 443
+    cache = None
+    scheduler = None
+
+    __sessions = {}
+    __sessions_lock = threading.Lock()
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None,
+                 pool_size=None, **kwargs):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.session = self.__shared_session(retry, pool_size)
+
+    def __shared_session(self, retry, pool_size):
+        """
+        Returns the keep-alive session shared by every connection to this host
+
+        Note:
+            - Method is private
+        """
+        key = (self.protocol, self.host, self.port)
+        with GithubConnection.__sessions_lock:
+            session = GithubConnection.__sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.auth = Requester.noopAuth
+                pool_size = pool_size or requests.adapters.DEFAULT_POOLSIZE
+                adapter = requests.adapters.HTTPAdapter(
+                    max_retries=requests.adapters.DEFAULT_RETRIES if retry is None else retry,
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size)
+                session.mount(f"{self.protocol}://", adapter)
+                GithubConnection.__sessions[key] = session
+
+        return session
+
+    def request(self, verb, url, input, headers):
+        """
+        Records the request to be sent by getresponse
+        """
+        self.verb = verb
+        self.url = url
+        self.input = input
+        self.headers = headers
+
+    def send(self, headers: dict):
+        """
+        Sends the recorded request over the network, through the scheduler if there is one
+
+        Args:
+            headers (dict): Request headers
+
+        Returns:
+            GithubResponse: Network response
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
+            return self.__send(headers)
+
+        authorization = headers.get("Authorization")
+        resource = "search" if urlsplit(self.url).path.startswith(SEARCH_PATHS) else "core"
+        for attempt in range(scheduler.max_retries + 1):
+            headers = dict(headers)
+            chosen = scheduler.acquire(self.verb, authorization, resource, self.url)
+            if chosen is not None:
+                headers["Authorization"] = chosen
+            response = self.__send(headers)
+            if not scheduler.update(chosen, response.status, response.headers):
+                if chosen == authorization or response.status not in PRIVATE_STATUSES \
+                        or not scheduler.mark_private(self.url):
+                    break
+                # Private repository another token can't see: send it with the client's
+                continue
+            if attempt < scheduler.max_retries and response.status not in (403, 429):
+                time.sleep(2 ** attempt)
+
+        return response
+
+    def __send(self, headers: dict):
+        """
+        Sends the recorded request over the network
+
+        Note:
+            - Method is private
+        """
+        verb = getattr(self.session, self.verb.lower())
+        start = time.perf_counter()
+        r = verb(
+            f"{self.protocol}://{self.host}:{self.port}{self.url}",
+            headers=headers,
+            data=self.input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False)
+        text = r.text
+        record_request(self.verb, self.url, r.status_code, time.perf_counter() - start,
+                       r.headers, headers.get("Authorization"))
+        for counter in getattr(_counters, "active", ()):
+            counter.count += 1
+        return GithubResponse(r.status_code, r.headers, text)
+
+    def getresponse(self):
+        """
+        Sends the recorded request, through the response cache when possible
+
+        Returns:
+            GithubResponse: Response to the request
+        """
+        cache = self.cache
+        if cache is None or self.verb != "GET":
+            return self.send(self.headers)
+
+        key = cache_key(self.url, self.headers.get("Accept"),
+                        cache_scope(self.verb, self.url, self.headers.get("Authorization")))
+        cached = cache.get(key)
+
+        if cached is not None and cached.immutable:
+            cache.record("hits")
+            return GithubResponse(cached.status, dict(cached.headers), cached.body)
+
+        headers = dict(self.headers)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = self.send(headers)
+
+        if response.status == 304 and cached is not None:
+            cache.record("revalidated")
+            merged = dict(cached.headers)
+            merged.update(response.headers)
+            return GithubResponse(cached.status, merged, cached.body)
+
+        cache.record("misses")
+        if response.status == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            immutable = is_immutable(self.url)
+            # Sent with the token of the client after all: stored in its scope
+            key = cache_key(self.url, self.headers.get("Accept"),
+                            cache_scope(self.verb, self.url, self.headers.get("Authorization")))
+            if etag or last_modified or immutable:
+                stored_headers = {k: v for k, v in response.headers.items()
+                                  if not k.lower().startswith(_UNCACHED_HEADERS)}
+                cache.store(key, CachedResponse(200, stored_headers, response.text,
+                                                etag, last_modified, immutable))
+
+        return response
+
+    def close(self):
+        """
+        Does nothing: the session is shared and closed by close_connections
+        """
+
+    @classmethod
+    def close_sessions(cls):
+        """
+        Closes every shared session
+        """
+        with GithubConnection.__sessions_lock:
+            for session in GithubConnection.__sessions.values():
+                session.close()
+            GithubConnection.__sessions.clear()
+
+
+class HTTPSGithubConnection(GithubConnection):
+    """
+    Connection class for https:// API URLs
+    """
+    protocol = "https"
+    default_port = 443
+
+
+class HTTPGithubConnection(GithubConnection):
+    """
+    Connection class for http:// API URLs, such as local test servers
+    """
+    protocol = "http"
+    default_port = 80
+
+
+def install_connection(cache: ResponseCache = None, scheduler: RequestScheduler = None):
+    """
+    Injects the connection classes into PyGithub, so that every Github instance created
+    afterwards uses them
+
+    Args:
+        cache (ResponseCache): Response cache to use, or None to disable caching
+        scheduler (RequestScheduler): Request scheduler to use, or None to send requests
+        right away
+    """
+    GithubConnection.cache = cache
+    GithubConnection.scheduler = scheduler
+    Requester.injectConnectionClasses(HTTPGithubConnection, HTTPSGithubConnection)
+
+
+def cache_scope(verb: str, url: str, authorization: str):
+    """
+    Returns the authentication scope the response to a request is cached in: the token of
+    the client, or none for the requests spread across the pool of tokens, whose responses
+    are the same whatever token sends them
+
+    Args:
+        verb (str): HTTP verb of the request
+        url (str): Requested URL, including its query string
+        authorization (str): Authorization header set by the client
+
+    Returns:
+        str: Authorization the response is keyed by, or None
+    """
+    scheduler = GithubConnection.scheduler
+    if scheduler is not None and scheduler.is_shared(verb, url):
+        return None
+    return authorization
+
+
+def register_private_repo(full_name: str):
+    """
+    Keeps the requests about a private repository on the token of the client, if a request
+    scheduler is installed
+
+    Args:
+        full_name (str): Full name of the repository
+    """
+    if GithubConnection.scheduler is not None:
+        GithubConnection.scheduler.add_private_repo(full_name)
+
+
+class RequestCounter:
+    """
+    Number of requests sent over the network (cache hits aside) by a thread
+    """
+
+    def __init__(self):
+        self.count = 0
+
+
+@contextmanager
+def count_requests():
+    """
+    Counts the requests the current thread sends over the network while in the context,
+    revalidations included but not the responses served from the cache. Counters can be
+    nested
+
+    Yields:
+        RequestCounter: Counter of the requests sent
+    """
+    counter = RequestCounter()
+    active = getattr(_counters, "active", None)
+    if active is None:
+        active = _counters.active = []
+    active.append(counter)
+    try:
+        yield counter
+    finally:
+        active.remove(counter)
+
+
+def close_connections():
+    """
+    Closes the shared sessions and the installed cache
+    """
+    GithubConnection.close_sessions()
+    if GithubConnection.cache is not None:
+        GithubConnection.cache.close()
+        GithubConnection.cache = None
@@ -1,93 +1,332 @@
 """
 Module: github_languages
 
-This module provides functions to work with GitHub programming language data, 
-specifically related to file extensions and their corresponding 
+This module provides functions to work with GitHub programming language data,
+specifically related to file extensions and their corresponding
 programming languages.
 
+The extension to language mapping is shipped with the project as a small,
+versioned snapshot (languages_extensions.bin) compiled from linguist's
+languages.yml. Queries never touch the network: refreshing the snapshot is an
+explicit, offline-friendly step (see update_languages.py).
+
+Snapshot format (little endian):
+    - header: magic b"GHWL", format version (uint16), revision length (uint16)
+    and entry count (uint32)
+    - revision: UTF-8 label of the linguist revision the snapshot was built from
+    - body: UTF-8 "extension\\tlanguage\\tfolded" records, one per line, sorted by
+    extension. folded is "1" when the extension may also match in another case (no
+    other language of linguist claims it in any case), "0" otherwise. Version 1
+    snapshots have no folded field, and only match extensions exactly
+
 Functions:
-    - github_languages_db(filepath): Returns a dictionary that maps each extension to the name of a 
-    language known to GitHub.
-    - get_language(extension: str, filepath: str) -> str: Fetches the language corresponding to a 
-    certain extension in the database corresponding to the filepath. If the database is not present 
-    in that filepath, it will create the language database with github_languages_db.
+    - github_languages(source): Returns a dictionary that maps each extension to the name of a
+    language known to GitHub, read from linguist's languages.yml (URL or local path).
+    - folded_extensions(source): Returns the extensions of the mapping that can be matched in
+    any case.
+    - write_languages_snapshot(mapping, filepath, revision, folded): Writes a mapping to a
+    snapshot file.
+    - read_languages_snapshot(filepath): Reads the revision, the mapping and the extensions
+    matched in any case stored in a snapshot file.
+    - build_languages_snapshot(filepath, source, revision): Compiles linguist's languages.yml
+    into a snapshot file.
+    - load_language_index(filepath: str) -> Mapping[str, str]: Loads, once per process, a read-only
+    extension to language index from the snapshot corresponding to the filepath.
+    - get_language(extension: str, filepath: str) -> str: Fetches the language corresponding to a
+    certain extension in the index loaded from the filepath.
+    - get_language_from_filename(filename: str, filepath: str) -> str: Memoized lookup of the
+    language of a full filename, trying its compound extensions from the longest to the shortest,
+    in any case only when the extension is unambiguous.
 
 Dependencies:
-    - requests: Used for making HTTP requests to fetch GitHub language data.
-    - yaml: Used for parsing YAML data.
-    - os.path: Used for checking if a file exists at a given filepath.
-    - sqlite3: Used for SQLite database operations.
+    - requests: Used for making HTTP requests to fetch GitHub language data (only when
+    building a snapshot from a URL).
+    - yaml: Used for parsing YAML data (only when building a snapshot).
+    - os.path: Used for locating the bundled snapshot.
+    - struct: Used for encoding the snapshot header.
+    - threading: Used for loading the language index only once across worker threads.
 """
 
-import requests
-import yaml
 import os.path
-import sqlite3
+import struct
+import threading
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+from types import MappingProxyType
+
+LINGUIST_LANGUAGES_URL = 'https://raw.githubusercontent.com/github/linguist/master/lib/linguist/languages.yml'
+LANGUAGES_SNAPSHOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "languages_extensions.bin")
+
+SNAPSHOT_MAGIC = b"GHWL"
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = struct.Struct("<4sHHI")
+
+_language_indexes = {}
+_folded_indexes = {}
+_language_indexes_lock = threading.Lock()
 
 
-def github_languages_db(filepath):
+def _linguist_languages(source):
     """
-    Returns a dictionary that maps each extension to the name of a 
-    language known to Github.
+    Returns the languages of linguist's languages.yml
 
     Args:
-        filepath (string): Filepath to database
+        source (string): URL or local path of linguist's languages.yml
+
+    Returns:
+        dict: Properties of every language
+
+    Note:
+        - Function is private
     """
-    url = 'https://raw.githubusercontent.com/github/linguist/master/lib/linguist/languages.yml'
-    response = requests.get(url)
+    import yaml
 
-    if response.status_code == 200:
-        data = response.text
+    if os.path.isfile(source):
+        with open(source, 'r', encoding="utf-8") as file:
+            data = file.read()
     else:
-        raise Exception("Unable to get github languages info")
+        import requests
+
+        response = requests.get(source)
+
+        if response.status_code == 200:
+            data = response.text
+        else:
+            raise Exception("Unable to get github languages info")
+
+    return yaml.safe_load(data)
+
+
+def _extensions(properties: dict):
+    """
+    Returns the extensions of a language of linguist's languages.yml
+
+    Note:
+        - Function is private
+    """
+    extensions = properties.get("extensions", "")
+    if isinstance(extensions, str):
+        return extensions.split()
+    return extensions or []
+
+
+def github_languages(source=LINGUIST_LANGUAGES_URL, languages=None):
+    """
+    Returns a dictionary that maps each extension to the name of a
+    language known to Github.
+
+    Args:
+        source (string): URL or local path of linguist's languages.yml
+        languages (dict): Languages of languages.yml already loaded, instead of the source
+
+    Returns:
+        dict: Extension to language mapping of the programming languages
+    """
+    if languages is None:
+        languages = _linguist_languages(source)
+
+    mapping = {}
+    for lang, properties in languages.items():
+        type = properties.get("type", "")
+
+        if type == "programming":
+            for extension in _extensions(properties):
+                mapping[extension] = lang
+
+    return mapping
+
+
+def folded_extensions(source=LINGUIST_LANGUAGES_URL, languages=None):
+    """
+    Returns the extensions of the mapping of github_languages that can be matched
+    in any case: those that no other language of linguist (programming or not)
+    claims in any case. ".md", for instance, is kept exact since both GCC Machine
+    Description and Markdown claim it, so "README.MD" isn't taken for the former
+
+    Args:
+        source (string): URL or local path of linguist's languages.yml
+        languages (dict): Languages of languages.yml already loaded, instead of the source
+
+    Returns:
+        set: Extensions of the mapping matched in any case
+    """
+    if languages is None:
+        languages = _linguist_languages(source)
+
+    claimed = defaultdict(set)
+    for lang, properties in languages.items():
+        for extension in _extensions(properties):
+            claimed[extension.lower()].add(lang)
+
+    return {extension for extension, language in github_languages(languages=languages).items()
+            if claimed[extension.lower()] == {language}}
+
 
-    github_languages = yaml.safe_load(data)
+def write_languages_snapshot(mapping: dict, filepath: str, revision: str, folded=()):
+    """
+    Writes an extension to language mapping to a snapshot file
+
+    Args:
+        mapping (dict): Extension to language mapping
+        filepath (string): Filepath to snapshot
+        revision (string): Label of the linguist revision the mapping comes from
+        folded (iterable): Extensions of the mapping that can be matched in any case
+    """
+    for extension, language in mapping.items():
+        if any(c in extension + language for c in "\t\n"):
+            raise ValueError(f"Invalid language mapping {extension!r}: {language!r}")
+
+    folded = set(folded)
+    body = "\n".join(f"{extension}\t{mapping[extension]}\t{int(extension in folded)}"
+                     for extension in sorted(mapping)).encode("utf-8")
+    revision = revision.encode("utf-8")
+
+    with open(filepath, 'wb') as file:
+        file.write(_SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(revision), len(mapping)))
+        file.write(revision)
+        file.write(body)
+
+
+def read_languages_snapshot(filepath: str):
+    """
+    Reads a snapshot file
+
+    Args:
+        filepath (string): Filepath to snapshot
+
+    Returns:
+        tuple: Revision label, extension to language mapping and set of the extensions
+        matched in any case (none for a version 1 snapshot)
+    """
+    with open(filepath, 'rb') as file:
+        data = file.read()
+
+    magic, version, revision_length, count = _SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_VERSION):
+        raise ValueError(
+            f"{filepath} is not a version {SNAPSHOT_VERSION} language snapshot")
+
+    start = _SNAPSHOT_HEADER.size
+    revision = data[start:start + revision_length].decode("utf-8")
+    body = data[start + revision_length:].decode("utf-8")
+
+    mapping = {}
+    folded = set()
+    for line in (body.split("\n") if count else []):
+        if version == 1:
+            extension, language = line.split("\t", 1)
+        else:
+            extension, language, fold = line.split("\t")
+            if fold == "1":
+                folded.add(extension)
+        mapping[extension] = language
+    if len(mapping) != count:
+        raise ValueError(f"Language snapshot {filepath} is corrupted")
+
+    return revision, mapping, folded
+
+
+def build_languages_snapshot(filepath=LANGUAGES_SNAPSHOT,
+                             source=LINGUIST_LANGUAGES_URL, revision=None):
+    """
+    Compiles linguist's languages.yml into a snapshot file
+
+    Args:
+        filepath (string): Filepath to snapshot
+        source (string): URL or local path of linguist's languages.yml
+        revision (string): Label of the linguist revision. Defaults to the source and today's date
+
+    Returns:
+        int: Number of extensions in the snapshot
+    """
+    languages = _linguist_languages(source)
+    mapping = github_languages(languages=languages)
+    if revision is None:
+        revision = f"{source}@{date.today().isoformat()}"
+
+    write_languages_snapshot(mapping, filepath, revision,
+                             folded_extensions(languages=languages))
+
+    return len(mapping)
+
+
+def load_language_index(filepath: str = LANGUAGES_SNAPSHOT):
+    """ Loads the extension to language mapping of the snapshot corresponding
+    to the filepath into memory. The index is built only once per process and
+    shared read-only by every thread. No network access is ever made: a
+    missing snapshot must be built with build_languages_snapshot
 
-    with sqlite3.connect(filepath) as db:
-        cursor = db.cursor()
+    Args:
+        filepath (string): Filepath to snapshot
 
-        create_table = """
-        CREATE TABLE IF NOT EXISTS language_mapping(
-            extension TEXT PRIMARY KEY,
-            language TEXT
-        )
-        """
-        cursor.execute(create_table)
+    Returns:
+        Mapping[str, str]: Read-only mapping from extension to language
+    """
+    index = _language_indexes.get(filepath)
+    if index is not None:
+        return index
 
-        for lang, properties in github_languages.items():
-            extensions = properties.get("extensions", "")
-            type = properties.get("type", "")
+    with _language_indexes_lock:
+        index = _language_indexes.get(filepath)
+        if index is None:
+            if not os.path.isfile(filepath):
+                raise FileNotFoundError(
+                    f"Language snapshot {filepath} not found, run update_languages.py to build it")
 
-            if type == "programming":
-                if isinstance(extensions, str):
-                    extensions_list = extensions.split()
-                elif isinstance(extensions, list):
-                    extensions_list = extensions
+            _, mapping, folded = read_languages_snapshot(filepath)
+            index = MappingProxyType(mapping)
+            _folded_indexes[filepath] = MappingProxyType(
+                {extension.lower(): mapping[extension] for extension in folded})
+            _language_indexes[filepath] = index
 
-                for extension in extensions_list:
-                    cursor.execute(
-                        "INSERT OR REPLACE INTO language_mapping (extension, language) VALUES (?, ?)", (extension, lang))
+    return index
 
 
-def get_language(extension: str, filepath: str) -> str:
-    """ Fetchs the language corresponding to a certain extension in the 
-    database corresponding to the filepath. If database is not present in 
-    that filepath, it will create the language database with github_languages_db
+def get_language(extension: str, filepath: str = LANGUAGES_SNAPSHOT) -> str:
+    """ Fetchs the language corresponding to a certain extension in the
+    index loaded from the snapshot corresponding to the filepath
 
     Args:
         extension (string): File extension
-        filepath (string): Filepath to database
+        filepath (string): Filepath to snapshot
 
     Returns:
         str: Programming language corresponding to the extension
     """
-    if not os.path.isfile(filepath):
-        github_languages_db(filepath)
+    return load_language_index(filepath).get(extension)
+
+
+@lru_cache(maxsize=65536)
+def get_language_from_filename(filename: str, filepath: str = LANGUAGES_SNAPSHOT) -> str:
+    """ Fetchs the language corresponding to a full filename. Every compound
+    extension of the name is tried, from the longest to the shortest (so
+    "main.rs.in" matches ".rs.in" before ".in"), first as is and then in
+    any case, if the extension is unambiguous (so "MAIN.PY" is Python, but
+    "README.MD" isn't GCC Machine Description). Names with no extension have
+    no language. Results are memoized, so repeated filenames never reach the
+    index again
+
+    Args:
+        filename (string): Filename or path of the file, as reported by Github
+        filepath (string): Filepath to snapshot
+
+    Returns:
+        str: Programming language corresponding to the filename
+    """
+    index = load_language_index(filepath)
+    folded = _folded_indexes[filepath]
+    name = filename.rsplit("/", 1)[-1]
 
-    with sqlite3.connect(filepath) as db:
-        cursor = db.cursor()
-        cursor.execute(
-            "SELECT language FROM language_mapping WHERE extension = ?", (extension,))
-        result = cursor.fetchone()
+    dot = name.find(".")
+    while dot != -1:
+        extension = name[dot:]
+        language = index.get(extension) or folded.get(extension.lower())
+        if language is not None:
+            return language
+        dot = name.find(".", dot + 1)
 
-    return result[0] if result else None
+    return None
@@ -5,9 +5,11 @@ This module provides functions for connecting to the GitHub API using a
 token, disconnecting from the GitHub API, and loading JSON data from a file.
 
 Functions:
-    - connect(token: str) -> Github: Authenticates with the Github API using 
-    the provided token.
-    - disconnect(github: Github): Closes the connection to the GitHub API.
+    - connect(token: str, cache_path: str, cache_max_size: int, extra_tokens: list, 
+    max_rate: float, base_url: str) -> Github: Authenticates with the Github API using 
+    the provided token, optionally through a persistent response cache, pacing the 
+    requests and spreading the read-only ones across a pool of tokens.
+    - disconnect(github: Github): Closes the connection to the GitHub API and the cache.
     - load_json(filepath: str) -> dict: Returns a Python object containing a 
     decoded JSON document if successful.
 
@@ -15,6 +17,8 @@ Dependencies:
     - github.Github: Used for interacting with the GitHub API.
     - github.Auth: Used for authentication with the GitHub API.
     - json: Used for reading and decoding JSON data from a file.
+    - utils.connection: Used for sharing connections and caching responses.
+    - utils.rate_limit: Used for pacing the requests within the rate limits.
 
 Usage:
     You can use the functions provided in this module to connect to the 
@@ -24,16 +28,31 @@ Usage:
 
 
 from github import Github, Auth
+from github.Consts import DEFAULT_BASE_URL
+from utils.connection import install_connection, close_connections
+from utils.http_cache import ResponseCache, DEFAULT_MAX_SIZE
+from utils.rate_limit import RequestScheduler, DEFAULT_MAX_RATE
 import json
 
 
-def connect(token: str):
+def connect(token: str, cache_path: str = None, cache_max_size: int = DEFAULT_MAX_SIZE,
+            extra_tokens: list = None, max_rate: float = DEFAULT_MAX_RATE,
+            base_url: str = DEFAULT_BASE_URL):
     """
-    Autentifies with the Github API using the token
+    Autentifies with the Github API using the token. If a cache path is provided, 
+    GET responses are stored there and revalidated with conditional requests 
+    in later runs. Requests are paced within the rate limits, and read-only ones 
+    are spread across the token and the extra tokens. base_url can point to another 
+    API, such as a GitHub Enterprise server or a local test server
     """
     try:
+        cache = ResponseCache(cache_path, cache_max_size) if cache_path else None
+        scheduler = RequestScheduler([token] + list(extra_tokens or []), max_rate)
+        install_connection(cache, scheduler)
+
         auth = Auth.Token(token)
-        g = Github(auth=auth)
+        # The scheduler handles rate limits, pacing and retries instead of PyGithub
+        g = Github(base_url=base_url, auth=auth, retry=None, seconds_between_requests=None)
 
         username = g.get_user()
         print(f"You have been connected to Github as user {username.login}")
@@ -50,6 +69,7 @@ def disconnect(github: Github):
     if github:
         print("Disconnecting")
         github.close()
+    close_connections()
 
 
 def load_json(filepath: str):
@@ -0,0 +1,267 @@
+"""
+Module: http_cache
+
+This module provides a persistent, disk-backed cache for the responses of the GitHub API.
+
+Responses are stored compressed in a SQLite file together with their ETag and Last-Modified
+validators, keyed by URL, Accept header and authentication scope (a hash of the Authorization
+header, so different tokens never share private data; responses to requests spread across a
+pool of tokens share one, see utils.connection). Stored responses are revalidated with
+conditional requests, which GitHub does not charge against the rate limit when they are
+answered with 304 Not Modified. Immutable resources, such as commits addressed by SHA, are
+served straight from the cache. The cache is bounded in size and evicts the least recently
+used entries.
+
+Classes:
+    ResponseCache: Thread-safe, size-bounded, LRU response store.
+    CachedResponse: A cached response, as stored on disk.
+
+Functions:
+    - cache_key(url, accept, authorization) -> str: Returns the key of a response.
+    - is_immutable(url) -> bool: Returns whether an URL addresses a resource that never changes.
+
+Dependencies:
+    - sqlite3: Used for storing the responses on disk.
+    - zlib: Used for compressing the response bodies.
+    - hashlib: Used for hashing the authentication scope.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_IMMUTABLE_URL = re.compile(
+    r"^(/api/v3)?/repos/[^/]+/[^/]+/(commits|git/commits|git/trees)/[0-9a-f]{40}(\?|$)")
+
+
+def cache_key(url: str, accept: str, authorization: str) -> str:
+    """
+    Returns the key of a response. The authorization is hashed so that tokens are never
+    written to disk.
+
+    Args:
+        url (str): Requested URL, including its query string
+        accept (str): Accept header of the request
+        authorization (str): Authorization header of the request
+
+    Returns:
+        str: Cache key
+    """
+    scope = hashlib.sha256((authorization or "").encode("utf-8")).hexdigest()[:16]
+    return f"{scope} {accept or ''} {url}"
+
+
+def is_immutable(url: str) -> bool:
+    """
+    Returns whether an URL addresses a resource that can never change, such as a commit
+    requested by its full SHA.
+
+    Args:
+        url (str): Requested URL
+
+    Returns:
+        bool: True if the response never needs to be revalidated
+    """
+    return _IMMUTABLE_URL.match(url) is not None
+
+
+@dataclass
+class CachedResponse:
+    """
+    A cached response, as stored on disk
+    """
+    status: int
+    headers: dict
+    body: str
+    etag: str
+    last_modified: str
+    immutable: bool
+
+
+class ResponseCache:
+    """
+    Persistent response cache stored in a SQLite file
+    """
+
+    def __init__(self, filepath: str, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Opens (and creates if needed) the cache
+
+        Args:
+            filepath (str): Filepath of the cache database
+            max_size (int): Maximum size in bytes of the stored bodies
+        """
+        self.__filepath = filepath
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(filepath, check_same_thread=False)
+        self.__db.execute("""
+            CREATE TABLE IF NOT EXISTS responses(
+                key TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                immutable INTEGER,
+                size INTEGER,
+                last_access REAL
+            )
+        """)
+        self.__db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        self.__db.commit()
+        self.__size = self.__db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        # Outcome ("hits", "revalidated" or "misses") -> requests, counted from any thread
+        self.__counts = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    @property
+    def filepath(self):
+        """
+        Getter for filepath
+        """
+        return self.__filepath
+
+    @property
+    def max_size(self):
+        """
+        Getter for max_size
+        """
+        return self.__max_size
+
+    @property
+    def size(self):
+        """
+        Getter for size
+        """
+        return self.__size
+
+    @property
+    def hits(self):
+        """
+        Getter for hits, the requests served from the cache without a request
+        """
+        return self.__counts["hits"]
+
+    @property
+    def revalidated(self):
+        """
+        Getter for revalidated, the requests answered with 304 Not Modified
+        """
+        return self.__counts["revalidated"]
+
+    @property
+    def misses(self):
+        """
+        Getter for misses, the requests whose response wasn't stored or had changed
+        """
+        return self.__counts["misses"]
+
+    def record(self, outcome: str):
+        """
+        Counts a request served through the cache. Requests are sent from several threads:
+        the counters are updated under the lock of the cache
+
+        Args:
+            outcome (str): "hits", "revalidated" or "misses"
+        """
+        with self.__lock:
+            self.__counts[outcome] += 1
+
+    def get(self, key: str):
+        """
+        Returns the response stored for a key, marking it as recently used
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            CachedResponse: Stored response, or None if there is none
+        """
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT status, headers, body, etag, last_modified, immutable "
+                "FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.__db.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.__db.commit()
+
+        status, headers, body, etag, last_modified, immutable = row
+        return CachedResponse(status, json.loads(headers),
+                              zlib.decompress(body).decode("utf-8"),
+                              etag, last_modified, bool(immutable))
+
+    def store(self, key: str, response: CachedResponse):
+        """
+        Stores a response, evicting the least recently used ones if the cache grows too big
+
+        Args:
+            key (str): Cache key
+            response (CachedResponse): Response to store
+        """
+        body = zlib.compress(response.body.encode("utf-8"))
+        if len(body) > self.__max_size:
+            return
+
+        with self.__lock:
+            previous = self.__db.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if previous:
+                self.__size -= previous[0]
+
+            self.__db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status, json.dumps(response.headers), body, response.etag,
+                 response.last_modified, int(response.immutable), len(body), time.time()))
+            self.__size += len(body)
+
+            if self.__size > self.__max_size:
+                self.__evict()
+            self.__db.commit()
+
+    def __evict(self):
+        """
+        Deletes the least recently used responses until the cache uses at most 90% of its
+        maximum size
+
+        Note:
+            - Method is private and must be called holding the lock
+        """
+        target = self.__max_size * 0.9
+        rows = self.__db.execute(
+            "SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.__size <= target:
+                break
+            evicted.append((key,))
+            self.__size -= size
+
+        self.__db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self):
+        """
+        Deletes every stored response
+        """
+        with self.__lock:
+            self.__db.execute("DELETE FROM responses")
+            self.__db.commit()
+            self.__size = 0
+
+    def close(self):
+        """
+        Closes the cache database
+        """
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,149 @@
+"""
+Module: language_aggregation
+
+This module provides a map-reduce engine classifying the changed files of commits into
+languages and adding up their changes.
+
+The commits are split into one contiguous slice per worker. Each worker classifies the
+files of its slice and reduces them into an accumulator of its own, so workers share no
+state and take no lock; the partial results are merged once, in slice order, at the end.
+The result doesn't depend on the number of workers nor on the order they finish in.
+Workers are threads by default. Since classification is CPU-bound, they can also be
+processes, which run it in parallel regardless of the GIL; the files are then shipped to
+them in bulk, so processes only pay off for large runs.
+
+Classes:
+    LanguageAggregator: Classifies and adds up the changes of commits per key and language.
+
+Functions:
+    - classify_files(files): Returns the changes per language of the files of a commit.
+
+Example:
+    aggregator = LanguageAggregator(max_workers=4)
+    classified, totals = aggregator.aggregate(
+        [("owner/repo", 0, [("main.py", 12), ("README.md", 3)])])
+    print(totals["owner/repo"])
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from utils.github_helpers import get_language_from_filename, LANGUAGES_SNAPSHOT
+
+
+def classify_files(files):
+    """
+    Returns the changes per language of the files of a commit
+
+    Args:
+        files: Iterable of (filename, changes) pairs
+
+    Returns:
+        list: (language, changes) pairs, one per file
+    """
+    return [(get_language_from_filename(filename, LANGUAGES_SNAPSHOT), changes)
+            for filename, changes in files]
+
+
+def _reduce_slice(commits: list):
+    """
+    Classifies the files of a slice of commits and reduces them into an accumulator of
+    its own. Module-level, so that it can run in a worker process
+
+    Args:
+        commits (list): (key, commit, files) triples
+
+    Returns:
+        tuple: (commit, [(language, changes)]) pairs in the order of the slice; and the
+        changes of the slice per (key, language)
+    """
+    classified = []
+    accumulator = {}
+    for key, commit, files in commits:
+        languages = classify_files(files)
+        classified.append((commit, languages))
+        for language, changes in languages:
+            accumulator[key, language] = accumulator.get((key, language), 0) + changes
+    return classified, accumulator
+
+
+class LanguageAggregator:
+    """
+    Classifies the changed files of commits and adds up their changes per key (such as a
+    repository) and language, with one accumulator per worker
+    """
+
+    def __init__(self, max_workers: int = None, use_processes: bool = False,
+                 min_slice: int = 64):
+        """
+        Args:
+            max_workers (int): Number of workers. Defaults to the number of CPUs
+            use_processes (bool): Whether workers are processes instead of threads
+            min_slice (int): Fewest commits worth handing to a worker of its own
+        """
+        self.__max_workers = max_workers or os.cpu_count() or 1
+        self.__use_processes = use_processes
+        self.__min_slice = min_slice
+
+    @property
+    def max_workers(self):
+        """
+        Getter for max_workers
+        """
+        return self.__max_workers
+
+    @max_workers.setter
+    def max_workers(self, value):
+        """
+        Setter for max_workers
+        """
+        self.__max_workers = value
+
+    @property
+    def use_processes(self):
+        """
+        Getter for use_processes
+        """
+        return self.__use_processes
+
+    @use_processes.setter
+    def use_processes(self, value):
+        """
+        Setter for use_processes
+        """
+        self.__use_processes = value
+
+    def aggregate(self, commits):
+        """
+        Classifies the files of every commit and adds up their changes
+
+        Args:
+            commits: Iterable of (key, commit, files) triples, where commit identifies the
+            commit (such as its index in a CommitStore) and files are (filename, changes)
+            pairs
+
+        Returns:
+            tuple: (commit, [(language, changes)]) pairs, in the order of commits; and the
+            changes per language of every key, as a dictionary of dictionaries
+        """
+        commits = list(commits)
+        workers = max(1, min(self.__max_workers, len(commits) // self.__min_slice))
+        size = math.ceil(len(commits) / workers) if commits else 1
+        slices = [commits[i:i + size] for i in range(0, len(commits), size)]
+
+        if len(slices) <= 1:
+            partials = [_reduce_slice(s) for s in slices]
+        else:
+            executor_class = ProcessPoolExecutor if self.__use_processes else ThreadPoolExecutor
+            with executor_class(max_workers=len(slices)) as executor:
+                partials = list(executor.map(_reduce_slice, slices))
+
+        classified = []
+        totals = {}
+        for slice_classified, accumulator in partials:
+            classified.extend(slice_classified)
+            for (key, language), changes in accumulator.items():
+                key_totals = totals.setdefault(key, {})
+                key_totals[language] = key_totals.get(language, 0) + changes
+
+        return classified, totals
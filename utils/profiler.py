@@ -0,0 +1,298 @@
+"""
+Module: profiler
+
+This module provides the instrumentation of a run: where the time went and which requests
+it took.
+
+Once a Profiler is installed, every request sent to the GitHub API (through the PyGithub
+connection classes, the async commit fetcher or the GraphQL source) is counted by endpoint
+template, such as GET /repos/{owner}/{repo}/commits/{ref}, with its latency; and the quota
+reported in the X-RateLimit headers of the responses is followed, so that the quota
+consumed by the run is known per resource. The major stages of UserData and of the
+repository statistics are timed with stage(name). Without a profiler installed, recording
+does nothing.
+
+Stages may run in several threads at once: their time is summed over the threads, so it
+shows where the work went rather than wall time.
+
+Classes:
+    Profiler: Request counters, latencies, stage timings and rate-limit quota of a run.
+
+Functions:
+    - install_profiler(profiler): Installs the profiler the requests and stages are recorded in.
+    - get_profiler(): Returns the installed profiler, if any.
+    - record_request(verb, url, status, seconds, headers, authorization): Records a request
+    in the installed profiler.
+    - stage(name): Context manager timing a stage in the installed profiler.
+    - endpoint_template(verb, url): Returns the endpoint template of a request.
+
+Example:
+    profiler = Profiler()
+    install_profiler(profiler)
+    with stage("commit_scan"):
+        ...
+    profiler.print_summary()
+"""
+
+import json
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Path segments replaced by placeholders, in order
+_TEMPLATES = (
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/(users|orgs)/[^/]+"), r"/\1/{name}"),
+    (re.compile(r"/(commits|git/commits|git/trees|branches)/[^/]+"), r"/\1/{ref}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{id}"),
+)
+PERCENTILES = (50, 90, 99)
+
+_active = None
+
+
+def endpoint_template(verb: str, url: str):
+    """
+    Returns the endpoint template of a request, with its owner, repository, reference and
+    numeric identifiers replaced by placeholders and without its query
+
+    Args:
+        verb (str): HTTP verb
+        url (str): Absolute URL or path of the request
+
+    Returns:
+        str: Verb and endpoint template, such as "GET /repos/{owner}/{repo}/commits"
+    """
+    path = urlsplit(url).path or "/"
+    path = re.sub(r"^/api/v3(?=/)", "", path)
+    for pattern, replacement in _TEMPLATES:
+        path = pattern.sub(replacement, path)
+    return f"{verb} {path}"
+
+
+def _percentile(values: list, percentile: float):
+    """
+    Returns a percentile of sorted values, by nearest rank
+    """
+    if not values:
+        return None
+    rank = max(int(-(-percentile * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+class _Stage:
+    """
+    Context manager timing a stage
+    """
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    """
+    Context manager doing nothing, used when no profiler is installed
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profiler:
+    """
+    Request counters, latencies, stage timings and rate-limit quota of a run
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__started = time.perf_counter()
+        self.__latencies = defaultdict(lambda: array("d"))
+        self.__errors = defaultdict(int)
+        self.__stages = defaultdict(lambda: [0, 0.0])
+        # (authorization, resource, reset) -> [limit, highest remaining, lowest remaining]
+        self.__quota = {}
+
+    def record_request(self, verb: str, url: str, status: int, seconds: float,
+                       headers: dict = None, authorization: str = None):
+        """
+        Records a request sent to the API
+
+        Args:
+            verb (str): HTTP verb
+            url (str): URL or path of the request
+            status (int): Status of the response
+            seconds (float): Time until the response was read
+            headers (dict): Headers of the response, for the rate-limit quota
+            authorization (str): Authorization the request was sent with, so that the
+            quota of each token is followed apart
+        """
+        endpoint = endpoint_template(verb, url)
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+        with self.__lock:
+            self.__latencies[endpoint].append(seconds)
+            if status >= 400:
+                self.__errors[endpoint] += 1
+
+            if "x-ratelimit-remaining" in headers:
+                key = (authorization, headers.get("x-ratelimit-resource", "core"),
+                       headers.get("x-ratelimit-reset"))
+                remaining = int(headers["x-ratelimit-remaining"])
+                quota = self.__quota.setdefault(
+                    key, [int(headers.get("x-ratelimit-limit", 0)), remaining, remaining])
+                quota[1] = max(quota[1], remaining)
+                quota[2] = min(quota[2], remaining)
+
+    def add_stage(self, name: str, seconds: float):
+        """
+        Adds a call of a stage and its time
+
+        Args:
+            name (str): Stage
+            seconds (float): Time taken
+        """
+        with self.__lock:
+            totals = self.__stages[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def stage(self, name: str):
+        """
+        Returns a context manager timing a stage
+
+        Args:
+            name (str): Stage
+        """
+        return _Stage(self, name)
+
+    def summary(self):
+        """
+        Returns everything recorded so far
+
+        Returns:
+            dict: Wall time; count, errors and latency percentiles (in milliseconds) of every
+            endpoint; calls and seconds of every stage; and quota consumed and left of every
+            rate-limit resource
+        """
+        with self.__lock:
+            requests = {}
+            for endpoint, latencies in self.__latencies.items():
+                values = sorted(latencies)
+                requests[endpoint] = dict(
+                    {"count": len(values), "errors": self.__errors[endpoint],
+                     "seconds": sum(values)},
+                    **{f"p{p}_ms": _percentile(values, p) * 1000 for p in PERCENTILES},
+                    max_ms=values[-1] * 1000)
+
+            rate_limit = {}
+            for (_, resource, _), (limit, highest, lowest) in self.__quota.items():
+                totals = rate_limit.setdefault(resource,
+                                               {"consumed": 0, "remaining": None, "limit": None})
+                # The highest remaining seen was already after a request of the window
+                totals["consumed"] += highest - lowest + 1
+                totals["remaining"] = lowest
+                totals["limit"] = limit
+
+            return {
+                "wall_seconds": time.perf_counter() - self.__started,
+                "requests": dict(sorted(requests.items(), key=lambda x: -x[1]["seconds"])),
+                "stages": {name: {"calls": calls, "seconds": seconds}
+                           for name, (calls, seconds) in sorted(self.__stages.items())},
+                "rate_limit": rate_limit
+            }
+
+    def print_summary(self):
+        """
+        Prints the summary as tables
+        """
+        summary = self.summary()
+        print(f"Profile of the run ({summary['wall_seconds']:.1f}s):")
+
+        print(f"{'Endpoint':<52}{'Count':>7}{'Errors':>7}{'Total s':>9}"
+              f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'Max ms':>9}")
+        for endpoint, r in summary["requests"].items():
+            print(f"{endpoint:<52}{r['count']:>7}{r['errors']:>7}{r['seconds']:>9.2f}"
+                  f"{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                  f"{r['max_ms']:>9.1f}")
+
+        print("Stages (seconds summed over threads):")
+        for name, s in summary["stages"].items():
+            print(f"- {name:<40}{s['calls']:>7}{s['seconds']:>10.2f}")
+
+        for resource, quota in summary["rate_limit"].items():
+            print(f"Rate limit ({resource}): {quota['consumed']} consumed, "
+                  f"{quota['remaining']} left of {quota['limit']}")
+
+    def export_json(self, filepath: str = None):
+        """
+        Exports the summary as JSON
+
+        Args:
+            filepath (str): File the summary is written to. Printed if not provided
+        """
+        text = json.dumps(self.summary(), indent=2)
+        if filepath is None:
+            print(text)
+        else:
+            with open(filepath, "w", encoding="utf-8") as file:
+                file.write(text)
+
+
+def install_profiler(profiler: Profiler):
+    """
+    Installs the profiler the requests and stages are recorded in
+
+    Args:
+        profiler (Profiler): Profiler, or None to stop recording
+    """
+    global _active
+    _active = profiler
+
+
+def get_profiler():
+    """
+    Returns the installed profiler, or None
+    """
+    return _active
+
+
+def record_request(verb: str, url: str, status: int, seconds: float, headers: dict = None,
+                   authorization: str = None):
+    """
+    Records a request in the installed profiler, if there is one (see
+    Profiler.record_request)
+    """
+    profiler = _active
+    if profiler is not None:
+        profiler.record_request(verb, url, status, seconds, headers, authorization)
+
+
+def stage(name: str):
+    """
+    Returns a context manager timing a stage in the installed profiler, or doing nothing
+    if there's none
+
+    Args:
+        name (str): Stage
+    """
+    profiler = _active
+    return _NO_STAGE if profiler is None else profiler.stage(name)
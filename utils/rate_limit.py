@@ -0,0 +1,371 @@
+"""
+Module: rate_limit
+
+This module provides a scheduler for the requests sent to the GitHub API that keeps a run
+within the rate limits instead of sleeping blindly or failing partway through.
+
+Every response updates the quota known for the token that sent it (X-RateLimit-Remaining,
+X-RateLimit-Reset, X-RateLimit-Limit). Requests are paced with a token bucket: at most
+max_rate requests per second in normal conditions and, once the quota left falls below a
+reserve, just fast enough to spread what is left until it resets. Read-only requests for
+public data are spread across a pool of tokens (always the one with the most quota left).
+Other requests keep the token of the client: writes, those bound to its identity (/user,
+/user/repos, GraphQL) and those about private repositories, since another token would
+answer them as another account. Private repositories are registered as they are listed, or
+found out when another token gets a 403, 404 or 422 for them (the request is then sent
+again with the token of the client). Rate-limited responses (403/429 with Retry-After or with no
+quota left) block the token that got them and the request is sent again, with another
+token if there is one.
+
+Resources other than core (such as search, 30 requests per minute) have a quota of their
+own: their responses don't touch the core quota of the token, and running out of them
+only blocks the requests to that resource until it resets.
+
+Classes:
+    TokenState: Quota known for a token.
+    RequestScheduler: Token bucket pacing and token pooling for the API requests.
+
+Functions:
+    - request_repository(url) -> str: Returns the repository a request is about.
+
+Dependencies:
+    - threading: Used for sharing the scheduler between worker threads.
+"""
+
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_MAX_RATE = 10.0
+READ_ONLY_VERBS = ("GET", "HEAD")
+CORE_RESOURCE = "core"
+RATE_LIMITED_STATUSES = (403, 429)
+RETRIED_STATUSES = (502, 503, 504)
+# Statuses another token gets for a private repository it can't see
+PRIVATE_STATUSES = (403, 404, 422)
+
+# Requests bound to the identity of the token that sends them
+IDENTITY_PATH = re.compile(r"^(/api/v3)?/(user|graphql)(/|$)")
+REPO_PATH = re.compile(r"^(/api/v3)?/repos/(?P<full_name>[^/]+/[^/]+)")
+SEARCH_REPO = re.compile(r"(^|\s)repo:(?P<full_name>[^\s/]+/[^\s]+)")
+
+
+def request_repository(url: str):
+    """
+    Returns the repository a request is about (its path, or the repo: qualifier of a
+    search), lowercased, or None
+
+    Args:
+        url (str): Requested URL, including its query string
+
+    Returns:
+        str: Full name of the repository, or None
+    """
+    parts = urlsplit(url)
+    match = REPO_PATH.match(parts.path)
+    if match is None and "/search/" in parts.path:
+        match = SEARCH_REPO.search(parse_qs(parts.query).get("q", [""])[0])
+    return match["full_name"].lower() if match else None
+
+
+@dataclass
+class TokenState:
+    """
+    Quota known for a token
+    """
+    authorization: str
+    limit: int = None
+    remaining: int = None
+    reset: float = 0.0
+    blocked_until: float = 0.0
+    requests: int = 0
+    # Resource other than core -> time until which it's out of quota
+    blocked_resources: dict = field(default_factory=dict)
+
+    def available(self, now: float, resource: str = CORE_RESOURCE):
+        """
+        Returns the requests the token can still send before its quota resets
+        """
+        if self.blocked_until > now:
+            return 0
+        if resource != CORE_RESOURCE:
+            return 0 if self.blocked_resources.get(resource, 0.0) > now else math.inf
+        if self.remaining is None or self.reset <= now:
+            return self.limit if self.limit is not None else math.inf
+        return self.remaining
+
+
+class RequestScheduler:
+    """
+    Paces the API requests and spreads the read-only ones for public data across a pool of
+    tokens
+    """
+
+    def __init__(self, tokens: list = None, max_rate: float = DEFAULT_MAX_RATE,
+                 burst: int = 10, reserve: float = 0.1, max_retries: int = 5):
+        """
+        Args:
+            tokens (list): Tokens read-only requests can be spread across
+            max_rate (float): Maximum requests per second
+            burst (int): Requests that can be sent at once before pacing applies
+            reserve (float): Fraction of the quota below which requests are spread until reset
+            max_retries (int): Times a rate-limited or failed request is sent again
+        """
+        self.__lock = threading.Lock()
+        self.__pool = [TokenState(f"token {token}") for token in tokens or []]
+        self.__states = {state.authorization: state for state in self.__pool}
+        self.__max_rate = max_rate
+        self.__burst = burst
+        self.__reserve = reserve
+        self.__max_retries = max_retries
+        # Lowercased full names of the repositories only the client token can read
+        self.__private_repos = set()
+        self.__bucket = float(burst)
+        self.__last_refill = time.monotonic()
+
+        self.requests = 0
+        self.throttled_seconds = 0.0
+
+    @property
+    def max_rate(self):
+        """
+        Getter for max_rate
+        """
+        return self.__max_rate
+
+    @property
+    def max_retries(self):
+        """
+        Getter for max_retries
+        """
+        return self.__max_retries
+
+    def add_private_repo(self, full_name: str):
+        """
+        Registers a private repository, whose requests keep the token of the client
+
+        Args:
+            full_name (str): Full name of the repository
+        """
+        with self.__lock:
+            self.__private_repos.add(full_name.lower())
+
+    def mark_private(self, url: str):
+        """
+        Registers the repository a request is about as private, after another token was
+        refused it
+
+        Args:
+            url (str): Requested URL
+
+        Returns:
+            bool: True if the request is about a repository, and can be sent again with
+            the token of the client
+        """
+        full_name = request_repository(url)
+        if full_name is None:
+            return False
+        self.add_private_repo(full_name)
+        return True
+
+    def is_shared(self, verb: str, url: str):
+        """
+        Returns whether a request can be sent with any token of the pool: read-only, not
+        bound to the identity of the client and not about a private repository
+
+        Args:
+            verb (str): HTTP verb of the request
+            url (str): Requested URL, including its query string
+
+        Returns:
+            bool: True if any token gets the same response
+        """
+        if verb not in READ_ONLY_VERBS or url is None \
+                or IDENTITY_PATH.match(urlsplit(url).path):
+            return False
+        full_name = request_repository(url)
+        with self.__lock:
+            return full_name not in self.__private_repos
+
+    def __state(self, authorization: str):
+        """
+        Returns the state of a token, registering it if it's new
+
+        Note:
+            - Method is private and must be called holding the lock
+        """
+        state = self.__states.get(authorization)
+        if state is None:
+            state = TokenState(authorization)
+            self.__states[authorization] = state
+        return state
+
+    def __rate(self, now: float):
+        """
+        Returns the requests per second that can be sent right now
+
+        Note:
+            - Method is private and must be called holding the lock
+        """
+        known = [s for s in self.__states.values()
+                 if s.limit and s.remaining is not None and s.reset > now]
+        if not known or len(known) < len(self.__states):
+            return self.__max_rate
+
+        remaining = sum(s.available(now) for s in known)
+        if remaining >= sum(s.limit for s in known) * self.__reserve:
+            return self.__max_rate
+
+        # Spread the quota left of every token until it resets
+        sustainable = sum(max(s.available(now), 1) / (s.reset - now) for s in known)
+        return min(self.__max_rate, sustainable)
+
+    def acquire(self, verb: str, authorization: str, resource: str = CORE_RESOURCE,
+                url: str = None):
+        """
+        Waits until a request can be sent and chooses the token to send it with
+
+        Args:
+            verb (str): HTTP verb of the request
+            authorization (str): Authorization header set by the client
+            resource (str): Rate-limit resource of the request, such as "search"
+            url (str): Requested URL. Without it, the request keeps the token of the client
+
+        Returns:
+            str: Authorization header to send the request with
+        """
+        shared = self.is_shared(verb, url)
+        while True:
+            with self.__lock:
+                now_wall = time.time()
+                now = time.monotonic()
+                client = self.__state(authorization) if authorization else None
+
+                candidates = [client] if client else []
+                if shared:
+                    candidates += [s for s in self.__pool if s is not client]
+
+                chosen = max(candidates, key=lambda s: s.available(now_wall, resource),
+                             default=None)
+
+                if chosen is not None and chosen.available(now_wall, resource) <= 0:
+                    # Every token is out of quota: wait for the earliest one to come back
+                    if resource == CORE_RESOURCE:
+                        wait = min(max(s.blocked_until, s.reset) for s in candidates)
+                    else:
+                        wait = min(max(s.blocked_until, s.blocked_resources.get(resource, 0.0))
+                                   for s in candidates)
+                    wait = max(wait - now_wall, 1.0)
+                else:
+                    rate = self.__rate(now_wall)
+                    self.__bucket = min(self.__burst,
+                                        self.__bucket + (now - self.__last_refill) * rate)
+                    self.__last_refill = now
+                    if self.__bucket >= 1:
+                        self.__bucket -= 1
+                        self.requests += 1
+                        if chosen is None:
+                            return authorization
+                        chosen.requests += 1
+                        if resource == CORE_RESOURCE and chosen.remaining is not None \
+                                and chosen.remaining > 0:
+                            chosen.remaining -= 1
+                        return chosen.authorization
+                    wait = (1 - self.__bucket) / rate
+
+                self.throttled_seconds += wait
+
+            time.sleep(wait)
+
+    def update(self, authorization: str, status: int, headers: dict):
+        """
+        Records the quota reported by a response
+
+        Args:
+            authorization (str): Authorization header the request was sent with
+            status (int): Status of the response
+            headers (dict): Headers of the response
+
+        Returns:
+            bool: True if the request was rate limited or failed and must be sent again
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        resource = headers.get("x-ratelimit-resource", CORE_RESOURCE)
+
+        with self.__lock:
+            state = self.__state(authorization) if authorization else None
+            if state is not None and resource != CORE_RESOURCE:
+                # Quota of its own: once it's used up, hold its requests until it resets
+                if headers.get("x-ratelimit-remaining") == "0":
+                    state.blocked_resources[resource] = float(
+                        headers.get("x-ratelimit-reset", now + 60))
+            elif state is not None:
+                if "x-ratelimit-limit" in headers:
+                    state.limit = int(headers["x-ratelimit-limit"])
+                if "x-ratelimit-remaining" in headers:
+                    state.remaining = int(headers["x-ratelimit-remaining"])
+                if "x-ratelimit-reset" in headers:
+                    state.reset = float(headers["x-ratelimit-reset"])
+
+            if status in RATE_LIMITED_STATUSES:
+                if "retry-after" in headers:
+                    blocked_until = now + float(headers["retry-after"])
+                elif headers.get("x-ratelimit-remaining") == "0":
+                    blocked_until = float(headers.get("x-ratelimit-reset", now + 60))
+                else:
+                    # Not a rate limit: a genuine permission error
+                    return False
+                if state is not None and resource != CORE_RESOURCE:
+                    state.blocked_resources[resource] = blocked_until
+                elif state is not None:
+                    state.blocked_until = blocked_until
+                return True
+
+        return status in RETRIED_STATUSES
+
+    def projected_completion(self, pending_requests: int):
+        """
+        Returns when a number of requests would be done at the current pace and quota
+
+        Args:
+            pending_requests (int): Requests still to be sent
+
+        Returns:
+            float: Projected completion time, as a Unix timestamp
+        """
+        with self.__lock:
+            now = time.time()
+            states = list(self.__states.values())
+            rate = self.__rate(now)
+            available = sum(s.available(now) for s in states) if states else math.inf
+
+            if pending_requests <= available:
+                return now + pending_requests / rate
+
+            # The quota runs out: the rest waits for the resets, a full quota per hour
+            per_hour = sum(s.limit or 5000 for s in states)
+            excess = pending_requests - available
+            first_reset = min((s.reset for s in states if s.reset > now), default=now)
+            hours = math.ceil(excess / per_hour) - 1
+            return max(first_reset, now + available / rate) + hours * 3600 + \
+                (excess - hours * per_hour) / self.__max_rate
+
+    def summary(self):
+        """
+        Returns the quota known for every token, with the tokens themselves hidden
+
+        Returns:
+            list: One dictionary per token
+        """
+        with self.__lock:
+            return [{
+                "token": f"...{state.authorization[-4:]}",
+                "requests": state.requests,
+                "remaining": state.remaining,
+                "limit": state.limit,
+                "reset": state.reset
+            } for state in self.__states.values()]
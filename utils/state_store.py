@@ -0,0 +1,122 @@
+"""
+Module: state_store
+
+This module provides a local store for the per-repository aggregates computed by previous
+wrapped runs, so that later runs only need to fetch the commits made since then.
+
+For every user, year and repository (keyed by repository id, so renames are harmless) the
+store keeps a watermark (SHA and committer date of the newest commit of the user seen)
+along with the aggregates already computed: commit counts, commits per day and changes
+per language. Push events applied to the aggregates after the last scan (see
+api.push_events) are recorded by SHA, along with the time of that scan.
+
+Classes:
+    StateStore: JSON-file backed store of per-repository watermarks and aggregates.
+
+Functions:
+    - empty_repo_state(full_name, private) -> dict: Returns the state of a repository with no
+    commits seen.
+
+Dependencies:
+    - json: Used for reading and writing the store.
+    - os: Used for replacing the store file atomically.
+"""
+
+import json
+import os
+
+STATE_VERSION = 2
+
+
+def empty_repo_state(full_name: str, private: bool):
+    """
+    Returns the state of a repository of which no commit has been seen yet
+
+    Args:
+        full_name (str): Full name of the repository
+        private (bool): Whether or not the repository is private
+
+    Returns:
+        dict: Repository state
+    """
+    return {
+        "full_name": full_name,
+        "private": private,
+        "head_sha": None,
+        "head_date": None,
+        "total_count": 0,
+        "total_count_author": 0,
+        "commit_days": {},
+        "commit_hours": {},
+        "languages": [],
+        "scanned_at": None,
+        "ingested": []
+    }
+
+
+class StateStore:
+    """
+    Store of the aggregates of previous runs, persisted as a JSON file
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Loads the store, starting empty if the file doesn't exist or belongs to
+        another version
+
+        Args:
+            filepath (str): Filepath of the store
+        """
+        self.__filepath = filepath
+        self.__data = {"version": STATE_VERSION, "users": {}}
+
+        if os.path.isfile(filepath):
+            try:
+                with open(filepath, 'r', encoding="utf-8") as file:
+                    data = json.load(file)
+            except json.JSONDecodeError:
+                print(f"Error: Unable to decode the state in {filepath}, starting over")
+            else:
+                if data.get("version") == STATE_VERSION:
+                    self.__data = data
+
+    @property
+    def filepath(self):
+        """
+        Getter for filepath
+        """
+        return self.__filepath
+
+    def get_repos(self, login: str, year: int):
+        """
+        Returns the stored state of every repository of a user in a year
+
+        Args:
+            login (str): Login of the user
+            year (int): Year
+
+        Returns:
+            dict: Repository states, keyed by repository id (as a string)
+        """
+        return self.__data["users"].get(login, {}).get(str(year), {})
+
+    def set_repos(self, login: str, year: int, repos: dict):
+        """
+        Replaces the stored state of every repository of a user in a year. Repositories
+        that are not present anymore are dropped.
+
+        Args:
+            login (str): Login of the user
+            year (int): Year
+            repos (dict): Repository states, keyed by repository id (as a string)
+        """
+        self.__data["users"].setdefault(login, {})[str(year)] = repos
+
+    def save(self):
+        """
+        Writes the store to disk, replacing the previous file atomically
+        """
+        tmp = self.__filepath + ".tmp"
+        with open(tmp, 'w', encoding="utf-8") as file:
+            json.dump(self.__data, file)
+        os.replace(tmp, self.__filepath)